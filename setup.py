@@ -1,78 +1,74 @@
 """
 Setup script for GDR Framework V3.1 Enterprise
+
+Os metadados estáticos ficam em pyproject.toml; aqui resta apenas o que é
+calculado em tempo de build (descoberta de pacotes e versão).
 """
 
-from setuptools import setup, find_packages
-from pathlib import Path
-
-# Ler README
-this_directory = Path(__file__).parent
-long_description = (this_directory / "README.md").read_text(encoding='utf-8')
-
-# Ler requirements
-requirements = []
-with open('requirements.txt', 'r', encoding='utf-8') as f:
-    for line in f:
-        line = line.strip()
-        if line and not line.startswith('#'):
-            requirements.append(line)
-
-setup(
-    name='gdr-framework',
-    version='3.1.0',
-    author='GDR Team',
-    author_email='team@gdr-framework.com',
-    description='Sistema completo de enriquecimento e qualificação automatizada de leads',
-    long_description=long_description,
-    long_description_content_type='text/markdown',
-    url='https://github.com/seu-usuario/gdr-framework',
-    packages=find_packages(where='src'),
-    package_dir={'': 'src'},
-    classifiers=[
-        'Development Status :: 5 - Production/Stable',
-        'Intended Audience :: Developers',
-        'Intended Audience :: Business',
-        'Topic :: Software Development :: Libraries :: Python Modules',
-        'Topic :: Office/Business',
-        'Topic :: Internet :: WWW/HTTP :: Dynamic Content',
-        'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.8',
-        'Programming Language :: Python :: 3.9',
-        'Programming Language :: Python :: 3.10',
-        'Programming Language :: Python :: 3.11',
-        'Programming Language :: Python :: 3.12',
-        'Operating System :: OS Independent',
-    ],
-    python_requires='>=3.8',
-    install_requires=requirements,
-    extras_require={
-        'dev': [
-            'pytest>=8.0.0',
-            'pytest-asyncio>=0.23.0',
-            'pytest-cov>=5.0.0',
-            'black>=24.0.0',
-            'flake8>=7.0.0',
-            'mypy>=1.8.0',
-        ],
-        'selenium': [
-            'selenium>=4.15.0',
-            'webdriver-manager>=4.0.0',
-        ],
-        'nlp': [
-            'spacy>=3.7.0',
-            'textblob>=0.18.0',
-        ],
-    },
-    entry_points={
-        'console_scripts': [
-            'gdr-test=src.run_test:main',
-            'gdr-pipeline=src.run_complete_pipeline:main',
-        ],
-    },
-    include_package_data=True,
-    package_data={
-        '': ['*.txt', '*.md', '*.yaml', '*.json'],
-    },
-    zip_safe=False,
-)
\ No newline at end of file
+import os
+import sys
+
+NAME = 'gdr-framework'
+VERSION = '3.1.0'
+
+# Consultas triviais de ferramentas (python setup.py --version) respondidas
+# sem importar setuptools
+CHEAP_QUERIES = {
+    '--name': NAME,
+    '--version': VERSION,
+    '--fullname': f'{NAME}-{VERSION}',
+}
+
+IGNORED_DIRS = frozenset({
+    'node_modules', '.git', '__pycache__', 'build', 'dist',
+    '.venv', 'venv', '.tox', '.nox', '.mypy_cache', '.pytest_cache',
+    '.ruff_cache', '.eggs',
+})
+
+
+def find_packages(where):
+    """
+    Descobre pacotes com um PackageFinder que poda diretórios ignorados antes
+    de descer neles, evitando stat/readdir em node_modules, builds, caches, etc.
+    """
+    from setuptools import PackageFinder
+
+    class FastPackageFinder(PackageFinder):
+
+        @classmethod
+        def _find_iter(cls, where, exclude, include):
+            # Mesmo percurso do PackageFinder (setuptools >= 61), mas com a
+            # poda aplicada em dirs[:] antes de qualquer stat do subdiretório
+            for root, dirs, files in os.walk(str(where), followlinks=True):
+                all_dirs = [d for d in dirs if d not in IGNORED_DIRS and '.' not in d]
+                dirs[:] = []
+
+                for dir in all_dirs:
+                    full_path = os.path.join(root, dir)
+                    package = os.path.relpath(full_path, where).replace(os.path.sep, '.')
+
+                    if not cls._looks_like_package(full_path, package):
+                        continue
+
+                    if include(package) and not exclude(package):
+                        yield package
+
+                    dirs.append(dir)
+
+    return FastPackageFinder.find(where=where)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+
+    if args and all(arg in CHEAP_QUERIES for arg in args):
+        for arg in args:
+            print(CHEAP_QUERIES[arg])
+        sys.exit(0)
+
+    from setuptools import setup
+
+    setup(
+        version=VERSION,
+        packages=find_packages('src'),
+    )
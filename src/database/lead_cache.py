@@ -4,46 +4,160 @@ Sistema de Cache com DuckDB para GDR Framework
 Evita reprocessamento de leads e mantém histórico completo
 """
 
+import asyncio
 import duckdb
 import json
-import hashlib
+import os
+import threading
+import xxhash
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Tuple
 import logging
+from collections import Counter
+from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson não disponível - usando json da stdlib no cache")
+
+
+def _dumps(obj: Any) -> str:
+    """Serializa para JSON com orjson quando disponível (json como fallback)"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+        except TypeError:
+            # Tipos que o orjson não serializa (ex.: inteiros > 64 bits)
+            pass
+    return json.dumps(obj)
+
+
+def _loads(data: str) -> Any:
+    """Desserializa JSON com orjson quando disponível (json como fallback)"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Documentos antigos gravados pelo json da stdlib (ex.: NaN)
+            pass
+    return json.loads(data)
+
+
 class LeadCache:
     """
     Cache persistente para leads processados usando DuckDB
     """
     
-    def __init__(self, db_path: str = "data/gdr_cache.duckdb"):
+    # Colunas gravadas por save/save_lead, na ordem do INSERT
+    # (full_result precisa ser a última: as colunas derivadas a referenciam)
+    LEAD_COLUMNS = (
+        'lead_hash', 'lead_id', 'lead_name', 'cnpj', 'original_data',
+        'enriched_email', 'enriched_phone', 'enriched_website', 'enriched_whatsapp',
+        'enriched_instagram', 'enriched_facebook', 'enriched_linkedin',
+        'sdr_score', 'sdr_category', 'sdr_qualified', 'quality_score', 'kappa_score',
+        'processing_time', 'total_cost_usd', 'cache_ttl_hours',
+        'full_result'
+    )
+    
+    # Colunas JSON extraídas de full_result pelo próprio DuckDB no INSERT,
+    # sem serializar os mesmos objetos duas vezes em Python
+    # (coluna -> (chave no resultado, valor padrão))
+    DERIVED_COLUMNS = {
+        'llm_consensus': ('gdr_llm_consensus', '{}'),
+        'providers_used': ('gdr_providers_used', '[]'),
+    }
+    
+    # Validade das respostas de LLM reaproveitadas por prompt (7 dias, como os leads)
+    LLM_RESPONSE_TTL_HOURS = 168
+    
+    # Respostas de LLM mantidas por lead em evict_to (10 análises x 5
+    # providers; as respostas são por prompt, sem vínculo com o lead)
+    LLM_RESPONSES_PER_LEAD = 50
+    
+    # Hits acumulados em memória antes de um UPDATE de uso em lote
+    TOUCH_FLUSH_SIZE = 100
+    
+    # Linhas lidas do DuckDB por vez em export_to_excel
+    EXPORT_CHUNK_SIZE = 10000
+    
+    # Colunas de identidade: determinadas por lead_hash, não mudam entre
+    # gravações do mesmo lead e não são reatribuídas no upsert
+    KEY_COLUMNS = ('lead_hash', 'lead_id', 'cnpj')
+    
+    # Índices secundários de processed_leads (nome -> colunas); apenas sobre
+    # KEY_COLUMNS: o DuckDB restringe o upsert de colunas indexadas (erro ou
+    # linha não atualizada, conforme a versão), então score, nome e datas,
+    # que mudam a cada gravação, ficam sem índice
+    LEAD_INDEXES = {
+        'idx_lead_id': 'lead_id',
+        'idx_cnpj': 'cnpj',
+    }
+    
+    # Índices de versões anteriores sobre colunas que mudam (bancos antigos)
+    OBSOLETE_INDEXES = (
+        'idx_sdr_qualified', 'idx_lead_id_created', 'idx_cnpj_updated',
+        'idx_qualified_score', 'idx_lead_name', 'idx_created_at',
+    )
+    
+    def __init__(self, db_path: str = "data/gdr_cache.duckdb", threads: Optional[int] = None,
+                 memory_limit: str = "2GB"):
         """
         Inicializa o cache com DuckDB
         
         Args:
             db_path: Caminho para o arquivo do banco de dados
+            threads: Threads do DuckDB (padrão: número de CPUs)
+            memory_limit: Limite de memória do DuckDB (ex.: "2GB")
         """
         # Criar diretório se não existir
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         
         self.db_path = db_path
-        self.conn = duckdb.connect(db_path)
+        self.conn = duckdb.connect(db_path, config={
+            'threads': threads or os.cpu_count() or 1,
+            'memory_limit': memory_limit,
+        })
+        self.conn.execute("SET enable_object_cache = true")
+        
+        # Cursores por thread: cada worker (asyncio.to_thread) lê e grava na
+        # sua própria conexão lógica, com transação própria; a conexão
+        # principal fica com o DDL
+        self._local = threading.local()
+        
+        # Serializa as escritas: gravações concorrentes no mesmo lead gerariam
+        # conflito de transação no DuckDB (reentrante: evict_to chama
+        # _flush_touches)
+        self._write_lock = threading.RLock()
         
         # Criar tabelas se não existirem
         self._create_tables()
         
-        # Estatísticas da sessão
-        self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'saves': 0,
-            'errors': 0
-        }
+        # INSERT parametrizado montado uma única vez
+        params = [f'${i}' for i in range(1, len(self.LEAD_COLUMNS) + 1)]
+        self._insert_stmt = self._upsert_sql(
+            f"VALUES ({', '.join(params)}, {self._derived_columns_sql(params[-1])}, CURRENT_TIMESTAMP)"
+        )
+        
+        # Índice FTS de lead_name, reconstruído só por refresh_name_index
+        # (None = extensão ainda não carregada / índice ainda não verificado)
+        self._fts_available = None
+        self._fts_indexed = None
+        self._fts_lock = threading.Lock()
+        
+        # Hits pendentes de registro (lead_hash -> número de acessos)
+        self._touched = Counter()
+        
+        # Estatísticas da sessão (incrementadas via _count, sob lock)
+        self.stats = Counter(hits=0, misses=0, saves=0, errors=0)
+        self._stats_lock = threading.Lock()
         
-        logger.info(f"Cache inicializado: {db_path}")
+        logger.info("Cache inicializado: %s", db_path)
     
     def _create_tables(self):
         """Cria as tabelas necessárias no banco"""
@@ -86,11 +200,25 @@ class LeadCache:
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 cache_ttl_hours INTEGER DEFAULT 168,  -- 7 dias padrão
                 
+                -- Uso do cache (base da evicção por recência)
+                last_accessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                hit_count INTEGER DEFAULT 0,
+                
                 -- Resultado completo em JSON
                 full_result JSON
             )
         """)
         
+        # Colunas de uso adicionadas depois (bancos antigos)
+        self.conn.execute("""
+            ALTER TABLE processed_leads
+            ADD COLUMN IF NOT EXISTS last_accessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        """)
+        self.conn.execute("""
+            ALTER TABLE processed_leads
+            ADD COLUMN IF NOT EXISTS hit_count INTEGER DEFAULT 0
+        """)
+        
         # Tabela de estatísticas de processamento
         self.conn.execute("""
             CREATE TABLE IF NOT EXISTS processing_stats (
@@ -108,40 +236,119 @@ class LeadCache:
             )
         """)
         
-        # Tabela de histórico de buscas
+        # Tabela de resultados por scraper (um registro por lead + scraper)
         self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS search_history (
-                id INTEGER PRIMARY KEY,
-                search_query VARCHAR,
-                search_type VARCHAR,  -- 'cnpj', 'name', 'email', etc
-                results_count INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            CREATE TABLE IF NOT EXISTS scraper_results (
+                lead_id VARCHAR NOT NULL,
+                scraper_name VARCHAR NOT NULL,
+                result_data JSON,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (lead_id, scraper_name)
             )
         """)
         
-        # Criar índices para busca rápida
         self.conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_lead_id ON processed_leads(lead_id)
+            CREATE INDEX IF NOT EXISTS idx_scraper_lead_id 
+            ON scraper_results(lead_id)
         """)
         
+        # Respostas de LLM por conteúdo do prompt (chave xxh3 de provider,
+        # modelo e prompt), reaproveitadas entre leads e execuções
         self.conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_cnpj ON processed_leads(cnpj)
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                prompt_key VARCHAR PRIMARY KEY,
+                provider VARCHAR NOT NULL,
+                model VARCHAR,
+                response VARCHAR,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
         """)
         
+        # Tabela de histórico de buscas
         self.conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_lead_name ON processed_leads(lead_name)
+            CREATE TABLE IF NOT EXISTS search_history (
+                id INTEGER PRIMARY KEY,
+                search_query VARCHAR,
+                search_type VARCHAR,  -- 'cnpj', 'name', 'email', etc
+                results_count INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
         """)
         
-        self.conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_created_at ON processed_leads(created_at)
-        """)
+        # Remover índices sobre colunas atualizadas no upsert (bancos antigos)
+        for index_name in self.OBSOLETE_INDEXES:
+            self.conn.execute(f"DROP INDEX IF EXISTS {index_name}")
         
-        self.conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_sdr_qualified ON processed_leads(sdr_qualified)
-        """)
+        # Criar índices das colunas de identidade
+        self._create_indexes()
         
         logger.info("Tabelas e índices criados/verificados")
     
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        """Cursor da thread atual sobre a conexão do cache"""
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self._local.cursor = self.conn.cursor()
+        return cursor
+    
+    def _upsert_sql(self, source: str) -> str:
+        """
+        INSERT em processed_leads que atualiza o lead já gravado (mesmo
+        lead_hash) sem reatribuir as KEY_COLUMNS
+        
+        Args:
+            source: Cláusula VALUES ou SELECT com LEAD_COLUMNS, DERIVED_COLUMNS
+                e updated_at, nessa ordem
+                
+        Returns:
+            Comando SQL
+        """
+        columns = [*self.LEAD_COLUMNS, *self.DERIVED_COLUMNS, 'updated_at']
+        updates = ', '.join(f"{column} = excluded.{column}"
+                            for column in columns if column not in self.KEY_COLUMNS)
+        return f"""
+            INSERT INTO processed_leads ({', '.join(columns)})
+            {source}
+            ON CONFLICT (lead_hash) DO UPDATE SET {updates}
+        """
+    
+    def _derived_columns_sql(self, full_result: str) -> str:
+        """
+        Expressões SQL das DERIVED_COLUMNS a partir de full_result
+        
+        Args:
+            full_result: Expressão SQL com o JSON do resultado completo
+            
+        Returns:
+            Expressões separadas por vírgula, na ordem de DERIVED_COLUMNS
+        """
+        return ', '.join(
+            f"COALESCE(json_extract({full_result}::JSON, '$.{key}'), '{default}')"
+            for key, default in self.DERIVED_COLUMNS.values()
+        )
+    
+    def _create_indexes(self):
+        """Cria os índices secundários de processed_leads"""
+        for index_name, columns in self.LEAD_INDEXES.items():
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON processed_leads({columns})")
+    
+    @contextmanager
+    def bulk_load_context(self):
+        """
+        Remove os índices secundários durante uma carga grande e os recria
+        ao final, em vez de mantê-los a cada linha inserida
+        """
+        with self._write_lock:
+            for index_name in self.LEAD_INDEXES:
+                self.conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        
+        try:
+            yield self
+        finally:
+            with self._write_lock:
+                self._create_indexes()
+            logger.info("Índices recriados após carga em lote")
+    
     def get_lead(self, lead_id: str, ttl_hours: int = 168) -> Optional[Dict[str, Any]]:
         """
         Busca lead no cache por ID
@@ -155,29 +362,30 @@ class LeadCache:
         """
         try:
             # Buscar no cache considerando TTL
-            result = self.conn.execute(f"""
-                SELECT full_result, created_at
+            result = self._cursor().execute("""
+                SELECT full_result, lead_hash
                 FROM processed_leads
-                WHERE lead_id = '{lead_id}'
-                AND created_at > CURRENT_TIMESTAMP - INTERVAL {ttl_hours} HOUR
+                WHERE lead_id = ?
+                AND created_at > CURRENT_TIMESTAMP - INTERVAL (?) HOUR
                 ORDER BY created_at DESC
                 LIMIT 1
-            """).fetchone()
+            """, [lead_id, ttl_hours]).fetchone()
             
             if result:
-                self.stats['hits'] += 1
-                logger.info(f"Cache HIT para lead ID: {lead_id}")
+                self._count('hits')
+                self._touch(result[1])
+                logger.info("Cache HIT para lead ID: %s", lead_id)
                 
                 # Retornar resultado deserializado
-                return json.loads(result[0]) if result[0] else None
+                return _loads(result[0]) if result[0] else None
             else:
-                self.stats['misses'] += 1
-                logger.debug(f"Cache MISS para lead ID: {lead_id}")
+                self._count('misses')
+                logger.debug("Cache MISS para lead ID: %s", lead_id)
                 return None
                 
         except Exception as e:
-            logger.error(f"Erro ao buscar lead no cache: {e}")
-            self.stats['errors'] += 1
+            logger.error("Erro ao buscar lead no cache: %s", e)
+            self._count('errors')
             return None
     
     def is_recent(self, lead_id: str, days: int = 7) -> bool:
@@ -192,19 +400,19 @@ class LeadCache:
             True se o cache é recente, False caso contrário
         """
         try:
-            result = self.conn.execute(f"""
+            result = self._cursor().execute("""
                 SELECT created_at
                 FROM processed_leads
-                WHERE lead_id = '{lead_id}'
-                AND created_at > CURRENT_TIMESTAMP - INTERVAL {days} DAY
+                WHERE lead_id = ?
+                AND created_at > CURRENT_TIMESTAMP - INTERVAL (?) DAY
                 ORDER BY created_at DESC
                 LIMIT 1
-            """).fetchone()
+            """, [lead_id, days]).fetchone()
             
             return result is not None
             
         except Exception as e:
-            logger.error(f"Erro ao verificar idade do cache: {e}")
+            logger.error("Erro ao verificar idade do cache: %s", e)
             return False
     
     def save_lead(self, lead_id: str, result: Dict[str, Any], ttl_hours: int = 168):
@@ -217,79 +425,131 @@ class LeadCache:
             ttl_hours: Tempo de vida do cache em horas
         """
         try:
-            # Gerar hash baseado no lead_id
-            lead_hash = hashlib.sha256(lead_id.encode()).hexdigest()
-            
-            # Preparar dados para inserção
-            data = {
-                'lead_hash': lead_hash,
-                'lead_id': lead_id,
-                'lead_name': result.get('original_nome', result.get('name', '')),
-                'cnpj': result.get('original_id', result.get('cnpj', lead_id)),
-                'original_data': json.dumps(result.get('original_data', {})),
-                
-                # Dados enriquecidos
-                'enriched_email': result.get('gdr_consolidated_email', ''),
-                'enriched_phone': result.get('gdr_consolidated_phone', ''),
-                'enriched_website': result.get('gdr_consolidated_website', ''),
-                'enriched_whatsapp': result.get('gdr_consolidated_whatsapp', ''),
-                'enriched_instagram': result.get('gdr_instagram_url', ''),
-                'enriched_facebook': result.get('gdr_facebook_url', ''),
-                'enriched_linkedin': result.get('gdr_linkedin_url', ''),
-                
-                # Scores
-                'sdr_score': result.get('gdr_sdr_lead_score', 0),
-                'sdr_category': result.get('gdr_sdr_category', ''),
-                'sdr_qualified': result.get('gdr_sdr_qualified', False),
-                'quality_score': result.get('gdr_quality_overall_score', 0),
-                'kappa_score': result.get('gdr_kappa_overall_score', 0),
-                
-                # LLM info
-                'llm_consensus': json.dumps(result.get('gdr_llm_consensus', {})),
-                'providers_used': json.dumps(result.get('gdr_providers_used', [])),
-                
-                # Metadados
-                'processing_time': result.get('processing_time_seconds', 0),
-                'total_cost_usd': result.get('gdr_total_cost_usd', 0),
-                'cache_ttl_hours': ttl_hours,
-                
-                # Resultado completo
-                'full_result': json.dumps(result)
-            }
-            
-            # Preparar valores com escape apropriado
-            values = []
-            for v in data.values():
-                if v is None:
-                    values.append("NULL")
-                elif isinstance(v, str):
-                    # Escapar aspas simples
-                    values.append(f"'{v.replace(chr(39), chr(39)+chr(39))}'")
-                elif isinstance(v, bool):
-                    values.append("TRUE" if v else "FALSE")
-                else:
-                    values.append(str(v))
+            data = self._build_lead_row(lead_id, result, ttl_hours)
             
             # Inserir ou atualizar
-            query = f"""
-                INSERT OR REPLACE INTO processed_leads
-                (lead_hash, lead_id, lead_name, cnpj, original_data,
-                 enriched_email, enriched_phone, enriched_website, enriched_whatsapp,
-                 enriched_instagram, enriched_facebook, enriched_linkedin,
-                 sdr_score, sdr_category, sdr_qualified, quality_score, kappa_score,
-                 llm_consensus, providers_used,
-                 processing_time, total_cost_usd, cache_ttl_hours,
-                 full_result, updated_at)
-                VALUES ({', '.join(values)}, CURRENT_TIMESTAMP)
-            """
-            self.conn.execute(query)
-            
-            self.stats['saves'] += 1
-            logger.info(f"Lead {lead_id} salvo no cache")
+            with self._write_lock:
+                self._cursor().execute(self._insert_stmt, [data[c] for c in self.LEAD_COLUMNS])
+            
+            self._count('saves')
+            logger.debug("Lead %s salvo no cache", lead_id)
+            
+        except Exception as e:
+            logger.error("Erro ao salvar lead no cache: %s", e)
+            self._count('errors')
+    
+    def save_leads_bulk(self, entries: List[Tuple[str, Dict[str, Any], Dict[str, Any]]],
+                        ttl_hours: int = 168) -> int:
+        """
+        Salva os leads de um batch e seus resultados de scrapers em uma única
+        transação, com um INSERT em lote por tabela
+        
+        Args:
+            entries: Lista de tuplas (lead_id, resultado, {scraper_name: dados})
+            ttl_hours: Tempo de vida do cache em horas
+            
+        Returns:
+            Número de leads salvos
+        """
+        import pandas as pd
+        
+        # Um registro por lead_id; o último resultado do batch prevalece
+        lead_rows = {}
+        scraper_rows = {}
+        for lead_id, result, scrapers in entries:
+            if result:
+                lead_rows[lead_id] = self._build_lead_row(lead_id, result, ttl_hours)
+            for scraper_name, data in (scrapers or {}).items():
+                if isinstance(data, dict) and data:
+                    scraper_rows[(lead_id, scraper_name)] = (lead_id, scraper_name, _dumps(data))
+        
+        if not lead_rows and not scraper_rows:
+            return 0
+        
+        columns = ', '.join(self.LEAD_COLUMNS)
+        leads_df = pd.DataFrame(list(lead_rows.values()), columns=list(self.LEAD_COLUMNS))
+        scrapers_df = pd.DataFrame(list(scraper_rows.values()),
+                                   columns=['lead_id', 'scraper_name', 'result_data'])
+        
+        try:
+            with self._write_lock:
+                cursor = self._cursor()
+                cursor.register('new_leads_df', leads_df)
+                cursor.register('new_scrapers_df', scrapers_df)
+                cursor.begin()
+                try:
+                    cursor.execute(self._upsert_sql(f"""
+                        SELECT {columns}, {self._derived_columns_sql('full_result')}, CURRENT_TIMESTAMP
+                        FROM new_leads_df
+                    """))
+                    cursor.execute("""
+                        INSERT OR REPLACE INTO scraper_results
+                        (lead_id, scraper_name, result_data, created_at)
+                        SELECT lead_id, scraper_name, result_data, CURRENT_TIMESTAMP
+                        FROM new_scrapers_df
+                    """)
+                    cursor.commit()
+                except Exception:
+                    cursor.rollback()
+                    raise
+                finally:
+                    cursor.unregister('new_leads_df')
+                    cursor.unregister('new_scrapers_df')
+            
+            self._count('saves', len(lead_rows))
+            logger.info("%s leads e %s resultados de scrapers salvos no cache em lote",
+                        len(lead_rows), len(scraper_rows))
+            return len(lead_rows)
             
         except Exception as e:
-            logger.error(f"Erro ao salvar lead no cache: {e}")
-            self.stats['errors'] += 1
+            logger.error("Erro ao salvar lote no cache: %s", e)
+            self._count('errors')
+            return 0
+    
+    def _build_lead_row(self, lead_id: str, result: Dict[str, Any], ttl_hours: int) -> Dict[str, Any]:
+        """
+        Monta o registro de processed_leads de um lead identificado por lead_id
+        
+        Args:
+            lead_id: ID do lead
+            result: Resultado do processamento
+            ttl_hours: Tempo de vida do cache em horas
+            
+        Returns:
+            Dict com os valores de LEAD_COLUMNS
+        """
+        return {
+            # Hash baseado no lead_id
+            'lead_hash': xxhash.xxh3_128_hexdigest(lead_id.encode()),
+            'lead_id': lead_id,
+            'lead_name': result.get('original_nome', result.get('name', '')),
+            'cnpj': result.get('original_id', result.get('cnpj', lead_id)),
+            'original_data': _dumps(result.get('original_data', {})),
+            
+            # Dados enriquecidos
+            'enriched_email': result.get('gdr_consolidated_email', ''),
+            'enriched_phone': result.get('gdr_consolidated_phone', ''),
+            'enriched_website': result.get('gdr_consolidated_website', ''),
+            'enriched_whatsapp': result.get('gdr_consolidated_whatsapp', ''),
+            'enriched_instagram': result.get('gdr_instagram_url', ''),
+            'enriched_facebook': result.get('gdr_facebook_url', ''),
+            'enriched_linkedin': result.get('gdr_linkedin_url', ''),
+            
+            # Scores
+            'sdr_score': result.get('gdr_sdr_lead_score', 0),
+            'sdr_category': result.get('gdr_sdr_category', ''),
+            'sdr_qualified': result.get('gdr_sdr_qualified', False),
+            'quality_score': result.get('gdr_quality_overall_score', 0),
+            'kappa_score': result.get('gdr_kappa_overall_score', 0),
+            
+            # Metadados
+            'processing_time': result.get('processing_time_seconds', 0),
+            'total_cost_usd': result.get('gdr_total_cost_usd', 0),
+            'cache_ttl_hours': ttl_hours,
+            
+            # Resultado completo
+            'full_result': _dumps(result)
+        }
     
     def get_scraper_results(self, lead_id: str, ttl_hours: int = 168) -> Dict[str, Any]:
         """
@@ -303,25 +563,82 @@ class LeadCache:
             Dict com resultados dos scrapers ou {} se não encontrado
         """
         try:
-            results = self.conn.execute(f"""
+            results = self._cursor().execute("""
                 SELECT scraper_name, result_data
                 FROM scraper_results
-                WHERE lead_id = '{lead_id}'
-                AND created_at > CURRENT_TIMESTAMP - INTERVAL {ttl_hours} HOUR
-            """).fetchall()
+                WHERE lead_id = ?
+                AND created_at > CURRENT_TIMESTAMP - INTERVAL (?) HOUR
+            """, [lead_id, ttl_hours]).fetchall()
             
             if results:
                 scraper_data = {}
                 for name, data in results:
-                    scraper_data[name] = json.loads(data) if data else {}
+                    scraper_data[name] = _loads(data) if data else {}
                 return scraper_data
             
             return {}
             
         except Exception as e:
-            logger.error(f"Erro ao buscar scrapers no cache: {e}")
+            logger.error("Erro ao buscar scrapers no cache: %s", e)
             return {}
     
+    def prefetch_leads(self, lead_ids: List[str], ttl_hours: int = 168) -> Dict[str, Dict[str, Any]]:
+        """
+        Busca de uma vez o resultado e os scrapers em cache de vários leads,
+        substituindo get_lead/is_recent/get_scraper_results por lead
+        
+        Args:
+            lead_ids: IDs dos leads do batch
+            ttl_hours: Tempo de vida do cache em horas
+            
+        Returns:
+            Dict lead_id -> {'result': resultado ou None, 'scrapers': {nome: dados}},
+            com uma entrada para cada lead_id pedido
+        """
+        lead_ids = list(dict.fromkeys(lead_ids))
+        prefetched = {lead_id: {'result': None, 'scrapers': {}} for lead_id in lead_ids}
+        if not lead_ids:
+            return prefetched
+        
+        try:
+            cursor = self._cursor()
+            
+            # Resultado mais recente de cada lead dentro do TTL
+            rows = cursor.execute("""
+                SELECT lead_id, lead_hash, full_result
+                FROM processed_leads
+                WHERE lead_id IN (SELECT unnest($1::VARCHAR[]))
+                AND created_at > CURRENT_TIMESTAMP - INTERVAL ($2) HOUR
+                QUALIFY row_number() OVER (PARTITION BY lead_id ORDER BY created_at DESC) = 1
+            """, [lead_ids, ttl_hours]).fetchall()
+            
+            for lead_id, lead_hash, full_result in rows:
+                if full_result:
+                    prefetched[lead_id]['result'] = _loads(full_result)
+                    self._touch(lead_hash)
+            
+            # Resultados parciais de scrapers
+            rows = cursor.execute("""
+                SELECT lead_id, scraper_name, result_data
+                FROM scraper_results
+                WHERE lead_id IN (SELECT unnest($1::VARCHAR[]))
+                AND created_at > CURRENT_TIMESTAMP - INTERVAL ($2) HOUR
+            """, [lead_ids, ttl_hours]).fetchall()
+            
+            for lead_id, scraper_name, data in rows:
+                prefetched[lead_id]['scrapers'][scraper_name] = _loads(data) if data else {}
+            
+            hits = sum(1 for entry in prefetched.values() if entry['result'] is not None)
+            self._count('hits', hits)
+            self._count('misses', len(lead_ids) - hits)
+            logger.info("Cache em lote por lead_id: %s hits, %s misses", hits, len(lead_ids) - hits)
+            
+        except Exception as e:
+            logger.error("Erro ao buscar lote no cache: %s", e)
+            self._count('errors')
+        
+        return prefetched
+    
     def save_scraper_result(self, lead_id: str, scraper_name: str, result: Dict[str, Any]):
         """
         Salva resultado de um scraper específico
@@ -332,42 +649,63 @@ class LeadCache:
             result: Resultado do scraper
         """
         try:
-            # Criar tabela de scrapers se não existir
-            self.conn.execute("""
-                CREATE TABLE IF NOT EXISTS scraper_results (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    lead_id VARCHAR NOT NULL,
-                    scraper_name VARCHAR NOT NULL,
-                    result_data JSON,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(lead_id, scraper_name)
-                )
-            """)
-            
-            # Criar índice se não existir
-            self.conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_scraper_lead_id 
-                ON scraper_results(lead_id)
-            """)
-            
-            # Inserir ou atualizar resultado
-            result_json = json.dumps(result)
-            # Primeiro tentar deletar se existir
-            self.conn.execute(f"""
-                DELETE FROM scraper_results 
-                WHERE lead_id = '{lead_id}' AND scraper_name = '{scraper_name}'
-            """)
-            # Depois inserir novo
-            self.conn.execute(f"""
-                INSERT INTO scraper_results
-                (lead_id, scraper_name, result_data, created_at)
-                VALUES ('{lead_id}', '{scraper_name}', '{result_json.replace(chr(39), chr(39)+chr(39))}', CURRENT_TIMESTAMP)
-            """)
-            
-            logger.debug(f"Scraper {scraper_name} salvo para lead {lead_id}")
+            # Inserir ou atualizar resultado (chave: lead_id + scraper_name)
+            with self._write_lock:
+                self._cursor().execute("""
+                    INSERT OR REPLACE INTO scraper_results
+                    (lead_id, scraper_name, result_data, created_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                """, [lead_id, scraper_name, _dumps(result)])
+            
+            logger.debug("Scraper %s salvo para lead %s", scraper_name, lead_id)
             
         except Exception as e:
-            logger.error(f"Erro ao salvar scraper no cache: {e}")
+            logger.error("Erro ao salvar scraper no cache: %s", e)
+    
+    def get_llm_response(self, prompt_key: str, ttl_hours: Optional[int] = None) -> Optional[str]:
+        """
+        Busca a resposta de LLM de um prompt idêntico já respondido
+        
+        Args:
+            prompt_key: Chave de conteúdo do prompt (LLMAnalyzerV3._prompt_key)
+            ttl_hours: Tempo de vida em horas (None = LLM_RESPONSE_TTL_HOURS)
+            
+        Returns:
+            Texto da resposta ou None se não encontrada/expirada
+        """
+        try:
+            row = self._cursor().execute("""
+                SELECT response
+                FROM llm_responses
+                WHERE prompt_key = ?
+                AND created_at > CURRENT_TIMESTAMP - INTERVAL (?) HOUR
+            """, [prompt_key, ttl_hours or self.LLM_RESPONSE_TTL_HOURS]).fetchone()
+            return row[0] if row else None
+            
+        except Exception as e:
+            logger.error("Erro ao buscar resposta de LLM no cache: %s", e)
+            return None
+    
+    def save_llm_response(self, prompt_key: str, provider: str, model: str, response: str):
+        """
+        Salva a resposta de LLM de um prompt
+        
+        Args:
+            prompt_key: Chave de conteúdo do prompt
+            provider: Nome do provider
+            model: Modelo usado
+            response: Texto da resposta
+        """
+        try:
+            with self._write_lock:
+                self._cursor().execute("""
+                    INSERT OR REPLACE INTO llm_responses
+                    (prompt_key, provider, model, response, created_at)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """, [prompt_key, provider, model, response])
+            
+        except Exception as e:
+            logger.error("Erro ao salvar resposta de LLM no cache: %s", e)
     
     def _generate_hash(self, lead_data: Dict[str, Any]) -> str:
         """
@@ -377,20 +715,37 @@ class LeadCache:
             lead_data: Dados do lead
             
         Returns:
-            Hash SHA256 do lead
+            Hash XXH3-128 do lead (chave de cache, não criptográfica)
         """
         # Campos que identificam unicamente um lead
-        key_fields = [
-            lead_data.get('original_id', ''),
-            lead_data.get('original_nome', ''),
-            lead_data.get('original_endereco_completo', '')
-        ]
-        
-        # Criar string única
-        unique_string = '|'.join(str(f) for f in key_fields)
+        unique_string = (
+            f"{lead_data.get('original_id', '')}|"
+            f"{lead_data.get('original_nome', '')}|"
+            f"{lead_data.get('original_endereco_completo', '')}"
+        )
         
         # Gerar hash
-        return hashlib.sha256(unique_string.encode()).hexdigest()
+        return xxhash.xxh3_128_hexdigest(unique_string.encode())
+    
+    def _generate_hashes(self, lead_datas: List[Dict[str, Any]]) -> List[str]:
+        """
+        Gera os hashes de um lote de leads em uma única passada
+        
+        Args:
+            lead_datas: Lista de dados dos leads
+            
+        Returns:
+            Lista de hashes, na mesma ordem de lead_datas
+        """
+        # Mesma chave de _generate_hash, com as funções resolvidas uma vez
+        hexdigest = xxhash.xxh3_128_hexdigest
+        return [
+            hexdigest(
+                f"{ld.get('original_id', '')}|{ld.get('original_nome', '')}|"
+                f"{ld.get('original_endereco_completo', '')}".encode()
+            )
+            for ld in lead_datas
+        ]
     
     def get(self, lead_data: Dict[str, Any], ttl_hours: int = 168) -> Optional[Dict[str, Any]]:
         """
@@ -407,29 +762,82 @@ class LeadCache:
             lead_hash = self._generate_hash(lead_data)
             
             # Buscar no cache considerando TTL
-            result = self.conn.execute(f"""
-                SELECT full_result, created_at, cache_ttl_hours
+            result = self._cursor().execute("""
+                SELECT full_result
                 FROM processed_leads
-                WHERE lead_hash = '{lead_hash}'
-                AND created_at > CURRENT_TIMESTAMP - INTERVAL {ttl_hours} HOUR
-            """).fetchone()
+                WHERE lead_hash = ?
+                AND created_at > CURRENT_TIMESTAMP - INTERVAL (?) HOUR
+                LIMIT 1
+            """, [lead_hash, ttl_hours]).fetchone()
             
             if result:
-                self.stats['hits'] += 1
-                logger.info(f"Cache HIT para lead: {lead_data.get('original_nome', 'Unknown')[:30]}")
+                self._count('hits')
+                self._touch(lead_hash)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Cache HIT para lead: %s", (lead_data.get('original_nome') or 'Unknown')[:30])
                 
                 # Retornar resultado deserializado
-                return json.loads(result[0]) if result[0] else None
+                return _loads(result[0]) if result[0] else None
             else:
-                self.stats['misses'] += 1
-                logger.debug(f"Cache MISS para lead: {lead_data.get('original_nome', 'Unknown')[:30]}")
+                self._count('misses')
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Cache MISS para lead: %s", (lead_data.get('original_nome') or 'Unknown')[:30])
                 return None
                 
         except Exception as e:
-            logger.error(f"Erro ao buscar no cache: {e}")
-            self.stats['errors'] += 1
+            logger.error("Erro ao buscar no cache: %s", e)
+            self._count('errors')
             return None
     
+    def get_many(self, lead_datas: List[Dict[str, Any]], ttl_hours: int = 168,
+                 hashes: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Busca vários leads no cache com uma única consulta
+        
+        Args:
+            lead_datas: Lista de dados dos leads para buscar
+            ttl_hours: Tempo de vida do cache em horas
+            hashes: Hashes já calculados de lead_datas (evita recalcular)
+            
+        Returns:
+            Dict hash -> resultado cached, apenas para os leads encontrados
+        """
+        import pandas as pd
+        
+        if hashes is None:
+            hashes = self._generate_hashes(lead_datas)
+        hashes = list(dict.fromkeys(hashes))
+        if not hashes:
+            return {}
+        
+        try:
+            cursor = self._cursor()
+            cursor.register('probe_df', pd.DataFrame({'h': hashes}))
+            try:
+                rows = cursor.execute("""
+                    SELECT p.lead_hash, p.full_result
+                    FROM processed_leads p
+                    JOIN probe_df ON p.lead_hash = probe_df.h
+                    WHERE p.created_at > CURRENT_TIMESTAMP - INTERVAL (?) HOUR
+                """, [ttl_hours]).fetchall()
+            finally:
+                cursor.unregister('probe_df')
+            
+            found = {lead_hash: _loads(full_result) for lead_hash, full_result in rows if full_result}
+            for lead_hash in found:
+                self._touch(lead_hash)
+            
+            self._count('hits', len(found))
+            self._count('misses', len(hashes) - len(found))
+            logger.info("Cache em lote: %s hits, %s misses", len(found), len(hashes) - len(found))
+            
+            return found
+            
+        except Exception as e:
+            logger.error("Erro ao buscar lote no cache: %s", e)
+            self._count('errors')
+            return {}
+    
     def save(self, lead_data: Dict[str, Any], result: Dict[str, Any], ttl_hours: int = 168):
         """
         Salva resultado no cache
@@ -440,83 +848,117 @@ class LeadCache:
             ttl_hours: Tempo de vida do cache em horas
         """
         try:
-            lead_hash = self._generate_hash(lead_data)
-            
-            # Preparar dados para inserção
-            data = {
-                'lead_hash': lead_hash,
-                'lead_id': lead_data.get('original_id', ''),
-                'lead_name': lead_data.get('original_nome', ''),
-                'cnpj': lead_data.get('original_id', ''),
-                'original_data': json.dumps(lead_data),
-                
-                # Dados enriquecidos
-                'enriched_email': result.get('gdr_consolidated_email'),
-                'enriched_phone': result.get('gdr_consolidated_phone'),
-                'enriched_website': result.get('gdr_consolidated_website'),
-                'enriched_whatsapp': result.get('gdr_consolidated_whatsapp'),
-                'enriched_instagram': result.get('gdr_instagram_url'),
-                'enriched_facebook': result.get('gdr_facebook_url'),
-                'enriched_linkedin': result.get('gdr_linkedin_url'),
-                
-                # Scores
-                'sdr_score': result.get('gdr_sdr_lead_score'),
-                'sdr_category': result.get('gdr_sdr_category'),
-                'sdr_qualified': result.get('gdr_sdr_qualified'),
-                'quality_score': result.get('gdr_quality_score'),
-                'kappa_score': result.get('gdr_kappa_overall_score'),
-                
-                # LLM info
-                'llm_consensus': json.dumps(result.get('gdr_llm_consensus', {})),
-                'providers_used': json.dumps(result.get('gdr_providers_used', [])),
-                
-                # Metadados
-                'processing_time': result.get('gdr_processing_time_seconds'),
-                'total_cost_usd': result.get('gdr_total_cost_usd'),
-                'cache_ttl_hours': ttl_hours,
-                
-                # Resultado completo
-                'full_result': json.dumps(result)
-            }
-            
-            # Preparar valores com escape apropriado
-            values = []
-            for v in data.values():
-                if v is None:
-                    values.append("NULL")
-                elif isinstance(v, str):
-                    # Escapar aspas simples
-                    values.append(f"'{v.replace(chr(39), chr(39)+chr(39))}'")
-                elif isinstance(v, bool):
-                    values.append("TRUE" if v else "FALSE")
-                else:
-                    values.append(str(v))
+            data = self._build_row(lead_data, result, ttl_hours)
             
             # Inserir ou atualizar
-            query = f"""
-                INSERT OR REPLACE INTO processed_leads
-                (lead_hash, lead_id, lead_name, cnpj, original_data,
-                 enriched_email, enriched_phone, enriched_website, enriched_whatsapp,
-                 enriched_instagram, enriched_facebook, enriched_linkedin,
-                 sdr_score, sdr_category, sdr_qualified, quality_score, kappa_score,
-                 llm_consensus, providers_used,
-                 processing_time, total_cost_usd, cache_ttl_hours,
-                 full_result, updated_at)
-                VALUES ({', '.join(values)}, CURRENT_TIMESTAMP)
-            """
-            self.conn.execute(query)
-            
-            self.stats['saves'] += 1
-            logger.info(f"Lead salvo no cache: {lead_data.get('original_nome', 'Unknown')[:30]}")
+            with self._write_lock:
+                self._cursor().execute(self._insert_stmt, [data[c] for c in self.LEAD_COLUMNS])
+            
+            self._count('saves')
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Lead salvo no cache: %s", (lead_data.get('original_nome') or 'Unknown')[:30])
+            
+        except Exception as e:
+            logger.error("Erro ao salvar no cache: %s", e)
+            self._count('errors')
+    
+    def save_many(self, pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]], ttl_hours: int = 168) -> int:
+        """
+        Salva vários resultados no cache com um único INSERT em lote
+        
+        Args:
+            pairs: Lista de tuplas (lead_data, result)
+            ttl_hours: Tempo de vida do cache em horas
+            
+        Returns:
+            Número de leads salvos
+        """
+        import pandas as pd
+        
+        # Um registro por hash; o último resultado do lote prevalece
+        rows = {}
+        for lead_data, result in pairs:
+            if result:
+                row = self._build_row(lead_data, result, ttl_hours)
+                rows[row['lead_hash']] = row
+        
+        if not rows:
+            return 0
+        
+        try:
+            df = pd.DataFrame(list(rows.values()), columns=list(self.LEAD_COLUMNS))
+            columns = ', '.join(self.LEAD_COLUMNS)
+            
+            with self._write_lock:
+                cursor = self._cursor()
+                cursor.register('new_leads_df', df)
+                try:
+                    cursor.execute(self._upsert_sql(f"""
+                        SELECT {columns}, {self._derived_columns_sql('full_result')}, CURRENT_TIMESTAMP
+                        FROM new_leads_df
+                    """))
+                finally:
+                    cursor.unregister('new_leads_df')
+            
+            self._count('saves', len(rows))
+            logger.info("%s leads salvos no cache em lote", len(rows))
+            return len(rows)
             
         except Exception as e:
-            logger.error(f"Erro ao salvar no cache: {e}")
-            self.stats['errors'] += 1
+            logger.error("Erro ao salvar lote no cache: %s", e)
+            self._count('errors')
+            return 0
+    
+    def _build_row(self, lead_data: Dict[str, Any], result: Dict[str, Any], ttl_hours: int) -> Dict[str, Any]:
+        """
+        Monta o registro de processed_leads para um lead
+        
+        Args:
+            lead_data: Dados originais do lead
+            result: Resultado do processamento
+            ttl_hours: Tempo de vida do cache em horas
+            
+        Returns:
+            Dict com os valores de LEAD_COLUMNS
+        """
+        lead_hash = self._generate_hash(lead_data)
+        
+        return {
+            'lead_hash': lead_hash,
+            'lead_id': lead_data.get('original_id', ''),
+            'lead_name': lead_data.get('original_nome', ''),
+            'cnpj': lead_data.get('original_id', ''),
+            'original_data': _dumps(lead_data),
+            
+            # Dados enriquecidos
+            'enriched_email': result.get('gdr_consolidated_email'),
+            'enriched_phone': result.get('gdr_consolidated_phone'),
+            'enriched_website': result.get('gdr_consolidated_website'),
+            'enriched_whatsapp': result.get('gdr_consolidated_whatsapp'),
+            'enriched_instagram': result.get('gdr_instagram_url'),
+            'enriched_facebook': result.get('gdr_facebook_url'),
+            'enriched_linkedin': result.get('gdr_linkedin_url'),
+            
+            # Scores
+            'sdr_score': result.get('gdr_sdr_lead_score'),
+            'sdr_category': result.get('gdr_sdr_category'),
+            'sdr_qualified': result.get('gdr_sdr_qualified'),
+            'quality_score': result.get('gdr_quality_score'),
+            'kappa_score': result.get('gdr_kappa_overall_score'),
+            
+            # Metadados
+            'processing_time': result.get('gdr_processing_time_seconds'),
+            'total_cost_usd': result.get('gdr_total_cost_usd'),
+            'cache_ttl_hours': ttl_hours,
+            
+            # Resultado completo
+            'full_result': _dumps(result)
+        }
     
     def search_by_cnpj(self, cnpj: str) -> Optional[Dict[str, Any]]:
         """Busca lead por CNPJ"""
         try:
-            result = self.conn.execute("""
+            result = self._cursor().execute("""
                 SELECT full_result
                 FROM processed_leads
                 WHERE cnpj = ?
@@ -525,11 +967,11 @@ class LeadCache:
             """, [cnpj]).fetchone()
             
             if result:
-                return json.loads(result[0]) if result[0] else None
+                return _loads(result[0]) if result[0] else None
             return None
             
         except Exception as e:
-            logger.error(f"Erro ao buscar por CNPJ: {e}")
+            logger.error("Erro ao buscar por CNPJ: %s", e)
             return None
     
     def search_by_name(self, name: str, fuzzy: bool = True) -> List[Dict[str, Any]]:
@@ -545,17 +987,34 @@ class LeadCache:
         """
         try:
             if fuzzy:
-                # Busca aproximada
-                results = self.conn.execute("""
-                    SELECT full_result
-                    FROM processed_leads
-                    WHERE LOWER(lead_name) LIKE LOWER(?)
-                    ORDER BY updated_at DESC
-                    LIMIT 10
-                """, [f'%{name}%']).fetchall()
+                # Busca por termos no índice FTS (BM25), que pode estar
+                # desatualizado; trechos de palavra e leads fora do índice
+                # caem na busca por substring
+                results = []
+                if self._name_index_ready():
+                    results = self._cursor().execute("""
+                        SELECT full_result
+                        FROM (
+                            SELECT full_result,
+                                   fts_main_processed_leads.match_bm25(lead_hash, ?) AS score
+                            FROM processed_leads
+                        ) sq
+                        WHERE score IS NOT NULL
+                        ORDER BY score DESC
+                        LIMIT 10
+                    """, [name]).fetchall()
+                
+                if not results:
+                    results = self._cursor().execute("""
+                        SELECT full_result
+                        FROM processed_leads
+                        WHERE lead_name ILIKE ?
+                        ORDER BY updated_at DESC
+                        LIMIT 10
+                    """, [f'%{name}%']).fetchall()
             else:
                 # Busca exata
-                results = self.conn.execute("""
+                results = self._cursor().execute("""
                     SELECT full_result
                     FROM processed_leads
                     WHERE lead_name = ?
@@ -563,16 +1022,81 @@ class LeadCache:
                     LIMIT 10
                 """, [name]).fetchall()
             
-            return [json.loads(r[0]) for r in results if r[0]]
+            return [_loads(r[0]) for r in results if r[0]]
             
         except Exception as e:
-            logger.error(f"Erro ao buscar por nome: {e}")
+            logger.error("Erro ao buscar por nome: %s", e)
             return []
     
+    def refresh_name_index(self) -> bool:
+        """
+        Reconstrói o índice FTS de lead_name (persistido no banco)
+        
+        O índice do DuckDB não acompanha INSERT/DELETE: leads gravados depois
+        da última reconstrução só aparecem em search_by_name pela busca por
+        substring. Chamar após cargas grandes ou em rotina agendada, nunca a
+        cada busca.
+        
+        Returns:
+            True se o índice foi reconstruído
+        """
+        if not self._load_fts():
+            return False
+        
+        try:
+            with self._write_lock:
+                self.conn.execute("""
+                    PRAGMA create_fts_index(
+                        'processed_leads', 'lead_hash', 'lead_name',
+                        stemmer = 'none', strip_accents = 1, lower = 1, overwrite = 1
+                    )
+                """)
+            self._fts_indexed = True
+            logger.info("Índice FTS de nomes reconstruído")
+            return True
+            
+        except Exception as e:
+            logger.error("Erro ao reconstruir índice FTS: %s", e)
+            return False
+    
+    def _name_index_ready(self) -> bool:
+        """
+        Verifica se search_by_name pode usar o índice FTS (possivelmente
+        desatualizado); não constrói o índice
+        
+        Returns:
+            True se a extensão está carregada e o índice existe
+        """
+        if self._fts_indexed is None and self._load_fts():
+            self._fts_indexed = self._cursor().execute("""
+                SELECT COUNT(*) > 0 FROM duckdb_schemas()
+                WHERE schema_name = 'fts_main_processed_leads'
+            """).fetchone()[0]
+        return bool(self._fts_available and self._fts_indexed)
+    
+    def _load_fts(self) -> bool:
+        """
+        Carrega a extensão FTS do DuckDB, que deve ter sido instalada no setup
+        (INSTALL fts, ver README); nunca a instala, pois exige rede
+        
+        Returns:
+            True se a extensão está carregada
+        """
+        if self._fts_available is None:
+            with self._fts_lock:
+                if self._fts_available is None:
+                    try:
+                        self.conn.execute("LOAD fts")
+                        self._fts_available = True
+                    except duckdb.Error as e:
+                        logger.warning("Extensão FTS do DuckDB não instalada - usando busca por substring: %s", e)
+                        self._fts_available = False
+        return self._fts_available
+    
     def get_qualified_leads(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Retorna leads qualificados pelo SDR"""
         try:
-            results = self.conn.execute("""
+            results = self._cursor().execute("""
                 SELECT full_result
                 FROM processed_leads
                 WHERE sdr_qualified = true
@@ -580,16 +1104,16 @@ class LeadCache:
                 LIMIT ?
             """, [limit]).fetchall()
             
-            return [json.loads(r[0]) for r in results if r[0]]
+            return [_loads(r[0]) for r in results if r[0]]
             
         except Exception as e:
-            logger.error(f"Erro ao buscar leads qualificados: {e}")
+            logger.error("Erro ao buscar leads qualificados: %s", e)
             return []
     
     def get_statistics(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
         try:
-            stats = self.conn.execute("""
+            stats = self._cursor().execute("""
                 SELECT 
                     COUNT(*) as total_leads,
                     COUNT(CASE WHEN sdr_qualified = true THEN 1 END) as qualified_leads,
@@ -623,7 +1147,7 @@ class LeadCache:
             return {}
             
         except Exception as e:
-            logger.error(f"Erro ao obter estatísticas: {e}")
+            logger.error("Erro ao obter estatísticas: %s", e)
             return {}
     
     def cleanup_expired(self) -> int:
@@ -634,19 +1158,143 @@ class LeadCache:
             Número de entradas removidas
         """
         try:
-            result = self.conn.execute("""
-                DELETE FROM processed_leads
-                WHERE created_at < CURRENT_TIMESTAMP - INTERVAL cache_ttl_hours HOUR
-            """)
+            with self._write_lock:
+                cursor = self._cursor()
+                cursor.begin()
+                try:
+                    deleted = self._delete_leads(
+                        cursor, "created_at < CURRENT_TIMESTAMP - (cache_ttl_hours * INTERVAL 1 HOUR)"
+                    )
+                    cursor.execute("""
+                        DELETE FROM llm_responses
+                        WHERE created_at < CURRENT_TIMESTAMP - INTERVAL (?) HOUR
+                    """, [self.LLM_RESPONSE_TTL_HOURS])
+                    cursor.commit()
+                except Exception:
+                    cursor.rollback()
+                    raise
+            
+            logger.info("Cache cleanup: %s entradas expiradas removidas", deleted)
+            return deleted
+            
+        except Exception as e:
+            logger.error("Erro ao limpar cache: %s", e)
+            return 0
+    
+    def _count(self, key: str, n: int = 1):
+        """Incrementa um contador de self.stats de forma thread-safe"""
+        with self._stats_lock:
+            self.stats[key] += n
+    
+    def _touch(self, lead_hash: str):
+        """Registra um acesso ao lead; gravado no banco em lote"""
+        with self._stats_lock:
+            self._touched[lead_hash] += 1
+            flush = len(self._touched) >= self.TOUCH_FLUSH_SIZE
+        
+        if flush:
+            self._flush_touches()
+    
+    def _flush_touches(self):
+        """Grava last_accessed_at/hit_count dos acessos pendentes"""
+        with self._stats_lock:
+            if not self._touched:
+                return
+            touched, self._touched = self._touched, Counter()
+        
+        try:
+            with self._write_lock:
+                self._cursor().execute("""
+                    UPDATE processed_leads
+                    SET hit_count = processed_leads.hit_count + touched.n,
+                        last_accessed_at = CURRENT_TIMESTAMP
+                    FROM (SELECT unnest(?) AS h, unnest(?) AS n) AS touched
+                    WHERE processed_leads.lead_hash = touched.h
+                """, [list(touched.keys()), list(touched.values())])
+            
+        except Exception as e:
+            logger.error("Erro ao registrar acessos no cache: %s", e)
+    
+    def evict_to(self, max_rows: int) -> int:
+        """
+        Limita o tamanho do cache removendo os leads acessados há mais tempo,
+        com seus resultados de scrapers, e as respostas de LLM mais antigas
+        além de LLM_RESPONSES_PER_LEAD por lead mantido, em uma transação
+        
+        Args:
+            max_rows: Número máximo de leads a manter
+            
+        Returns:
+            Número de entradas removidas
+        """
+        try:
+            with self._write_lock:
+                self._flush_touches()
+                
+                cursor = self._cursor()
+                total = cursor.execute("SELECT COUNT(*) FROM processed_leads").fetchone()[0]
+                excess = total - max_rows
+                if excess <= 0:
+                    return 0
+                
+                cursor.begin()
+                try:
+                    # Menos recentes primeiro; no empate, os menos acessados
+                    deleted = self._delete_leads(cursor, """
+                        lead_hash IN (
+                            SELECT lead_hash FROM processed_leads
+                            ORDER BY last_accessed_at ASC, hit_count ASC
+                            LIMIT ?
+                        )
+                    """, [excess])
+                    cursor.execute("""
+                        DELETE FROM llm_responses
+                        WHERE prompt_key IN (
+                            SELECT prompt_key FROM llm_responses
+                            ORDER BY created_at DESC
+                            OFFSET ?
+                        )
+                    """, [max_rows * self.LLM_RESPONSES_PER_LEAD])
+                    cursor.commit()
+                except Exception:
+                    cursor.rollback()
+                    raise
             
-            deleted = result.rowcount
-            logger.info(f"Cache cleanup: {deleted} entradas expiradas removidas")
+            logger.info("Cache eviction: %s entradas removidas (limite %s)", deleted, max_rows)
             return deleted
             
         except Exception as e:
-            logger.error(f"Erro ao limpar cache: {e}")
+            logger.error("Erro ao limitar cache: %s", e)
             return 0
     
+    def _delete_leads(self, cursor: duckdb.DuckDBPyConnection, condition: str,
+                      params: Optional[List[Any]] = None) -> int:
+        """
+        Remove leads de processed_leads e, em cascata, os resultados de
+        scrapers dos lead_ids que ficaram sem registro (executar sob
+        _write_lock, dentro da transação do chamador)
+        
+        Args:
+            cursor: Cursor com a transação aberta
+            condition: Cláusula WHERE sobre processed_leads
+            params: Parâmetros da condição
+            
+        Returns:
+            Número de leads removidos
+        """
+        lead_ids = [row[0] for row in cursor.execute(
+            f"DELETE FROM processed_leads WHERE {condition} RETURNING lead_id", params or []
+        ).fetchall()]
+        
+        if lead_ids:
+            cursor.execute("""
+                DELETE FROM scraper_results
+                WHERE lead_id IN (SELECT unnest(?))
+                AND lead_id NOT IN (SELECT lead_id FROM processed_leads)
+            """, [lead_ids])
+        
+        return len(lead_ids)
+    
     def export_to_excel(self, output_path: str, qualified_only: bool = False):
         """
         Exporta cache para Excel
@@ -655,37 +1303,57 @@ class LeadCache:
             output_path: Caminho do arquivo Excel
             qualified_only: Se True, exporta apenas leads qualificados
         """
-        import pandas as pd
+        import xlsxwriter
         
         try:
+            # Colunas JSON ficam fora do Excel; excluídas já no DuckDB para
+            # não trazer os documentos para o Python só para descartá-los
+            columns = "* EXCLUDE (original_data, llm_consensus, providers_used, full_result)"
+            
             if qualified_only:
-                query = """
-                    SELECT * FROM processed_leads
+                query = f"""
+                    SELECT {columns} FROM processed_leads
                     WHERE sdr_qualified = true
                     ORDER BY sdr_score DESC
                 """
             else:
-                query = """
-                    SELECT * FROM processed_leads
+                query = f"""
+                    SELECT {columns} FROM processed_leads
                     ORDER BY updated_at DESC
                 """
             
-            df = self.conn.execute(query).df()
+            cursor = self._cursor().execute(query)
             
-            # Remover colunas JSON para Excel
-            json_columns = ['original_data', 'llm_consensus', 'providers_used', 'full_result']
-            df = df.drop(columns=json_columns, errors='ignore')
+            # Escrever em blocos, sem montar um DataFrame com o cache inteiro;
+            # constant_memory descarrega cada linha já escrita da planilha
+            workbook = xlsxwriter.Workbook(output_path, {
+                'constant_memory': True,
+                'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+            })
+            try:
+                worksheet = workbook.add_worksheet()
+                worksheet.write_row(0, 0, [column[0] for column in cursor.description])
+                
+                row_index = 1
+                while True:
+                    rows = cursor.fetchmany(self.EXPORT_CHUNK_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        worksheet.write_row(row_index, 0, row)
+                        row_index += 1
+            finally:
+                workbook.close()
             
-            # Salvar em Excel
-            df.to_excel(output_path, index=False)
-            logger.info(f"Cache exportado para: {output_path}")
+            logger.info("Cache exportado para: %s (%s leads)", output_path, row_index - 1)
             
         except Exception as e:
-            logger.error(f"Erro ao exportar cache: {e}")
+            logger.error("Erro ao exportar cache: %s", e)
     
     def close(self):
         """Fecha conexão com o banco"""
         if self.conn:
+            self._flush_touches()
             self.conn.close()
             logger.info("Conexão com cache fechada")
     
@@ -701,7 +1369,11 @@ class CachedGDRFramework:
     Wrapper para GDRFramework com cache automático
     """
     
-    def __init__(self, framework, cache_path: str = "data/gdr_cache.duckdb", ttl_hours: int = 168):
+    # Acima deste número de leads novos o lote é gravado sem índices
+    BULK_LOAD_THRESHOLD = 1000
+    
+    def __init__(self, framework, cache_path: str = "data/gdr_cache.duckdb", ttl_hours: int = 168,
+                 max_cache_rows: Optional[int] = None):
         """
         Inicializa framework com cache
         
@@ -709,10 +1381,12 @@ class CachedGDRFramework:
             framework: Instância do GDRFramework
             cache_path: Caminho do banco de cache
             ttl_hours: TTL padrão do cache em horas
+            max_cache_rows: Limite de leads no cache (None = sem limite)
         """
         self.framework = framework
         self.cache = LeadCache(cache_path)
         self.ttl_hours = ttl_hours
+        self.max_cache_rows = max_cache_rows
     
     async def process_single_lead(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -728,11 +1402,13 @@ class CachedGDRFramework:
         cached_result = self.cache.get(lead_data, self.ttl_hours)
         
         if cached_result:
-            logger.info(f"Lead recuperado do cache: {lead_data.get('original_nome', 'Unknown')[:30]}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Lead recuperado do cache: %s", (lead_data.get('original_nome') or 'Unknown')[:30])
             return cached_result
         
         # Processar se não estiver em cache
-        logger.info(f"Processando novo lead: {lead_data.get('original_nome', 'Unknown')[:30]}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Processando novo lead: %s", (lead_data.get('original_nome') or 'Unknown')[:30])
         result = await self.framework.process_single_lead(lead_data)
         
         # Salvar no cache
@@ -755,32 +1431,46 @@ class CachedGDRFramework:
         results = []
         to_process = []
         
-        # Verificar cache para cada lead
-        for lead in leads:
-            cached = self.cache.get(lead, self.ttl_hours)
-            if cached:
-                results.append(cached)
+        # Verificar cache para todo o batch em uma consulta
+        hashes = self.cache._generate_hashes(leads)
+        cached = self.cache.get_many(leads, self.ttl_hours, hashes=hashes)
+        for lead, lead_hash in zip(leads, hashes):
+            hit = cached.get(lead_hash)
+            if hit:
+                results.append(hit)
             else:
                 to_process.append(lead)
         
-        logger.info(f"Batch: {len(results)} do cache, {len(to_process)} para processar")
+        logger.info("Batch: %s do cache, %s para processar", len(results), len(to_process))
         
         # Processar leads não cacheados
         if to_process:
             if hasattr(self.framework, 'process_leads_batch'):
                 new_results, _ = await self.framework.process_leads_batch(to_process, max_concurrent)
             else:
-                # Processar individualmente se não tiver batch
-                new_results = []
-                for lead in to_process:
-                    result = await self.framework.process_single_lead(lead)
-                    new_results.append(result)
-            
-            # Salvar novos resultados no cache
-            for lead, result in zip(to_process, new_results):
-                if result:
-                    self.cache.save(lead, result, self.ttl_hours)
-                    results.append(result)
+                # Processar individualmente se não tiver batch, limitando a
+                # max_concurrent leads em paralelo
+                semaphore = asyncio.Semaphore(max_concurrent)
+                
+                async def process_one(lead):
+                    async with semaphore:
+                        return await self.framework.process_single_lead(lead)
+                
+                new_results = await asyncio.gather(*[process_one(lead) for lead in to_process])
+            
+            # Salvar novos resultados no cache em um único INSERT
+            pairs = list(zip(to_process, new_results))
+            if len(pairs) > self.BULK_LOAD_THRESHOLD:
+                with self.cache.bulk_load_context():
+                    self.cache.save_many(pairs, self.ttl_hours)
+            else:
+                self.cache.save_many(pairs, self.ttl_hours)
+            results.extend(result for result in new_results if result)
+            
+            # Limitar tamanho do cache após cada gravação em lote (abaixo do
+            # limite custa apenas um COUNT)
+            if self.max_cache_rows:
+                self.cache.evict_to(self.max_cache_rows)
         
         return results
     
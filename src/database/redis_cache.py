@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cache compartilhado de respostas de LLM em Redis
+Camada entre a LRU em memória do analisador e o DuckDB local: vários workers
+(ou execuções em máquinas diferentes) sobre o mesmo conjunto de leads
+reaproveitam as respostas uns dos outros
+"""
+
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    logger.warning("redis não disponível - cache compartilhado de respostas LLM desabilitado")
+
+# Mesmo tempo de vida das respostas no DuckDB (LeadCache.LLM_RESPONSE_TTL_HOURS)
+LLM_RESPONSE_TTL_SECONDS = 168 * 3600
+
+# Prefixo das chaves (isola de outros dados no mesmo Redis)
+KEY_PREFIX = 'gdr:llm:'
+
+
+class RedisResponseCache:
+    """
+    Respostas de LLM por chave de prompt (provider/modelo/prompt) com TTL
+
+    Falhas de conexão não interrompem o processamento: a consulta vira miss
+    e a gravação é ignorada, seguindo para o DuckDB/API.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int = LLM_RESPONSE_TTL_SECONDS, prefix: str = KEY_PREFIX):
+        """
+        Args:
+            url: URL do Redis (ex.: redis://localhost:6379/0)
+            ttl_seconds: Tempo de vida das respostas
+            prefix: Prefixo das chaves
+        """
+        if not REDIS_AVAILABLE:
+            raise ImportError("Cache Redis requer o pacote redis (pip install .[redis])")
+
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+        # Cliente criado sob demanda (dentro do event loop em execução)
+        self._client = None
+
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+    def _connection(self) -> 'aioredis.Redis':
+        """Cliente Redis (pool de conexões próprio)"""
+        if self._client is None:
+            self._client = aioredis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Busca a resposta de um prompt
+
+        Args:
+            key: Chave do prompt (LLMAnalyzerV3._prompt_key)
+
+        Returns:
+            Resposta ou None (ausente, expirada ou Redis indisponível)
+        """
+        try:
+            response = await self._connection().get(self.prefix + key)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Redis indisponível (leitura): {e}")
+            return None
+        self.stats['hits' if response is not None else 'misses'] += 1
+        return response
+
+    async def set(self, key: str, response: str):
+        """
+        Grava a resposta de um prompt com TTL (SETEX)
+
+        Args:
+            key: Chave do prompt (LLMAnalyzerV3._prompt_key)
+            response: Resposta do LLM
+        """
+        try:
+            await self._connection().setex(self.prefix + key, self.ttl_seconds, response)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Redis indisponível (gravação): {e}")
+
+    async def close(self):
+        """Fecha o pool de conexões (recriado na próxima consulta)"""
+        if self._client is not None:
+            client, self._client = self._client, None
+            # aclose no redis>=5.0.1 (close ficou obsoleto)
+            await getattr(client, 'aclose', client.close)()
+            logger.info(f"Cache Redis: {self.stats['hits']} hits, {self.stats['misses']} misses, "
+                        f"{self.stats['errors']} erros")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Cache semântico de respostas de LLM
+Prompts quase idênticos (leads da mesma cidade/segmento que diferem apenas no
+nome) reaproveitam a resposta de um prompt já respondido, encontrada por
+similaridade de embeddings em um índice FAISS persistido em disco
+"""
+
+import json
+import logging
+import threading
+import xxhash
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+    logger.warning("sentence-transformers/faiss não disponíveis - cache semântico desabilitado")
+
+# Modelo local de embeddings (rápido, 384 dimensões)
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+# Similaridade de cosseno mínima para reaproveitar uma resposta
+SIMILARITY_THRESHOLD = 0.95
+
+
+class SemanticCache:
+    """
+    Índice de (embedding do prompt, resposta) por escopo (provider/modelo)
+
+    Os embeddings são normalizados, então o produto interno do índice é a
+    similaridade de cosseno. Métodos síncronos: o analisador os chama via
+    asyncio.to_thread para não bloquear o event loop.
+    """
+
+    def __init__(self, directory: str = "data/semantic_cache",
+                 threshold: float = SIMILARITY_THRESHOLD, model_name: str = EMBEDDING_MODEL):
+        """
+        Args:
+            directory: Diretório dos índices (.faiss) e respostas (.json)
+            threshold: Similaridade mínima para considerar um hit
+            model_name: Modelo do sentence-transformers
+        """
+        if not SEMANTIC_CACHE_AVAILABLE:
+            raise ImportError("Cache semântico requer sentence-transformers e faiss (pip install .[semantic-cache])")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.model_name = model_name
+
+        # Modelo carregado sob demanda (primeira consulta)
+        self._model = None
+        self._indexes: Dict[str, 'faiss.Index'] = {}
+        self._entries: Dict[str, List[Dict]] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def embed(self, text: str) -> 'np.ndarray':
+        """
+        Calcula o embedding normalizado de um texto
+
+        Args:
+            text: Prompt normalizado
+
+        Returns:
+            Matriz float32 (1 x dimensão) pronta para o índice
+        """
+        with self._lock:
+            if self._model is None:
+                logger.info(f"Carregando modelo de embeddings {self.model_name}")
+                self._model = SentenceTransformer(self.model_name)
+        vector = self._model.encode([text], normalize_embeddings=True)
+        return np.asarray(vector, dtype='float32')
+
+    def search(self, scope: str, vector: 'np.ndarray') -> Optional[Tuple[str, str]]:
+        """
+        Busca a resposta do prompt mais similar no escopo
+
+        Args:
+            scope: Provider/modelo/instrução de sistema
+            vector: Embedding retornado por embed
+
+        Returns:
+            Tupla (resposta, empresa do prompt original) ou None se nenhum
+            prompt atingir o limiar de similaridade
+        """
+        with self._lock:
+            index, entries = self._load(scope, vector.shape[1])
+            if index.ntotal == 0:
+                self.stats['misses'] += 1
+                return None
+            scores, ids = index.search(vector, 1)
+            if scores[0][0] < self.threshold:
+                self.stats['misses'] += 1
+                return None
+            self.stats['hits'] += 1
+            entry = entries[ids[0][0]]
+        return entry['response'], entry['subject']
+
+    def add(self, scope: str, vector: 'np.ndarray', response: str, subject: str = ''):
+        """
+        Insere uma resposta no índice do escopo
+
+        Args:
+            scope: Provider/modelo/instrução de sistema
+            vector: Embedding retornado por embed
+            response: Resposta do LLM
+            subject: Empresa do prompt (substituída ao reaproveitar a resposta)
+        """
+        with self._lock:
+            index, entries = self._load(scope, vector.shape[1])
+            index.add(vector)
+            entries.append({'response': response, 'subject': subject})
+            self._dirty.add(scope)
+
+    def _paths(self, scope: str) -> Tuple[Path, Path]:
+        """Arquivos do índice e das respostas de um escopo"""
+        name = xxhash.xxh3_64_hexdigest(scope.encode('utf-8'))
+        return self.directory / f"{name}.faiss", self.directory / f"{name}.json"
+
+    def _load(self, scope: str, dimension: int) -> Tuple['faiss.Index', List[Dict]]:
+        """Índice e respostas do escopo, lidos do disco na primeira vez (chamar com o lock)"""
+        if scope not in self._indexes:
+            index_path, entries_path = self._paths(scope)
+            if index_path.exists() and entries_path.exists():
+                self._indexes[scope] = faiss.read_index(str(index_path))
+                self._entries[scope] = json.loads(entries_path.read_text(encoding='utf-8'))
+            else:
+                # Índice exato por produto interno: aceita inserções incrementais
+                # sem treino (IVF exigiria treinar com uma amostra prévia)
+                self._indexes[scope] = faiss.IndexFlatIP(dimension)
+                self._entries[scope] = []
+        return self._indexes[scope], self._entries[scope]
+
+    def save(self):
+        """Grava em disco os índices alterados"""
+        with self._lock:
+            for scope in self._dirty:
+                index_path, entries_path = self._paths(scope)
+                faiss.write_index(self._indexes[scope], str(index_path))
+                entries_path.write_text(json.dumps(self._entries[scope], ensure_ascii=False), encoding='utf-8')
+            if self._dirty:
+                logger.info(f"Cache semântico salvo ({len(self._dirty)} índice(s), "
+                            f"{self.stats['hits']} hits, {self.stats['misses']} misses)")
+            self._dirty.clear()
+
+    def close(self):
+        """Grava os índices pendentes"""
+        self.save()
@@ -15,6 +15,9 @@ Framework completo com todas as melhorias e funcionalidades avançadas:
 import asyncio
 import pandas as pd
 import numpy as np
+import re
+import io
+import math
 import json
 import os
 import sys
@@ -23,9 +26,19 @@ import logging
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union, NamedTuple, Callable, Tuple
+from operator import attrgetter
+from functools import lru_cache
+from types import MappingProxyType
+from dataclasses import dataclass, field, fields
+from collections import Counter, defaultdict
 import traceback
 
+from dotenv import load_dotenv
+
+# Carregar .env uma única vez, antes dos módulos do framework lerem o ambiente
+load_dotenv()
+
 # Configurar path para imports
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -38,7 +51,10 @@ from scrapers.linktree_detector import LinktreeDetector
 from scrapers.facebook_alternative import FacebookAlternativeScraper
 from scrapers.apify_real_scrapers import ApifyRealScrapers, GoogleSearchEngineReal
 from scrapers.website_scraper_enhanced import EnhancedWebsiteScraper
+from scrapers.http_session import create_shared_session
 from database.lead_cache import LeadCache  # Adicionar cache DuckDB
+from database.semantic_cache import SemanticCache, SEMANTIC_CACHE_AVAILABLE
+from database.redis_cache import RedisResponseCache, REDIS_AVAILABLE
 
 # Configurar logging
 logging.basicConfig(
@@ -51,6 +67,471 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Tentar importar python-calamine (leitura de Excel em Rust, opcional)
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+    logger.warning("python-calamine não disponível - leitura de Excel via openpyxl")
+
+# Tentar importar pyarrow (saída em Parquet, opcional)
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logger.warning("pyarrow não disponível - resultados salvos apenas em Excel")
+
+# Tentar importar orjson (serialização JSON mais rápida, opcional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson não disponível - usando json da stdlib na saída")
+
+
+# Classificação dos campos de entrada usada na limpeza dos dados
+URL_FIELDS = frozenset({'website', 'placesWebsite', 'instagramUrl', 'facebookUrl',
+                        'linkedinUrl', 'youtubeUrl', 'tiktokUrl'})
+TEXT_FIELDS = frozenset({'name', 'tradeName', 'city', 'state', 'address',
+                         'neighborhood', 'email', 'phone'})
+STRING_FIELDS = URL_FIELDS | TEXT_FIELDS
+NUMERIC_TEXT_FIELDS = frozenset({'cnpj', 'zipCode', 'employees', 'revenue'})
+BOOLEAN_FIELDS = frozenset({'active', 'verified', 'claimed'})
+NULL_STRINGS = frozenset({'nan', 'none', 'null'})
+
+# Engine de leitura da planilha de entrada (--excel-engine)
+EXCEL_ENGINES = ('calamine', 'openpyxl')
+DEFAULT_EXCEL_ENGINE = 'calamine' if CALAMINE_AVAILABLE else 'openpyxl'
+
+# Extensões de saída que também geram a planilha Excel (além do Parquet)
+EXCEL_SUFFIXES = ('.xlsx', '.xls')
+
+# Formatos de saída (--format) e extensão do arquivo gerado; sem pyarrow a
+# saída padrão volta a ser a planilha Excel
+OUTPUT_FORMATS = {'parquet': '.parquet', 'feather': '.feather', 'xlsx': '.xlsx'}
+DEFAULT_OUTPUT_FORMAT = 'parquet' if PYARROW_AVAILABLE else 'xlsx'
+
+# Nível de compressão zstd dos arquivos Parquet/Feather
+ZSTD_COMPRESSION_LEVEL = 3
+
+# Colunas mantidas como listas Python até a escrita do arquivo de saída
+JSON_LIST_COLUMNS = ('gdr_quality_issues', 'gdr_quality_suggestions')
+
+
+def _json_cell(value: Any) -> Any:
+    """Serializa listas/dicts para texto JSON numa célula; demais valores intactos"""
+    if not isinstance(value, (list, dict)):
+        return value
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value).decode('utf-8')
+    return json.dumps(value)
+
+
+# Schema das colunas de saída (_order_columns): campos originais, famílias
+# gdr_ ordenadas alfabeticamente dentro de cada uma e metadados
+ORIGINAL_OUTPUT_FIELDS = (
+    'original_id', 'original_nome', 'original_endereco_completo',
+    'original_telefone', 'original_telefone_place', 'original_website',
+    'original_avaliacao_google', 'original_latitude', 'original_longitude',
+    'original_place_users', 'original_place_website', 'original_email',
+    'original_instagram_url', 'original_facebook_url', 'city', 'state', 'country'
+)
+GDR_OUTPUT_PREFIXES = (
+    'gdr_instagram_', 'gdr_facebook_', 'gdr_linktree_', 'gdr_cwral4ai_', 'gdr_google_search_',
+    'gdr_consenso_', 'gdr_llm_', 'gdr_quality_'
+)
+GDR_PREFIX_BY_TOKEN = {prefix.split('_', 2)[1]: prefix for prefix in GDR_OUTPUT_PREFIXES}
+META_OUTPUT_FIELDS = (
+    'processing_time_seconds', 'processing_timestamp', 'processing_status',
+    'framework_version', 'scrapers_used', 'scrapers_successful', 'scrapers_failed', 'scrapers_retried'
+)
+
+# Campos originais preservados: coluna de saída -> colunas de entrada em ordem
+# de preferência (_preserve_original_dataframe; o endereço completo é montado
+# a partir de ADDRESS_FIELDS)
+ORIGINAL_FIELD_SOURCES = {
+    'original_id': ('legalDocument', 'id'),
+    'original_nome': ('name', 'tradeName'),
+    'original_telefone': ('phone',),
+    'original_telefone_place': ('placesPhone',),
+    'original_website': ('website',),
+    'original_avaliacao_google': ('placesRating',),
+    'original_latitude': ('placesLat',),
+    'original_longitude': ('placesLng',),
+    'original_place_users': ('placesUserRatingsTotal',),
+    'original_place_website': ('placesWebsite',),
+    'original_email': ('email',),
+    'original_instagram_url': ('instagramUrl',),
+    'original_facebook_url': ('facebookUrl',),
+    'city': ('city',),
+    'state': ('state',),
+    'country': ('country',)
+}
+# Valores usados quando nenhuma coluna de origem existe na entrada
+ORIGINAL_FIELD_DEFAULTS = {'country': 'Brasil'}
+ADDRESS_FIELDS = ('street', 'number', 'complement', 'district', 'city', 'state', 'country', 'postalCode')
+
+# Fontes de contato em ordem de prioridade (_consolidate_contacts_dataframe)
+EMAIL_SOURCES = (
+    'original_email',
+    'gdr_website_emails',  # Do website scraper
+    'gdr_google_search_email',  # Do Google search
+    'gdr_facebook_email',  # Do Facebook
+    'gdr_instagram_business_email',  # Do Instagram
+    'gdr_instagram_public_email'  # Do Instagram
+)
+PHONE_SOURCES = (
+    'original_telefone',
+    'original_telefone_place',
+    'gdr_website_phones',  # Do website scraper
+    'gdr_google_search_phone',  # Do Google search
+    'gdr_facebook_phone',  # Do Facebook
+    'gdr_instagram_contact_phone_number',  # Do Instagram
+    'gdr_instagram_business_phone_number'  # Do Instagram
+)
+URL_SOURCES = (
+    'original_website',
+    'original_place_website',
+    'gdr_website_url',  # Do website scraper
+    'gdr_google_search_website',  # Do Google search
+    'gdr_facebook_website',  # Do Facebook
+    'gdr_instagram_external_url'  # Do Instagram
+)
+WHATSAPP_SOURCES = (
+    'gdr_facebook_whatsapp',
+    'gdr_website_whatsapp',
+    'gdr_google_search_whatsapp',
+    'gdr_instagram_whatsapp_number'
+)
+
+# Sequências de caracteres não numéricos (extração de dígitos de telefones)
+NON_DIGITS = re.compile(r'\D+')
+# Separadores ignorados no tamanho mínimo de telefones (contados, não removidos)
+PHONE_SEPARATORS = re.compile(r'[ \-()]')
+
+# Campos gdr_ fora da contagem de enriquecimento: a própria consolidação e o
+# que é gravado depois dela (LLM, consenso, custo e qualidade)
+NOT_ENRICHMENT_PREFIXES = (
+    'gdr_consolidated', 'gdr_llm_', 'gdr_concenso_', 'gdr_total_cost_usd',
+    'gdr_providers_used', 'gdr_quality_'
+)
+
+
+# Último segundo formatado por _timestamp: [epoch em segundos, texto ISO]
+_TIMESTAMP_CACHE = [None, '']
+
+
+def _timestamp() -> str:
+    """Data/hora atual em ISO 8601 com precisão de segundos, formatada no máximo uma vez por segundo"""
+    now = int(time.time())
+    if now != _TIMESTAMP_CACHE[0]:
+        _TIMESTAMP_CACHE[:] = [now, datetime.fromtimestamp(now).isoformat()]
+    return _TIMESTAMP_CACHE[1]
+
+
+@lru_cache(maxsize=256)
+def _enrichment_fields(columns: Tuple[str, ...]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Classifica as colunas em originais e enriquecidas (uma vez por schema)
+    
+    Args:
+        columns: Colunas dos leads
+        
+    Returns:
+        (campos original_*, campos gdr_ contados como enriquecimento)
+    """
+    original_fields = tuple(c for c in columns if c.startswith('original_'))
+    enriched_fields = tuple(c for c in columns
+                            if c.startswith('gdr_') and not c.startswith(NOT_ENRICHMENT_PREFIXES))
+    return original_fields, enriched_fields
+
+
+@lru_cache(maxsize=32)
+def _output_column_order(columns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Ordem das colunas de saída conforme schema (uma passada pelas colunas,
+    calculada uma vez por schema)
+    
+    Args:
+        columns: Colunas dos resultados
+        
+    Returns:
+        As mesmas colunas na ordem de saída
+    """
+    original = dict.fromkeys(ORIGINAL_OUTPUT_FIELDS, None)
+    meta = dict.fromkeys(META_OUTPUT_FIELDS, None)
+    families = {prefix: [] for prefix in GDR_OUTPUT_PREFIXES}
+    remaining_cols = []
+    
+    for col in columns:
+        if col in original:
+            original[col] = col
+            continue
+        if col in meta:
+            meta[col] = col
+            continue
+        # Família pelo token após 'gdr_' (gdr_google_search_ -> 'google')
+        if col.startswith('gdr_'):
+            prefix = GDR_PREFIX_BY_TOKEN.get(col.split('_', 2)[1])
+            if prefix and col.startswith(prefix):
+                families[prefix].append(col)
+                continue
+        remaining_cols.append(col)
+    
+    # 1. Campos originais, na ordem do schema
+    ordered_columns = [col for col in original.values() if col is not None]
+    
+    # 2-5. Scrapers, consenso, LLM e qualidade, em ordem alfabética
+    for family_cols in families.values():
+        family_cols.sort()
+        ordered_columns.extend(family_cols)
+    
+    # 6. Metadados
+    ordered_columns.extend(col for col in meta.values() if col is not None)
+    
+    # 7. Campos restantes, na ordem em que aparecem
+    ordered_columns.extend(remaining_cols)
+    
+    return tuple(ordered_columns)
+
+
+def _has_value(value: Any) -> bool:
+    """Equivalente escalar de _truthy: bool(valor), com nulos (None/NaN) como False"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return False
+    return bool(value)
+
+
+def _truthy(values: Union[pd.Series, pd.DataFrame]) -> Union[pd.Series, pd.DataFrame]:
+    """Equivalente vetorizado de bool(valor) por célula, com nulos como False"""
+    values = values.astype(object)
+    return values.where(values.notna(), False).astype(bool)
+
+
+def _text_or_empty(values: pd.Series) -> pd.Series:
+    """Texto de cada célula (str(valor)), com valores vazios/nulos como ''"""
+    return values.astype(object).astype(str).where(_truthy(values), '')
+
+
+def _first_valid_contact(df: pd.DataFrame, sources: tuple, is_valid: Callable,
+                         explode_lists: bool = False) -> pd.Series:
+    """
+    Primeiro contato válido de cada linha seguindo a prioridade das fontes
+
+    Args:
+        df: Leads, um por linha
+        sources: Colunas candidatas em ordem de prioridade
+        is_valid: Recebe o texto dos candidatos e devolve a máscara de válidos
+        explode_lists: Se True, apenas listas e strings são candidatas e as
+            listas contribuem com cada um de seus itens
+
+    Returns:
+        Series alinhada a df com o contato escolhido ou ''
+    """
+    present = [column for column in sources if column in df.columns]
+    if not present:
+        return pd.Series('', index=df.index, dtype=object)
+
+    # Forma longa indexada por (prioridade da fonte, linha)
+    candidates = pd.concat([df[column].astype(object) for column in present],
+                           keys=range(len(present)))
+    candidates = candidates[_truthy(candidates)]
+    if explode_lists:
+        candidates = candidates[candidates.map(type).isin((list, str))].explode()
+        candidates = candidates[_truthy(candidates)]
+
+    valid = candidates[is_valid(candidates.astype(str)).to_numpy()]
+    # first() por linha respeita a ordem de aparição, ou seja, a prioridade
+    chosen = valid.groupby(level=1, sort=False).first()
+    return chosen.reindex(df.index, fill_value='').astype(object)
+
+
+def _first_valid_value(data: Dict, sources: tuple, is_valid: Callable,
+                       explode_lists: bool = False) -> Any:
+    """
+    Equivalente escalar de _first_valid_contact para um único lead
+
+    Args:
+        data: Dados do lead
+        sources: Chaves candidatas em ordem de prioridade
+        is_valid: Recebe o texto de um candidato e indica se é válido
+        explode_lists: Se True, apenas listas e strings são candidatas e as
+            listas contribuem com cada um de seus itens
+
+    Returns:
+        Contato escolhido ou ''
+    """
+    for key in sources:
+        value = data.get(key)
+        if not _has_value(value):
+            continue
+        if explode_lists:
+            if type(value) not in (list, str):
+                continue
+            candidates = value if isinstance(value, list) else (value,)
+        else:
+            candidates = (value,)
+        for candidate in candidates:
+            if _has_value(candidate) and is_valid(str(candidate)):
+                return candidate
+    return ''
+
+
+# Scrapers no relatório final: (nome, prefixo, sufixo) da coluna que indica sucesso
+REPORT_SCRAPER_COLUMNS = (
+    ('Instagram', 'gdr_instagram_', '_id'),
+    ('Facebook', 'gdr_facebook_', '_url'),
+    ('Website', 'gdr_cwral4ai_', '_email')
+)
+
+# Colunas do resultado final convertidas para category
+CATEGORICAL_COLUMNS = ('processing_status', 'country', 'state', 'city')
+
+# Campos fixos do resultado de um lead que falhou (_create_error_result)
+ERROR_RESULT_FIELDS = MappingProxyType({
+    'processing_status': 'error',
+    'framework_version': 'v3.1-enterprise',
+    'gdr_quality_overall_score': 0,
+    'gdr_consenso_email': '',
+    'gdr_consenso_telefone': '',
+    'gdr_consenso_whatsapp': '',
+    'gdr_consenso_url': ''
+})
+
+# Campos de análise LLM (gdr_llm_<provider>_<análise>); o grupo é o provider
+LLM_FIELD_PATTERN = re.compile(r'gdr_llm_([^_]+)')
+
+# Buffer do arquivo de checkpoint (um flush + fsync por batch)
+CHECKPOINT_BUFFER_SIZE = 1 << 20
+
+
+def _checkpoint_line(entry: Dict) -> bytes:
+    """Serializa uma entrada do checkpoint como linha JSONL em UTF-8"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(entry, default=str, option=(
+                orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+            ))
+        except TypeError:
+            # Tipos que o orjson não serializa (ex.: inteiros > 64 bits)
+            pass
+    return (json.dumps(entry, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+
+
+class APIConfig(NamedTuple):
+    """Chaves de API lidas do ambiente na importação do módulo"""
+    openai: Optional[str]
+    anthropic: Optional[str]
+    gemini: Optional[str]
+    deepseek: Optional[str]
+    zhipuai: Optional[str]
+    apify: Optional[str]
+    google_cse_key: Optional[str]
+    google_cse_id: Optional[str]
+
+
+# Campo do APIConfig -> (variável de ambiente, nome exibido)
+API_ENV_VARS = {
+    'openai': ('OPENAI_API_KEY', 'OpenAI GPT'),
+    'anthropic': ('ANTHROPIC_API_KEY', 'Claude (Anthropic)'),
+    'gemini': ('GEMINI_API_KEY', 'Google Gemini'),
+    'deepseek': ('DEEPSEEK_API_KEY', 'DeepSeek'),
+    'zhipuai': ('ZHIPUAI_API_KEY', 'ZhipuAI (GLM)'),
+    'apify': ('APIFY_API_KEY', 'Apify (Instagram, etc)'),
+    'google_cse_key': ('GOOGLE_CSE_API_KEY', 'Google Custom Search'),
+    'google_cse_id': ('GOOGLE_CSE_ID', 'Google Search Engine ID'),
+}
+
+API_CONFIG = APIConfig(*(os.environ.get(API_ENV_VARS[field][0]) for field in APIConfig._fields))
+
+
+def _facebook_url(lead_data: Dict) -> str:
+    """URL do Facebook do lead ou, na falta dela, construída a partir do nome"""
+    facebook_url = lead_data.get('facebookUrl', '')
+    if not facebook_url:
+        company_name = lead_data.get('name', '').lower().replace(' ', '').replace(',', '')
+        facebook_url = f"https://www.facebook.com/{company_name}"
+    return facebook_url
+
+
+class ScraperSpec(NamedTuple):
+    """Declaração de um scraper executado para cada lead"""
+    name: str
+    function: Callable  # attrgetter sobre o framework -> método do scraper
+    build_args: Callable[[Dict], tuple]
+    priority: ScraperPriority
+    timeout: float
+    max_retries: int
+    required: bool
+    required_fields: tuple = ()  # ao menos um preenchido no lead; () = sempre executa
+    kwargs: tuple = ()  # pares (nome, valor)
+    host: str = ''  # host da API (rate limiter do SmartOrchestrator)
+
+
+# Scrapers por lead, em ordem de criação das tarefas
+SCRAPER_SPECS = (
+    # Instagram (prioridade alta se temos URL)
+    ScraperSpec('instagram_scraper', attrgetter('apify_scrapers.scrape_instagram_profile'),
+                lambda ld: (ld.get('instagramUrl') or ld.get('instagram_url', ''),),
+                ScraperPriority.HIGH, 45.0, 3, True,
+                required_fields=('instagramUrl', 'instagram_url'), host='api.apify.com'),
+    # Facebook via Apify (dados reais com curious_coder/facebook-profile-scraper)
+    ScraperSpec('facebook_scraper', attrgetter('apify_scrapers.scrape_facebook_profile'),
+                lambda ld: (_facebook_url(ld),),
+                ScraperPriority.MEDIUM, 60.0, 3, False, host='api.apify.com'),
+    # Website (se temos URL)
+    ScraperSpec('website_scraper', attrgetter('website_scraper.scrape_website_smart'),
+                lambda ld: (ld.get('website') or ld.get('placesWebsite', ''),),
+                ScraperPriority.HIGH, 30.0, 2, False,
+                required_fields=('website', 'placesWebsite'), kwargs=(('use_crawl4ai', True),)),
+    # Google Search
+    ScraperSpec('google_search', attrgetter('google_search.search_company_info'),
+                lambda ld: (ld.get('name', ''), f"{ld.get('city', '')}, {ld.get('state', '')}"),
+                ScraperPriority.MEDIUM, 20.0, 2, False, host='www.googleapis.com'),
+)
+
+
+@dataclass
+class LeadInProgress:
+    """Lead com scrapers e consolidação concluídos, aguardando a análise LLM"""
+    lead_id: str
+    lead_name: str
+    lead_data: Dict
+    result: Dict
+    scraper_results: Dict
+    start_time: float
+    # Análises LLM iniciadas enquanto os scrapers ainda rodavam (modo online)
+    llm_tasks: List[asyncio.Task] = field(default_factory=list)
+
+
+@dataclass
+class ProcessingStats:
+    """Estatísticas de uma execução de process_batch"""
+    total_leads: int = 0
+    successful_leads: int = 0
+    failed_leads: int = 0
+    total_time: float = 0.0
+    average_time_per_lead: float = 0.0
+    token_usage: Counter = field(default_factory=Counter)
+    cost_breakdown: Dict = field(default_factory=dict)
+    quality_metrics: Dict = field(default_factory=dict)
+    scraper_performance: Dict = field(default_factory=dict)
+    # provider -> Counter com 'successful', 'failed' e 'total_responses'
+    llm_performance: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    errors: List[Dict] = field(default_factory=list)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Estatísticas como dicts simples (formato anterior de processing_stats)"""
+        stats = {f.name: getattr(self, f.name) for f in fields(self)}
+        stats['token_usage'] = dict(self.token_usage)
+        stats['llm_performance'] = {provider: dict(counts) for provider, counts in self.llm_performance.items()}
+        return stats
+
 
 class GDRFrameworkV31Enterprise:
     """
@@ -58,12 +539,27 @@ class GDRFrameworkV31Enterprise:
     Framework completo com todas as funcionalidades avançadas
     """
     
-    def __init__(self, use_cache: bool = True):
+    # Mínimo de leads para compensar a latência das APIs de lote dos LLMs
+    BATCH_MODE_MIN_LEADS = 10
+    
+    def __init__(self, use_cache: bool = True, max_concurrent_leads: int = None,
+                 semantic_cache: bool = False, stop_on_consensus: bool = False,
+                 redis_url: Optional[str] = None, max_cache_rows: Optional[int] = None):
         """
         Inicializa o framework enterprise completo
         
         Args:
             use_cache: Se True, usa cache DuckDB para evitar reprocessamento
+            max_concurrent_leads: Máximo de leads processados em paralelo dentro
+                de um batch (None = MAX_CONCURRENT_LEADS do ambiente ou 5)
+            semantic_cache: Se True, reaproveita respostas de LLM de prompts
+                similares (embeddings + FAISS), não apenas idênticos
+            stop_on_consensus: Se True, cancela os LLMs restantes de um lead
+                quando a maioria já concorda nas análises categóricas/numéricas
+            redis_url: URL do Redis para compartilhar respostas de LLM entre
+                workers/execuções (None = apenas memória e DuckDB)
+            max_cache_rows: Limite de leads no cache DuckDB, aplicado após cada
+                batch (None = MAX_CACHE_ROWS do ambiente; 0 = sem limite)
         """
         logger.info("="*80)
         logger.info(" GDR FRAMEWORK V3.1 ENTERPRISE ".center(80))
@@ -81,12 +577,35 @@ class GDRFrameworkV31Enterprise:
         if self.use_cache:
             self.cache = LeadCache("data/gdr_v31_cache.duckdb")
             logger.info("✓ Cache DuckDB inicializado para persistência")
+            if max_cache_rows is None:
+                max_cache_rows = int(os.getenv('MAX_CACHE_ROWS', '0'))
+            self.max_cache_rows = max(0, max_cache_rows)
         else:
             self.cache = None
+            self.max_cache_rows = 0
             logger.info("⚠ Cache desabilitado - reprocessamento completo")
         
         # 1. Analisador Multi-LLM (5 providers)
-        self.llm_analyzer = LLMAnalyzerV3()
+        # (respostas de prompts idênticos reaproveitadas via cache DuckDB e,
+        # opcionalmente, de prompts similares via cache semântico)
+        similar_responses = None
+        if semantic_cache and SEMANTIC_CACHE_AVAILABLE:
+            similar_responses = SemanticCache("data/semantic_cache")
+            logger.info("✓ Cache semântico de respostas LLM habilitado")
+        elif semantic_cache:
+            logger.warning("⚠ Cache semântico solicitado, mas sentence-transformers/faiss não estão instalados")
+        shared_responses = None
+        if redis_url and REDIS_AVAILABLE:
+            shared_responses = RedisResponseCache(redis_url)
+            logger.info("✓ Cache Redis de respostas LLM habilitado")
+        elif redis_url:
+            logger.warning("⚠ Cache Redis solicitado, mas o pacote redis não está instalado")
+        # (com stop_on_consensus as análises categóricas/numéricas continuam
+        # indo para todos os providers, senão não há maioria a verificar)
+        self.llm_analyzer = LLMAnalyzerV3(response_store=self.cache, semantic_cache=similar_responses,
+                                          stop_on_consensus=stop_on_consensus,
+                                          route_simple_analyses=not stop_on_consensus,
+                                          shared_store=shared_responses)
         logger.info("✓ LLM Analyzer V3 inicializado (OpenAI, Claude, Gemini, DeepSeek, ZhipuAI)")
         
         # 2. Estimador de tokens e custos
@@ -103,6 +622,8 @@ class GDRFrameworkV31Enterprise:
             global_timeout=300.0,
             retry_strategy='exponential'
         )
+        # Respostas 429 dos LLMs também contam para a pausa entre batches
+        self.llm_analyzer.rate_limit_listener = self.smart_orchestrator.record_rate_limit
         logger.info("✓ Smart Orchestrator inicializado")
         
         # 5. Detector de Linktree melhorado
@@ -116,24 +637,22 @@ class GDRFrameworkV31Enterprise:
         self.google_search = GoogleSearchEngineReal()
         logger.info("✓ Scrapers especializados inicializados")
         
+        # Sessão HTTP compartilhada pelos scrapers (criada no primeiro lead,
+        # com o event loop em execução)
+        self.http_session = None
+        
         # Estatísticas de processamento
-        self.processing_stats = {
-            'total_leads': 0,
-            'successful_leads': 0,
-            'failed_leads': 0,
-            'total_time': 0,
-            'average_time_per_lead': 0,
-            'token_usage': {},
-            'cost_breakdown': {},
-            'quality_metrics': {},
-            'scraper_performance': {},
-            'llm_performance': {},
-            'errors': []
-        }
+        self.processing_stats = ProcessingStats()
         
-        # Cache de checkpoints
+        # Limite de leads simultâneos por batch (ajustar ao rate limit do provider mais lento)
+        if max_concurrent_leads is None:
+            max_concurrent_leads = int(os.getenv('MAX_CONCURRENT_LEADS', '5'))
+        self.max_concurrent_leads = max(1, max_concurrent_leads)
+        
+        # Cache de checkpoints (um JSONL append-only por arquivo de saída)
         self.checkpoint_dir = Path("gdr_checkpoints_v31")
         self.checkpoint_dir.mkdir(exist_ok=True)
+        self._checkpoint_fp = None
         
         logger.info("="*80)
         logger.info("Framework V3.1 Enterprise inicializado com sucesso!")
@@ -146,31 +665,18 @@ class GDRFrameworkV31Enterprise:
         logger.info("="*80)
     
     def _check_api_configuration(self):
-        """Verifica configuração das APIs"""
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        required_apis = {
-            'OPENAI_API_KEY': 'OpenAI GPT',
-            'ANTHROPIC_API_KEY': 'Claude (Anthropic)',
-            'GEMINI_API_KEY': 'Google Gemini',
-            'DEEPSEEK_API_KEY': 'DeepSeek',
-            'ZHIPUAI_API_KEY': 'ZhipuAI (GLM)',
-            'APIFY_API_KEY': 'Apify (Instagram, etc)',
-            'GOOGLE_CSE_API_KEY': 'Google Custom Search',
-            'GOOGLE_CSE_ID': 'Google Search Engine ID'
-        }
-        
+        """Verifica configuração das APIs (lida uma vez em API_CONFIG)"""
         configured = []
         missing = []
         
-        for key, name in required_apis.items():
-            if os.getenv(key):
+        for field, value in API_CONFIG._asdict().items():
+            key, name = API_ENV_VARS[field]
+            if value:
                 configured.append(name)
             else:
                 missing.append(f"{name} ({key})")
         
-        logger.info(f"APIs configuradas: {len(configured)}/{len(required_apis)}")
+        logger.info(f"APIs configuradas: {len(configured)}/{len(API_CONFIG)}")
         for api in configured:
             logger.info(f"  [OK] {api}")
         
@@ -209,7 +715,8 @@ class GDRFrameworkV31Enterprise:
         estimates = self.token_estimator.estimate_batch_processing(
             num_leads=num_leads,
             llm_models=llm_models,
-            analyses_per_llm=analyses_per_llm
+            analyses_per_llm=analyses_per_llm,
+            static_prefix_tokens=self.token_estimator.count_tokens(self.llm_analyzer.SYSTEM_PROMPT)
         )
         
         # Adicionar custos dos scrapers (estimativa fixa)
@@ -259,7 +766,11 @@ class GDRFrameworkV31Enterprise:
                            output_file: str = None,
                            batch_size: int = 10,
                            max_leads: int = 75,
-                           estimate_only: bool = False) -> Optional[pd.DataFrame]:
+                           estimate_only: bool = False,
+                           batch_mode: bool = False,
+                           auto_confirm: bool = False,
+                           max_cost_usd: float = 10.0,
+                           excel_engine: Optional[str] = None) -> Optional[pd.DataFrame]:
         """
         Processa batch de leads com todas as funcionalidades V3.1
         
@@ -269,6 +780,13 @@ class GDRFrameworkV31Enterprise:
             batch_size: Tamanho do batch
             max_leads: Máximo de leads
             estimate_only: Se True, apenas estima custos
+            batch_mode: Se True, usa as APIs de lote (OpenAI/Anthropic) para as
+                análises LLM - 50% mais barato, com latência de até 24h
+            auto_confirm: Se True, não pede confirmação quando o custo estimado
+                passa de max_cost_usd (uso sem terminal: CI, agendadores)
+            max_cost_usd: Custo estimado acima do qual a confirmação é pedida
+            excel_engine: Engine do pandas para ler a entrada (None = calamine
+                quando instalado, senão openpyxl)
             
         Returns:
             DataFrame com resultados ou None se estimate_only
@@ -278,18 +796,22 @@ class GDRFrameworkV31Enterprise:
         # Carregar dados
         logger.info(f"Carregando dados de: {input_file}")
         try:
-            df = pd.read_excel(input_file)
+            # Leitura em thread: não bloqueia o event loop; apenas as linhas
+            # que serão processadas são lidas
+            df = await asyncio.to_thread(pd.read_excel, input_file,
+                                         engine=excel_engine or DEFAULT_EXCEL_ENGINE,
+                                         nrows=max_leads or None)
         except Exception as e:
             logger.error(f"Erro ao carregar arquivo: {e}")
             return None
         
         # Limitar número de leads
         if max_leads and len(df) > max_leads:
-            df = df.head(max_leads)
+            df = df.iloc[:max_leads]
             logger.info(f"Limitando a {max_leads} leads")
         
         total_leads = len(df)
-        self.processing_stats['total_leads'] = total_leads
+        self.processing_stats.total_leads = total_leads
         
         # Estimativa de custos
         logger.info("Calculando estimativa de custos...")
@@ -300,18 +822,23 @@ class GDRFrameworkV31Enterprise:
             logger.info("Modo estimate_only ativado. Finalizando.")
             return None
         
-        # Confirmar processamento se custo for alto
-        if cost_estimates['total_cost'] > 10:
+        # Confirmar processamento se custo for alto (input em thread para não
+        # bloquear o event loop)
+        if cost_estimates['total_cost'] > max_cost_usd and not auto_confirm:
             print(f"\n[!] Custo estimado: {self.token_estimator.format_cost(cost_estimates['total_cost'])}")
-            confirm = input("Deseja continuar? (s/N): ").lower().strip()
-            if confirm != 's':
+            try:
+                confirm = await asyncio.to_thread(input, "Deseja continuar? (s/N): ")
+            except EOFError:
+                # Sem terminal interativo: tratar como recusa
+                confirm = ''
+            if confirm.lower().strip() != 's':
                 logger.info("Processamento cancelado pelo usuário")
                 return None
         
         # Configurar arquivo de saída
         if not output_file:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = f"outputs/gdr_v31_enterprise_{timestamp}.xlsx"
+            output_file = f"outputs/gdr_v31_enterprise_{timestamp}{OUTPUT_FORMATS[DEFAULT_OUTPUT_FORMAT]}"
         
         # Criar diretório de saída
         Path(output_file).parent.mkdir(exist_ok=True, parents=True)
@@ -322,135 +849,348 @@ class GDRFrameworkV31Enterprise:
         logger.info(f"Saída: {output_file}")
         logger.info("="*80)
         
-        # Processar em batches
-        results = []
-        total_batches = (total_leads + batch_size - 1) // batch_size
+        # Limpar tipos e preservar os dados originais de todas as colunas de uma
+        # vez e converter para registros uma única vez (evita criar uma Series
+        # por linha)
+        clean_df = self._clean_input_dataframe(df)
+        records = clean_df.to_dict(orient='records')
+        originals = self._preserve_original_dataframe(clean_df).to_dict(orient='records')
+        
+        # Retomar execução anterior a partir do checkpoint JSONL (se existir)
+        checkpoint_file = self.checkpoint_dir / f"{Path(output_file).stem}.jsonl"
+        results = await asyncio.to_thread(self._load_checkpoint, checkpoint_file)
+        if results:
+            completed_ids = {r['lead_id'] for r in results}
+            results = [r['result'] for r in results]
+            remaining = [
+                (record, original) for record, original in zip(records, originals)
+                if self._get_lead_id(record) not in completed_ids
+            ]
+            records = [record for record, _ in remaining]
+            originals = [original for _, original in remaining]
+            logger.info(f"Retomando de {checkpoint_file}: {len(results)} leads já processados")
+        
+        # Modo lote: todos os leads pendentes em um único batch, para que as
+        # análises LLM sigam juntas para as APIs de lote dos providers
+        if batch_mode and len(records) < self.BATCH_MODE_MIN_LEADS:
+            logger.info(f"Menos de {self.BATCH_MODE_MIN_LEADS} leads - usando análise LLM online")
+            batch_mode = False
+        if batch_mode:
+            batch_size = max(1, len(records))
         
-        for batch_num in range(total_batches):
-            start_idx = batch_num * batch_size
-            end_idx = min(start_idx + batch_size, total_leads)
-            batch_df = df.iloc[start_idx:end_idx]
-            
-            logger.info(f"\n{'='*60}")
-            logger.info(f"PROCESSANDO BATCH {batch_num + 1}/{total_batches}")
-            logger.info(f"Leads {start_idx + 1} a {end_idx} ({len(batch_df)} leads)")
-            logger.info(f"{'='*60}")
-            
-            # Processar batch
-            batch_results = await self._process_batch_internal(batch_df, batch_num + 1)
-            results.extend(batch_results)
-            
-            # Salvar checkpoint
-            self._save_checkpoint(results, batch_num + 1)
-            
-            # Log progresso
-            processed = len(results)
-            progress = (processed / total_leads) * 100
-            logger.info(f"\nProgresso geral: {processed}/{total_leads} ({progress:.1f}%)")
-            
-            # Pausa entre batches se necessário
-            if batch_num < total_batches - 1:
-                await asyncio.sleep(2)
+        # Processar em batches
+        pending_leads = len(records)
+        total_batches = (pending_leads + batch_size - 1) // batch_size
+        
+        self._checkpoint_fp = open(checkpoint_file, 'ab', buffering=CHECKPOINT_BUFFER_SIZE)
+        # Checkpoints gravados em segundo plano, na ordem dos batches, enquanto
+        # o batch seguinte já está em processamento
+        checkpoint_queue = asyncio.Queue()
+        checkpoint_writer = asyncio.create_task(self._checkpoint_writer(checkpoint_queue))
+        try:
+            for batch_num in range(total_batches):
+                start_idx = batch_num * batch_size
+                end_idx = min(start_idx + batch_size, pending_leads)
+                batch_records = records[start_idx:end_idx]
+                batch_originals = originals[start_idx:end_idx]
+                
+                logger.info(f"\n{'='*60}")
+                logger.info(f"PROCESSANDO BATCH {batch_num + 1}/{total_batches}")
+                logger.info(f"Leads {start_idx + 1} a {end_idx} ({len(batch_records)} leads)")
+                logger.info(f"{'='*60}")
+                
+                # Processar batch
+                batch_results = await self._process_batch_internal(batch_records, batch_num + 1, start_idx,
+                                                                   batch_mode=batch_mode,
+                                                                   batch_originals=batch_originals)
+                results.extend(batch_results)
+                
+                # Salvar checkpoint (apenas os resultados novos)
+                checkpoint_queue.put_nowait((batch_records, batch_results, batch_num + 1))
+                
+                # Log progresso
+                processed = len(results)
+                progress = (processed / total_leads) * 100
+                logger.info(f"\nProgresso geral: {processed}/{total_leads} ({progress:.1f}%)")
+                
+                # Pausa entre batches: mínima enquanto scrapers e LLMs não
+                # recebem 429, maior quando os providers começam a recusar
+                if batch_num < total_batches - 1:
+                    pacing = self.smart_orchestrator.pacing_delay()
+                    if pacing > self.smart_orchestrator.PACING_MIN_DELAY:
+                        logger.info(f"Taxa recente de HTTP 429 elevada - pausa de {pacing:.1f}s")
+                    await asyncio.sleep(pacing)
+        finally:
+            # Aguardar os checkpoints pendentes antes de fechar o arquivo
+            checkpoint_queue.put_nowait(None)
+            await checkpoint_writer
+            self._checkpoint_fp.close()
+            self._checkpoint_fp = None
         
         # Criar DataFrame final
         results_df = pd.DataFrame(results)
         
+        # Colunas de baixa cardinalidade como categorias (códigos inteiros no
+        # relatório e dicionário no Parquet)
+        for col in CATEGORICAL_COLUMNS:
+            if col in results_df.columns:
+                results_df[col] = results_df[col].astype('category')
+        
         # Aplicar ordenação de colunas
         results_df = self._order_columns(results_df)
         
-        # Salvar resultados
-        logger.info(f"\nSalvando resultados em: {output_file}")
-        results_df.to_excel(output_file, index=False)
+        # Salvar resultados (em thread: não bloqueia o event loop)
+        await asyncio.to_thread(self._write_results, results_df, output_file)
+        
+        # Execução concluída: o checkpoint só serve para retomar uma execução
+        # interrompida (mantido, uma nova execução com a mesma saída
+        # reaproveitaria resultados antigos, ignorando o TTL do cache e
+        # mudanças na entrada)
+        checkpoint_file.unlink(missing_ok=True)
+        logger.info(f"Checkpoint removido: {checkpoint_file}")
         
         # Calcular estatísticas finais
-        self.processing_stats['total_time'] = time.time() - start_time
-        self.processing_stats['average_time_per_lead'] = self.processing_stats['total_time'] / total_leads
+        self.processing_stats.total_time = time.time() - start_time
+        self.processing_stats.average_time_per_lead = self.processing_stats.total_time / total_leads
         
-        # Análise de qualidade do batch
+        # Análise de qualidade do batch (agrega os scores calculados em
+        # _review_batch_results, sem revisar os leads de novo)
         logger.info("Executando análise de qualidade do batch...")
-        batch_quality = self.quality_reviewer.review_batch(results_df)
-        self.processing_stats['quality_metrics'] = batch_quality
+        batch_quality = self.quality_reviewer.summarize_reviews(results_df)
+        self.processing_stats.quality_metrics = batch_quality
         
         # Gerar relatório final
         self._generate_final_report(results_df, cost_estimates, batch_quality)
         
         return results_df
     
-    async def _process_batch_internal(self, batch_df: pd.DataFrame, batch_num: int) -> List[Dict]:
-        """Processa um batch interno de leads"""
-        batch_results = []
+    async def _process_batch_internal(self, batch_records: List[Dict], batch_num: int, offset: int = 0,
+                                      batch_mode: bool = False,
+                                      batch_originals: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Processa um batch interno de leads em paralelo (limitado por semáforo)
         
-        for idx, row in batch_df.iterrows():
-            lead_num = idx + 1
-            logger.info(f"\n[BATCH {batch_num}] Processando Lead {lead_num}")
-            logger.info("-" * 50)
+        Args:
+            batch_records: Leads do batch já limpos (_clean_input_dataframe + to_dict)
+            batch_num: Número do batch (1-based)
+            offset: Posição do primeiro lead do batch no arquivo de entrada
+            batch_mode: Se True, executa os scrapers de todos os leads e envia
+                as análises LLM juntas pelas APIs de lote dos providers
+            batch_originals: Dados originais já preservados de cada lead
+                (_preserve_original_dataframe); None preserva lead a lead
             
-            try:
-                # Processar lead individual
-                result = await self.process_single_lead(row.to_dict())
-                batch_results.append(result)
-                
-                # Atualizar estatísticas
-                if result.get('processing_status') == 'completed':
-                    self.processing_stats['successful_leads'] += 1
-                else:
-                    self.processing_stats['failed_leads'] += 1
-                    
-            except Exception as e:
-                logger.error(f"Erro crítico no Lead {lead_num}: {e}")
-                logger.error(traceback.format_exc())
+        Returns:
+            Lista de resultados na mesma ordem dos leads
+        """
+        if batch_originals is None:
+            batch_originals = [None] * len(batch_records)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent_leads)
+        
+        # Buscar o cache de todos os leads do batch em uma única ida ao DuckDB
+        prefetched = {}
+        cache_writes = []
+        if self.use_cache and self.cache:
+            lead_ids = [self._get_lead_id(lead_data) for lead_data in batch_records]
+            prefetched = await asyncio.to_thread(self.cache.prefetch_leads, lead_ids)
+        
+        async def process_bounded(lead_num: int, lead_data: Dict, original: Optional[Dict]) -> Dict:
+            async with semaphore:
+                logger.info(f"\n[BATCH {batch_num}] Processando Lead {lead_num}")
+                logger.info("-" * 50)
+                if batch_mode:
+                    return await self._collect_lead(lead_data, prefetched, cleaned=True,
+                                                    consolidate=False, original=original)
+                return await self.process_single_lead(lead_data, prefetched=prefetched,
+                                                      cache_writes=cache_writes, cleaned=True,
+                                                      review=False, consolidate=False,
+                                                      original=original, consensus=False)
+        
+        leads = list(enumerate(batch_records, start=offset + 1))
+        outcomes = await asyncio.gather(
+            *[process_bounded(lead_num, lead_data, original)
+              for (lead_num, lead_data), original in zip(leads, batch_originals)],
+            return_exceptions=True
+        )
+        
+        if batch_mode:
+            outcomes = await self._complete_leads_batch_api(outcomes, cache_writes)
+        
+        # Consolidar resultados e estatísticas na ordem original
+        batch_results = []
+        for (lead_num, lead_data), original, outcome in zip(leads, batch_originals, outcomes):
+            # BaseException: um lead cancelado volta do gather como CancelledError
+            if isinstance(outcome, BaseException):
+                logger.error(f"Erro crítico no Lead {lead_num}: {outcome}")
+                logger.error(''.join(traceback.format_exception(type(outcome), outcome, outcome.__traceback__)))
                 
                 # Criar resultado de erro
-                error_result = self._create_error_result(row.to_dict(), str(e))
-                batch_results.append(error_result)
-                self.processing_stats['failed_leads'] += 1
-                self.processing_stats['errors'].append({
+                batch_results.append(self._create_error_result(lead_data, str(outcome), original))
+                self.processing_stats.failed_leads += 1
+                self.processing_stats.errors.append({
                     'lead': lead_num,
-                    'error': str(e),
-                    'timestamp': datetime.now().isoformat()
+                    'error': str(outcome),
+                    'timestamp': _timestamp()
                 })
+                continue
+            
+            batch_results.append(outcome)
+            if outcome.get('processing_status') == 'completed':
+                self.processing_stats.successful_leads += 1
+            else:
+                self.processing_stats.failed_leads += 1
+        
+        # Consolidação de contatos, consenso e revisão de qualidade de todos
+        # os leads novos do batch em uma passada (antes do cache, que guarda
+        # referências aos mesmos dicts)
+        self._consolidate_batch_results(batch_results)
+        self._consensus_batch_results(batch_results)
+        self._review_batch_results(batch_results)
+        
+        # Gravar no cache os leads processados do batch de uma só vez e
+        # manter o cache no limite de tamanho (abaixo dele, apenas um COUNT)
+        if cache_writes:
+            await asyncio.to_thread(self.cache.save_leads_bulk, cache_writes)
+            if self.max_cache_rows:
+                await asyncio.to_thread(self.cache.evict_to, self.max_cache_rows)
         
         return batch_results
     
-    async def process_single_lead(self, lead_data: Dict) -> Dict:
+    async def _complete_leads_batch_api(self, outcomes: List[Any], cache_writes: List) -> List[Any]:
+        """
+        Conclui os leads coletados enviando todas as análises LLM em lote
+        
+        Args:
+            outcomes: Saídas de _collect_lead (LeadInProgress, resultado do cache ou exceção)
+            cache_writes: Lista de gravações do batch
+            
+        Returns:
+            Lista na mesma ordem com resultados completos ou exceções
+        """
+        pending = [(i, outcome) for i, outcome in enumerate(outcomes) if isinstance(outcome, LeadInProgress)]
+        if not pending:
+            return outcomes
+        
+        logger.info(f"Enviando análises LLM de {len(pending)} leads via API de lote...")
+        try:
+            llm_results = await self.llm_analyzer.analyze_all_llms_batch(
+                [(lead.lead_data, lead.result) for _, lead in pending]
+            )
+        except Exception as e:
+            logger.error(f"Erro na análise LLM em lote: {e}")
+            llm_results = [{} for _ in pending]
+        
+        outcomes = list(outcomes)
+        for (i, lead), lead_llm_results in zip(pending, llm_results):
+            try:
+                outcomes[i] = self._complete_lead(lead, lead_llm_results, cache_writes,
+                                                  review=False, consensus=False)
+            except Exception as e:
+                outcomes[i] = e
+        return outcomes
+    
+    async def process_single_lead(self, lead_data: Dict, prefetched: Optional[Dict] = None,
+                                  cache_writes: Optional[List] = None, cleaned: bool = False,
+                                  review: bool = True, consolidate: bool = True,
+                                  original: Optional[Dict] = None, consensus: bool = True) -> Dict:
         """
         Processa um único lead com todas as funcionalidades V3.1
         Agora com cache DuckDB para evitar reprocessamento
         
         Args:
             lead_data: Dados do lead
+            prefetched: Cache do batch pré-carregado (LeadCache.prefetch_leads);
+                None consulta o cache apenas para este lead
+            cache_writes: Lista onde a gravação no cache é acumulada para o
+                batch (LeadCache.save_leads_bulk); None grava imediatamente
+            cleaned: True se lead_data já passou por _clean_input_dataframe
+            review: Se False, a revisão de qualidade fica para o batch
+                (_review_batch_results)
+            consolidate: Se False, a consolidação de contatos fica para o
+                batch (_consolidate_batch_results)
+            original: Dados originais já preservados em lote
+                (_preserve_original_dataframe); None preserva a partir de lead_data
+            consensus: Se False, o consenso Multi-LLM fica para o batch
+                (_consensus_batch_results)
             
         Returns:
             Dict com resultado completo
         """
+        pending = await self._collect_lead(lead_data, prefetched, cleaned=cleaned, stream_llm=True,
+                                           consolidate=consolidate, original=original)
+        if not isinstance(pending, LeadInProgress):
+            # Resultado completo vindo do cache
+            return pending
+        
+        # 5. ANÁLISE MULTI-LLM COM TODOS OS 5 PROVIDERS
+        # As análises já foram disparadas em _collect_lead à medida que os
+        # scrapers de que dependem terminavam; aqui apenas aguardamos
+        logger.info("Aguardando análise Multi-LLM (5 providers)...")
+        
+        llm_results = {}
+        for outcome in await asyncio.gather(*pending.llm_tasks, return_exceptions=True):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Erro na análise LLM: {outcome!r}")
+            else:
+                llm_results.update(outcome)
+        
+        return self._complete_lead(pending, llm_results, cache_writes, review, consensus)
+    
+    async def _collect_lead(self, lead_data: Dict, prefetched: Optional[Dict] = None,
+                            cleaned: bool = False, stream_llm: bool = False,
+                            consolidate: bool = True,
+                            original: Optional[Dict] = None) -> Union[Dict, LeadInProgress]:
+        """
+        Etapas anteriores à análise LLM: cache, scrapers, Linktree e consolidação
+        
+        Args:
+            lead_data: Dados do lead
+            prefetched: Cache do batch pré-carregado (ver process_single_lead)
+            cleaned: True se lead_data já passou por _clean_input_dataframe
+            stream_llm: Se True, dispara cada análise LLM assim que os scrapers
+                de que ela depende terminam (LeadInProgress.llm_tasks), em vez
+                de esperar todos os scrapers
+            consolidate: Se False, a consolidação de contatos fica para o
+                batch (_consolidate_batch_results)
+            original: Dados originais já preservados (ver process_single_lead)
+            
+        Returns:
+            Resultado completo se o lead estava no cache, ou LeadInProgress
+            aguardando a análise LLM
+        """
         start_time = time.time()
         
-        # VALIDAÇÃO E LIMPEZA DE TIPOS
-        lead_data = self._validate_and_clean_lead_data(lead_data)
+        # VALIDAÇÃO E LIMPEZA DE TIPOS (já feita em lote por process_batch)
+        if not cleaned:
+            lead_data = self._validate_and_clean_lead_data(lead_data)
         
         lead_name = lead_data.get('name', lead_data.get('tradeName', 'Lead'))
-        # Garantir que lead_id seja sempre string para consistência no cache
-        lead_id = str(lead_data.get('id', lead_data.get('cnpj', lead_name)))
+        lead_id = self._get_lead_id(lead_data)
+        
+        self._ensure_http_session()
         
-        # VERIFICAR CACHE PRIMEIRO
+        # VERIFICAR CACHE PRIMEIRO (TTL padrão de 7 dias)
+        cached_entry = None
         if self.use_cache and self.cache:
-            cached_result = self.cache.get_lead(lead_id)
+            if prefetched is not None:
+                cached_entry = prefetched.get(lead_id, {'result': None, 'scrapers': {}})
+            else:
+                cached_entry = (await asyncio.to_thread(self.cache.prefetch_leads, [lead_id]))[lead_id]
+            
+            cached_result = cached_entry['result']
             if cached_result:
-                # Verificar idade do cache (7 dias por padrão)
-                cache_age_days = 7
-                if self.cache.is_recent(lead_id, days=cache_age_days):
-                    logger.info(f"✓ Lead '{lead_name}' encontrado no cache (pulando processamento)")
-                    # Adicionar flag indicando que veio do cache
-                    cached_result['from_cache'] = True
-                    cached_result['cache_hit'] = True
-                    return cached_result
-                else:
-                    logger.info(f"⚠ Cache expirado para '{lead_name}' (>{cache_age_days} dias)")
+                logger.info(f"✓ Lead '{lead_name}' encontrado no cache (pulando processamento)")
+                # Adicionar flag indicando que veio do cache
+                cached_result['from_cache'] = True
+                cached_result['cache_hit'] = True
+                return cached_result
         
         logger.info(f"Iniciando processamento completo: {lead_name}")
         
-        # 1. PRESERVAR DADOS ORIGINAIS (já limpos)
-        result = self._preserve_original_data(lead_data)
+        # 1. PRESERVAR DADOS ORIGINAIS (já limpos; em batch, preservados em lote)
+        # (cópia: o dict preservado do batch continua limpo para
+        # _create_error_result se o lead falhar)
+        result = dict(original) if original is not None else self._preserve_original_data(lead_data)
         result['from_cache'] = False
         result['cache_hit'] = False
         
@@ -459,14 +1199,112 @@ class GDRFrameworkV31Enterprise:
         
         # Verificar cache parcial para scrapers
         cached_scrapers = {}
-        if self.use_cache and self.cache:
-            # Buscar resultados de scrapers no cache
-            cached_scrapers = self.cache.get_scraper_results(lead_id)
+        if cached_entry:
+            # Resultados de scrapers já carregados junto com o lead
+            cached_scrapers = cached_entry['scrapers']
             if cached_scrapers:
                 logger.info(f"✓ Encontrados {len(cached_scrapers)} scrapers no cache")
         
         scraper_tasks = self._create_scraper_tasks(lead_data, cached_scrapers)
         
+        llm_tasks = []
+        on_scraper_complete = None
+        if stream_llm:
+            on_scraper_complete = self._start_streaming_llm(lead_data, result, cached_scrapers,
+                                                            scraper_tasks, llm_tasks)
+        
+        try:
+            scraper_results = await self._run_scrapers(scraper_tasks, cached_scrapers, on_scraper_complete)
+            
+            # Consolidar resultados dos scrapers
+            for scraper_name, scraper_data in scraper_results['results'].items():
+                if isinstance(scraper_data, dict):
+                    result.update(scraper_data)
+            
+            # 3. DETECÇÃO MELHORADA DE LINKTREE
+            logger.info("Executando detecção melhorada de Linktree...")
+            result = self.linktree_detector.enrich_with_detection(result)
+            
+            # 4. CONSOLIDAÇÃO DE CONTATOS (ETAPA 1; em batch: _consolidate_batch_results)
+            if consolidate:
+                logger.info("Consolidando contatos coletados...")
+                contact_consolidation = self._consolidate_contacts(result)
+                result.update(contact_consolidation)
+        except BaseException:
+            # Não deixar análises LLM já disparadas rodando sem dono
+            for task in llm_tasks:
+                task.cancel()
+            raise
+        
+        return LeadInProgress(
+            lead_id=lead_id,
+            lead_name=lead_name,
+            lead_data=lead_data,
+            result=result,
+            scraper_results=scraper_results,
+            start_time=start_time,
+            llm_tasks=llm_tasks
+        )
+    
+    def _start_streaming_llm(self, lead_data: Dict, result: Dict, cached_scrapers: Dict,
+                             scraper_tasks: List[ScraperTask], llm_tasks: List[asyncio.Task]):
+        """
+        Dispara as análises LLM sem dependência pendente e retorna o callback
+        que dispara as demais conforme os scrapers terminam
+        
+        Args:
+            lead_data: Dados do lead (já limpos)
+            result: Dados originais preservados do lead
+            cached_scrapers: Resultados de scrapers vindos do cache
+            scraper_tasks: Tarefas de scraping que ainda vão executar
+            llm_tasks: Lista onde as tarefas LLM criadas são acumuladas
+            
+        Returns:
+            Callback on_complete para SmartOrchestrator.execute_tasks
+        """
+        dependencies = self.llm_analyzer.ANALYSIS_SCRAPER_DEPENDENCIES
+        pending_scrapers = {task.name for task in scraper_tasks}
+        waiting = list(self.llm_analyzer.analises_esperadas)
+        
+        scraped = dict(result)
+        for scraper_data in cached_scrapers.values():
+            if isinstance(scraper_data, dict):
+                scraped.update(scraper_data)
+        
+        def start_ready():
+            ready = [a for a in waiting if not dependencies.get(a, frozenset()) & pending_scrapers]
+            if not ready:
+                return
+            for analise in ready:
+                waiting.remove(analise)
+            # Cópia dos dados coletados até agora: scrapers seguintes não
+            # alteram o prompt de análises já disparadas
+            llm_tasks.append(asyncio.create_task(
+                self.llm_analyzer.analyze_all_llms(lead_data, dict(scraped), analyses=ready)
+            ))
+        
+        def on_scraper_complete(scraper_name: str, scraper_data: Any):
+            pending_scrapers.discard(scraper_name)
+            if isinstance(scraper_data, dict):
+                scraped.update(scraper_data)
+            start_ready()
+        
+        start_ready()
+        return on_scraper_complete
+    
+    async def _run_scrapers(self, scraper_tasks: List[ScraperTask], cached_scrapers: Dict,
+                            on_complete=None) -> Dict:
+        """
+        Executa os scrapers não cacheados e mescla com os resultados em cache
+        
+        Args:
+            scraper_tasks: Tarefas de scraping a executar
+            cached_scrapers: Resultados de scrapers vindos do cache
+            on_complete: Callback repassado a SmartOrchestrator.execute_tasks
+            
+        Returns:
+            Dict no formato de SmartOrchestrator.execute_tasks
+        """
         # Se temos dados em cache, adicionar ao resultado
         if cached_scrapers:
             # Criar estrutura de resultado com dados cacheados
@@ -482,7 +1320,7 @@ class GDRFrameworkV31Enterprise:
             
             # Executar apenas tarefas não cacheadas
             if scraper_tasks:
-                new_results = await self.smart_orchestrator.execute_tasks(scraper_tasks)
+                new_results = await self.smart_orchestrator.execute_tasks(scraper_tasks, on_complete)
                 # Mesclar resultados novos com cacheados
                 scraper_results['results'].update(new_results['results'])
                 scraper_results['stats']['successful'] += new_results['stats']['successful']
@@ -490,74 +1328,72 @@ class GDRFrameworkV31Enterprise:
                 scraper_results['stats']['retried'] += new_results['stats']['retried']
         else:
             # Sem cache, executar todas as tarefas
-            scraper_results = await self.smart_orchestrator.execute_tasks(scraper_tasks)
+            scraper_results = await self.smart_orchestrator.execute_tasks(scraper_tasks, on_complete)
         
-        # Consolidar resultados dos scrapers
-        for scraper_name, scraper_data in scraper_results['results'].items():
-            if isinstance(scraper_data, dict):
-                result.update(scraper_data)
-        
-        # 3. DETECÇÃO MELHORADA DE LINKTREE
-        logger.info("Executando detecção melhorada de Linktree...")
-        result = self.linktree_detector.enrich_with_detection(result)
-        
-        # 4. CONSOLIDAÇÃO DE CONTATOS (ETAPA 1)
-        logger.info("Consolidando contatos coletados...")
-        contact_consolidation = self._consolidate_contacts(result)
-        result.update(contact_consolidation)
+        return scraper_results
+    
+    def _complete_lead(self, pending: LeadInProgress, llm_results: Dict,
+                       cache_writes: Optional[List] = None, review: bool = True,
+                       consensus: bool = True) -> Dict:
+        """
+        Etapas posteriores à análise LLM: consenso, qualidade, metadados e cache
         
-        # 5. ANÁLISE MULTI-LLM COM TODOS OS 5 PROVIDERS
-        logger.info("Executando análise Multi-LLM (5 providers)...")
+        Args:
+            pending: Lead com scrapers concluídos (_collect_lead)
+            llm_results: Análises retornadas pelo LLMAnalyzerV3
+            cache_writes: Lista de gravações do batch (ver process_single_lead)
+            review: Se False, a revisão de qualidade fica para o batch
+            consensus: Se False, o consenso Multi-LLM fica para o batch
+            
+        Returns:
+            Dict com resultado completo
+        """
+        result = pending.result
+        scraper_results = pending.scraper_results
+        lead_name = pending.lead_name
         
-        # Executar análise com todos os LLMs disponíveis
-        # analyze_all_llms espera (lead_data, scraped_data)
-        try:
-            llm_results = await self.llm_analyzer.analyze_all_llms(lead_data, result)
+        if llm_results:
+            result.update(llm_results)
+            logger.info(f"LLM análise completa: {len(llm_results)} campos adicionados")
             
-            if llm_results:
-                result.update(llm_results)
-                logger.info(f"LLM análise completa: {len(llm_results)} campos adicionados")
-                
-                # Calcular custo estimado
-                num_analyses = len([k for k in llm_results.keys() if 'gdr_llm_' in k])
-                estimated_cost = num_analyses * 0.0002  # ~$0.0002 por análise
-                result['gdr_total_cost_usd'] = estimated_cost
-                result['gdr_providers_used'] = list(self.llm_analyzer.providers.keys())
-                logger.info(f"Custo LLM: ${estimated_cost:.4f}")
-            else:
-                logger.warning("Nenhum resultado LLM retornado")
-                result['gdr_total_cost_usd'] = 0.0
-                result['gdr_providers_used'] = []
-        except Exception as e:
-            logger.error(f"Erro na análise LLM: {e}")
+            # Calcular custo estimado
+            num_analyses = len([k for k in llm_results.keys() if 'gdr_llm_' in k])
+            estimated_cost = num_analyses * 0.0002  # ~$0.0002 por análise
+            result['gdr_total_cost_usd'] = estimated_cost
+            result['gdr_providers_used'] = list(self.llm_analyzer.providers.keys())
+            logger.info(f"Custo LLM: ${estimated_cost:.4f}")
+        else:
+            logger.warning("Nenhum resultado LLM retornado")
             result['gdr_total_cost_usd'] = 0.0
             result['gdr_providers_used'] = []
         
         # Rastrear uso de tokens
         self._track_llm_usage(llm_results)
         
-        # 6. CONSENSO MULTI-LLM
-        logger.info("Calculando consenso Multi-LLM...")
-        consensus = self.llm_analyzer.calculate_consensus(result)
-        result.update(consensus)
-        
-        # 7. REVISÃO DE QUALIDADE AUTOMÁTICA
-        logger.info("Executando revisão de qualidade...")
-        quality_report = self.quality_reviewer.review_lead(result)
+        # 6. CONSENSO MULTI-LLM (em batch: _consensus_batch_results)
+        if consensus:
+            logger.info("Calculando consenso Multi-LLM...")
+            result.update(self.llm_analyzer.calculate_consensus(result))
         
-        # Adicionar métricas de qualidade
-        result['gdr_quality_overall_score'] = quality_report.overall_score
-        result['gdr_quality_completeness_score'] = quality_report.completeness_score
-        result['gdr_quality_accuracy_score'] = quality_report.accuracy_score
-        result['gdr_quality_consistency_score'] = quality_report.consistency_score
-        result['gdr_quality_enrichment_score'] = quality_report.enrichment_score
-        result['gdr_quality_issues'] = json.dumps(quality_report.issues)
-        result['gdr_quality_suggestions'] = json.dumps(quality_report.suggestions)
+        # 7. REVISÃO DE QUALIDADE AUTOMÁTICA (em batch: _review_batch_results)
+        if review:
+            logger.info("Executando revisão de qualidade...")
+            quality_report = self.quality_reviewer.review_lead(result)
+            
+            # Adicionar métricas de qualidade
+            result['gdr_quality_overall_score'] = quality_report.overall_score
+            result['gdr_quality_completeness_score'] = quality_report.completeness_score
+            result['gdr_quality_accuracy_score'] = quality_report.accuracy_score
+            result['gdr_quality_consistency_score'] = quality_report.consistency_score
+            result['gdr_quality_enrichment_score'] = quality_report.enrichment_score
+            # Listas serializadas apenas na escrita do arquivo (_serialize_json_columns)
+            result['gdr_quality_issues'] = quality_report.issues
+            result['gdr_quality_suggestions'] = quality_report.suggestions
         
         # 8. METADADOS E ESTATÍSTICAS
-        processing_time = time.time() - start_time
+        processing_time = time.time() - pending.start_time
         result['processing_time_seconds'] = round(processing_time, 2)
-        result['processing_timestamp'] = datetime.now().isoformat()
+        result['processing_timestamp'] = _timestamp()
         result['processing_status'] = 'completed'
         result['framework_version'] = 'v3.1-enterprise'
         result['scrapers_used'] = len(scraper_results['results'])
@@ -567,90 +1403,107 @@ class GDRFrameworkV31Enterprise:
         
         # Log resumo
         logger.info(f"Lead processado em {processing_time:.1f}s")
-        logger.info(f"Qualidade geral: {quality_report.overall_score:.1f}/100")
+        if review:
+            logger.info(f"Qualidade geral: {quality_report.overall_score:.1f}/100")
         logger.info(f"Scrapers: {scraper_results['stats']['successful']}/{scraper_results['stats']['total_tasks']} sucessos")
         
-        # SALVAR NO CACHE DUCKDB
+        # SALVAR NO CACHE DUCKDB (resultado completo + scrapers para cache parcial)
         if self.use_cache and self.cache:
-            try:
-                # Salvar resultado completo
-                self.cache.save_lead(lead_id, result)
-                
-                # Salvar resultados dos scrapers separadamente para cache parcial
-                for scraper_name, scraper_data in scraper_results['results'].items():
-                    if isinstance(scraper_data, dict) and scraper_data:
-                        self.cache.save_scraper_result(lead_id, scraper_name, scraper_data)
-                
+            cache_entry = (pending.lead_id, result, scraper_results['results'])
+            if cache_writes is not None:
+                cache_writes.append(cache_entry)
+            elif self.cache.save_leads_bulk([cache_entry]):
                 logger.info(f"✓ Lead '{lead_name}' salvo no cache DuckDB")
-            except Exception as e:
-                logger.error(f"Erro ao salvar no cache: {e}")
         
         return result
     
+    def _consensus_batch_results(self, batch_results: List[Dict]):
+        """
+        Calcula o consenso Multi-LLM dos leads novos do batch de uma vez
+        (LLMAnalyzerV3.calculate_consensus_batch) e grava nos dicts
+        
+        Args:
+            batch_results: Resultados do batch; leads do cache e com erro
+                ficam como estão
+        """
+        to_merge = [
+            result for result in batch_results
+            if result.get('processing_status') == 'completed' and not result.get('from_cache')
+        ]
+        if not to_merge:
+            return
+        
+        logger.info(f"Calculando consenso Multi-LLM de {len(to_merge)} leads...")
+        for result, consensus in zip(to_merge, self.llm_analyzer.calculate_consensus_batch(to_merge)):
+            result.update(consensus)
+    
+    def _review_batch_results(self, batch_results: List[Dict]):
+        """
+        Revisa a qualidade dos leads novos do batch numa única passada por
+        colunas (QualityReviewer.review_dataframe) e grava os scores nos dicts
+        
+        Args:
+            batch_results: Resultados do batch; leads do cache e com erro já
+                têm seus scores
+        """
+        to_review = [
+            result for result in batch_results
+            if result.get('processing_status') == 'completed'
+            and not result.get('from_cache') and 'gdr_quality_overall_score' not in result
+        ]
+        if not to_review:
+            return
+        
+        logger.info(f"Executando revisão de qualidade de {len(to_review)} leads...")
+        scores, summary = self.quality_reviewer.review_dataframe(pd.DataFrame(to_review), records=to_review)
+        for result, row in zip(to_review, scores.to_dict(orient='records')):
+            result.update(row)
+        logger.info(f"Qualidade média do batch: {summary['average_score']:.1f}/100")
+    
+    def _ensure_http_session(self):
+        """Cria a sessão HTTP compartilhada e a injeta nos scrapers"""
+        if self.http_session is not None and not self.http_session.closed:
+            return
+        
+        self.http_session = create_shared_session()
+        for scraper in (self.facebook_scraper, self.website_scraper, self.google_search):
+            scraper.session = self.http_session
+    
+    async def close(self):
+        """Fecha a sessão HTTP compartilhada e a sessão do analisador LLM"""
+        if self.http_session is not None:
+            await self.http_session.close()
+            self.http_session = None
+        await self.llm_analyzer.close_session()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
     def _create_scraper_tasks(self, lead_data: Dict, cached_scrapers: Dict = None) -> List[ScraperTask]:
         """Cria lista de tarefas de scraping priorizadas, pulando scrapers em cache"""
         tasks = []
         cached_scrapers = cached_scrapers or {}
         
-        # Instagram (prioridade alta se temos URL)
-        if not cached_scrapers.get('instagram_scraper') and (lead_data.get('instagramUrl') or lead_data.get('instagram_url')):
-            instagram_task = ScraperTask(
-                name="instagram_scraper",
-                function=self.apify_scrapers.scrape_instagram_profile,
-                args=(lead_data.get('instagramUrl', lead_data.get('instagram_url', '')),),
-                priority=ScraperPriority.HIGH,
-                max_retries=3,
-                timeout=45.0,
-                required=True
-            )
-            tasks.append(instagram_task)
-        
-        # Facebook via Apify (dados reais com curious_coder/facebook-profile-scraper)
-        if not cached_scrapers.get('facebook_scraper'):
-            facebook_url = lead_data.get('facebookUrl', '')
-            if not facebook_url:
-                # Tentar construir URL baseado no nome
-                company_name = lead_data.get('name', '').lower().replace(' ', '').replace(',', '')
-                facebook_url = f"https://www.facebook.com/{company_name}"
+        for spec in SCRAPER_SPECS:
+            if cached_scrapers.get(spec.name):
+                continue
+            if spec.required_fields and not any(lead_data.get(f) for f in spec.required_fields):
+                continue
             
-            facebook_task = ScraperTask(
-            name="facebook_scraper",
-            function=self.apify_scrapers.scrape_facebook_profile,
-            args=(facebook_url,),
-            priority=ScraperPriority.MEDIUM,
-            max_retries=3,
-            timeout=60.0,
-            required=False
-            )
-            tasks.append(facebook_task)
-        
-        # Website (se temos URL)
-        if not cached_scrapers.get('website_scraper') and (lead_data.get('website') or lead_data.get('placesWebsite')):
-            website_url = lead_data.get('website', lead_data.get('placesWebsite', ''))
-            website_task = ScraperTask(
-                name="website_scraper",
-                function=self.website_scraper.scrape_website_smart,
-                args=(website_url,),
-                kwargs={'use_crawl4ai': True},
-                priority=ScraperPriority.HIGH,
-                max_retries=2,
-                timeout=30.0,
-                required=False
-            )
-            tasks.append(website_task)
-        
-        # Google Search
-        if not cached_scrapers.get('google_search'):
-            google_task = ScraperTask(
-            name="google_search",
-            function=self.google_search.search_company_info,
-            args=(lead_data.get('name', ''), f"{lead_data.get('city', '')}, {lead_data.get('state', '')}"),
-            priority=ScraperPriority.MEDIUM,
-            max_retries=2,
-            timeout=20.0,
-            required=False
-        )
-        tasks.append(google_task)
+            tasks.append(ScraperTask(
+                name=spec.name,
+                function=spec.function(self),
+                args=spec.build_args(lead_data),
+                kwargs=dict(spec.kwargs),
+                priority=spec.priority,
+                max_retries=spec.max_retries,
+                timeout=spec.timeout,
+                required=spec.required,
+                host=spec.host
+            ))
         
         return tasks
     
@@ -658,37 +1511,28 @@ class GDRFrameworkV31Enterprise:
         """
         Valida e limpa dados do lead, corrigindo tipos incorretos
         Especialmente importante para dados vindos do Excel que podem ter NaN/float
+        (process_batch usa a versão vetorizada _clean_input_dataframe)
         """
-        import pandas as pd
-        
         cleaned = {}
         
         for key, value in lead_data.items():
             # Tratar NaN e None
-            if pd.isna(value) or value is None:
+            if value is None or (not isinstance(value, str) and pd.isna(value)):
                 cleaned[key] = ''
                 continue
             
             # URLs e campos de texto que podem vir como float
-            url_fields = ['website', 'placesWebsite', 'instagramUrl', 'facebookUrl', 
-                         'linkedinUrl', 'youtubeUrl', 'tiktokUrl']
-            text_fields = ['name', 'tradeName', 'city', 'state', 'address', 
-                          'neighborhood', 'email', 'phone']
-            
-            if key in url_fields or key in text_fields:
+            if key in STRING_FIELDS:
                 # Converter para string e limpar
                 try:
                     str_value = str(value).strip()
                     # Verificar se não é "nan" ou valores inválidos
-                    if str_value.lower() in ['nan', 'none', 'null']:
-                        cleaned[key] = ''
-                    else:
-                        cleaned[key] = str_value
+                    cleaned[key] = '' if str_value.lower() in NULL_STRINGS else str_value
                 except:
                     cleaned[key] = ''
             
             # Campos numéricos
-            elif key in ['cnpj', 'zipCode', 'employees', 'revenue']:
+            elif key in NUMERIC_TEXT_FIELDS:
                 try:
                     # Manter como string mas limpar
                     cleaned[key] = str(value).strip()
@@ -696,7 +1540,7 @@ class GDRFrameworkV31Enterprise:
                     cleaned[key] = ''
             
             # Campos booleanos
-            elif key in ['active', 'verified', 'claimed']:
+            elif key in BOOLEAN_FIELDS:
                 cleaned[key] = bool(value) if value else False
             
             # Outros campos - manter como estão
@@ -705,146 +1549,229 @@ class GDRFrameworkV31Enterprise:
         
         return cleaned
     
+    def _clean_input_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Versão vetorizada de _validate_and_clean_lead_data, aplicada uma vez
+        por coluna do DataFrame de entrada
+        
+        Args:
+            df: Leads lidos do Excel
+            
+        Returns:
+            Novo DataFrame com os mesmos valores que a limpeza por lead produziria
+        """
+        df = df.copy()
+        
+        for col in df.columns:
+            values = df[col]
+            missing = values.isna()
+            
+            if col in STRING_FIELDS:
+                text = values.astype(str).str.strip()
+                df[col] = text.where(~missing & ~text.str.lower().isin(NULL_STRINGS), '')
+            elif col in NUMERIC_TEXT_FIELDS:
+                df[col] = values.astype(str).str.strip().where(~missing, '')
+            elif col in BOOLEAN_FIELDS:
+                df[col] = values.astype(bool).astype(object).where(~missing, '')
+            elif missing.any():
+                df[col] = values.astype(object).where(~missing, '')
+        
+        return df
+    
     def _preserve_original_data(self, lead_data: Dict) -> Dict:
-        """Preserva dados originais com mapeamento completo"""
+        """
+        Preserva dados originais de um único lead, com as mesmas regras de
+        _preserve_original_dataframe (usado para a planilha inteira)
+        
+        Args:
+            lead_data: Lead de entrada
+            
+        Returns:
+            Dict com os campos original_* como texto ('' para valores vazios)
+        """
         result = {}
+        for field, sources in ORIGINAL_FIELD_SOURCES.items():
+            # Vale a primeira chave existente, mesmo que vazia
+            source = next((key for key in sources if key in lead_data), None)
+            value = ORIGINAL_FIELD_DEFAULTS.get(field, '') if source is None else lead_data[source]
+            result[field] = str(value) if _has_value(value) else ''
+            if field == 'original_nome':
+                result['original_endereco_completo'] = ', '.join(
+                    str(lead_data[key]) for key in ADDRESS_FIELDS if _has_value(lead_data.get(key))
+                )
         
-        # Mapeamento de campos originais
-        field_mappings = {
-            'original_id': lead_data.get('legalDocument', lead_data.get('id', '')),
-            'original_nome': lead_data.get('name', lead_data.get('tradeName', '')),
-            'original_endereco_completo': self._build_full_address(lead_data),
-            'original_telefone': lead_data.get('phone', ''),
-            'original_telefone_place': lead_data.get('placesPhone', ''),
-            'original_website': lead_data.get('website', ''),
-            'original_avaliacao_google': lead_data.get('placesRating', ''),
-            'original_latitude': lead_data.get('placesLat', ''),
-            'original_longitude': lead_data.get('placesLng', ''),
-            'original_place_users': lead_data.get('placesUserRatingsTotal', ''),
-            'original_place_website': lead_data.get('placesWebsite', ''),
-            'original_email': lead_data.get('email', ''),
-            'original_instagram_url': lead_data.get('instagramUrl', ''),
-            'original_facebook_url': lead_data.get('facebookUrl', ''),
-            'city': lead_data.get('city', ''),
-            'state': lead_data.get('state', ''),
-            'country': lead_data.get('country', 'Brasil')
-        }
+        return result
+    
+    def _preserve_original_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Preserva dados originais com mapeamento completo, por colunas
         
-        for field, value in field_mappings.items():
-            result[field] = str(value) if value and pd.notna(value) else ''
+        Args:
+            df: Leads de entrada, um por linha
+            
+        Returns:
+            DataFrame alinhado a df com os campos original_* como texto
+            ('' para valores vazios)
+        """
+        result = pd.DataFrame(index=df.index)
+        
+        for field, sources in ORIGINAL_FIELD_SOURCES.items():
+            # Mesma regra de lead_data.get(a, lead_data.get(b, padrão)): vale a
+            # primeira coluna existente, mesmo que vazia
+            source = next((col for col in sources if col in df.columns), None)
+            if source is None:
+                result[field] = ORIGINAL_FIELD_DEFAULTS.get(field, '')
+            else:
+                result[field] = _text_or_empty(df[source])
         
+        result.insert(2, 'original_endereco_completo', self._build_full_address(df))
         return result
     
-    def _build_full_address(self, lead_data: Dict) -> str:
-        """Constrói endereço completo"""
-        address_parts = []
-        address_fields = ['street', 'number', 'complement', 'district', 'city', 'state', 'country', 'postalCode']
+    def _build_full_address(self, df: pd.DataFrame) -> pd.Series:
+        """Constrói endereço completo de cada lead"""
+        address = pd.Series('', index=df.index, dtype=object)
         
-        for field in address_fields:
-            value = lead_data.get(field)
-            if value and pd.notna(value):
-                address_parts.append(str(value))
+        for field in ADDRESS_FIELDS:
+            if field not in df.columns:
+                continue
+            part = _text_or_empty(df[field]).astype(object)
+            separator = np.where((address != '') & (part != ''), ', ', '')
+            address = address + separator + part
         
-        return ', '.join(address_parts) if address_parts else ''
+        return address
     
     def _consolidate_contacts(self, data: Dict) -> Dict:
-        """Consolida contatos de todas as fontes com priorização"""
-        result = {}
-        
-        # Emails com priorização
-        emails = [
-            data.get('original_email'),
-            data.get('gdr_website_emails'),  # Do website scraper
-            data.get('gdr_google_search_email'),  # Do Google search
-            data.get('gdr_facebook_email'),  # Do Facebook
-            data.get('gdr_instagram_business_email'),  # Do Instagram
-            data.get('gdr_instagram_public_email')  # Do Instagram
-        ]
+        """
+        Consolida contatos de um único lead com priorização, com as mesmas
+        regras de _consolidate_contacts_dataframe (usado no batch)
         
-        # Processar lista de emails (pode ser string ou lista)
-        all_emails = []
-        for email_source in emails:
-            if email_source:
-                if isinstance(email_source, list):
-                    all_emails.extend(email_source)
-                elif isinstance(email_source, str) and '@' in email_source:
-                    all_emails.append(email_source)
-        
-        # Filtrar emails válidos
-        valid_emails = [e for e in all_emails if e and '@' in str(e) and '.' in str(e)]
-        result['gdr_consolidated_email'] = valid_emails[0] if valid_emails else ''
-        
-        # Telefones
-        phones = [
-            data.get('original_telefone'),
-            data.get('original_telefone_place'),
-            data.get('gdr_website_phones'),  # Do website scraper
-            data.get('gdr_google_search_phone'),  # Do Google search
-            data.get('gdr_facebook_phone'),  # Do Facebook
-            data.get('gdr_instagram_contact_phone_number'),  # Do Instagram
-            data.get('gdr_instagram_business_phone_number')  # Do Instagram
-        ]
+        Args:
+            data: Lead com dados originais e dos scrapers
+            
+        Returns:
+            Dict com os campos gdr_consolidated_*
+        """
+        result = {}
         
-        # Processar lista de telefones
-        all_phones = []
-        for phone_source in phones:
-            if phone_source:
-                if isinstance(phone_source, list):
-                    all_phones.extend(phone_source)
-                elif isinstance(phone_source, str):
-                    all_phones.append(phone_source)
+        # Emails (listas dos scrapers entram item a item)
+        result['gdr_consolidated_email'] = _first_valid_value(
+            data, EMAIL_SOURCES, lambda text: '@' in text and '.' in text, explode_lists=True
+        )
         
-        # Filtrar telefones válidos
-        valid_phones = [p for p in all_phones if p and len(str(p).replace(' ', '').replace('-', '').replace('(', '').replace(')', '')) >= 8]
-        result['gdr_consolidated_phone'] = valid_phones[0] if valid_phones else ''
+        # Telefones com ao menos 8 caracteres sem espaços, hífens e parênteses
+        result['gdr_consolidated_phone'] = _first_valid_value(
+            data, PHONE_SOURCES, lambda text: len(PHONE_SEPARATORS.sub('', text)) >= 8, explode_lists=True
+        )
         
         # Websites/URLs
-        urls = [
-            data.get('original_website'),
-            data.get('original_place_website'),
-            data.get('gdr_website_url'),  # Do website scraper
-            data.get('gdr_google_search_website'),  # Do Google search
-            data.get('gdr_facebook_website'),  # Do Facebook
-            data.get('gdr_instagram_external_url')  # Do Instagram
-        ]
-        valid_urls = [u for u in urls if u and ('http' in str(u) or 'www.' in str(u))]
-        result['gdr_consolidated_website'] = valid_urls[0] if valid_urls else ''
+        result['gdr_consolidated_website'] = _first_valid_value(
+            data, URL_SOURCES, lambda text: 'http' in text or 'www.' in text
+        )
         
         # WhatsApp
-        whatsapps = [
-            data.get('gdr_facebook_whatsapp'),
-            data.get('gdr_website_whatsapp'),
-            data.get('gdr_google_search_whatsapp'),
-            data.get('gdr_instagram_whatsapp_number')
-        ]
-        valid_whatsapps = [w for w in whatsapps if w and ('+' in str(w) or len(str(w).replace(' ', '')) >= 10)]
-        result['gdr_consolidated_whatsapp'] = valid_whatsapps[0] if valid_whatsapps else ''
+        whatsapp = _first_valid_value(
+            data, WHATSAPP_SOURCES, lambda text: '+' in text or len(text.replace(' ', '')) >= 10
+        )
         
         # Se não tem WhatsApp mas tem telefone, converter
-        if not result['gdr_consolidated_whatsapp'] and result['gdr_consolidated_phone']:
-            phone = result['gdr_consolidated_phone']
-            numbers = ''.join(filter(str.isdigit, str(phone)))
+        phone = result['gdr_consolidated_phone']
+        if not _has_value(whatsapp) and _has_value(phone):
+            numbers = NON_DIGITS.sub('', str(phone))
             if len(numbers) >= 10:
-                if not numbers.startswith('55'):
-                    result['gdr_consolidated_whatsapp'] = f"+55{numbers}"
-                else:
-                    result['gdr_consolidated_whatsapp'] = f"+{numbers}"
+                whatsapp = f"+{numbers}" if numbers.startswith('55') else f"+55{numbers}"
+        result['gdr_consolidated_whatsapp'] = whatsapp
         
         # Estatísticas de enriquecimento
-        original_fields = [k for k in data.keys() if k.startswith('original_')]
-        enriched_fields = [k for k in data.keys() if k.startswith('gdr_') and not k.startswith('gdr_consolidated')]
+        original_fields, enriched_fields = _enrichment_fields(tuple(data))
         
-        campos_originais = sum(1 for k in original_fields if data.get(k))
-        campos_enriquecidos = sum(1 for k in enriched_fields if data.get(k))
+        campos_originais = sum(1 for key in original_fields if _has_value(data[key]))
+        campos_enriquecidos = sum(1 for key in enriched_fields if _has_value(data[key]))
         
         result['gdr_consolidated_original_count'] = campos_originais
         result['gdr_consolidated_enriched_count'] = campos_enriquecidos
-        result['gdr_consolidated_enrichment_rate'] = (
-            campos_enriquecidos / max(1, campos_originais)
+        result['gdr_consolidated_enrichment_rate'] = campos_enriquecidos / max(1, campos_originais)
+        
+        return result
+    
+    def _consolidate_contacts_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Consolida contatos de todas as fontes com priorização, por colunas
+        
+        Args:
+            df: Leads com dados originais e dos scrapers, um por linha
+            
+        Returns:
+            DataFrame alinhado a df com os campos gdr_consolidated_*
+        """
+        result = pd.DataFrame(index=df.index)
+        
+        # Emails (listas dos scrapers entram item a item)
+        result['gdr_consolidated_email'] = _first_valid_contact(
+            df, EMAIL_SOURCES,
+            lambda text: text.str.contains('@', regex=False) & text.str.contains('.', regex=False),
+            explode_lists=True
+        )
+        
+        # Telefones com ao menos 8 caracteres sem espaços, hífens e parênteses
+        result['gdr_consolidated_phone'] = _first_valid_contact(
+            df, PHONE_SOURCES,
+            lambda text: text.str.len().sub(text.str.count(PHONE_SEPARATORS)).ge(8),
+            explode_lists=True
+        )
+        
+        # Websites/URLs
+        result['gdr_consolidated_website'] = _first_valid_contact(
+            df, URL_SOURCES,
+            lambda text: text.str.contains('http', regex=False) | text.str.contains('www.', regex=False)
+        )
+        
+        # WhatsApp
+        whatsapp = _first_valid_contact(
+            df, WHATSAPP_SOURCES,
+            lambda text: text.str.contains('+', regex=False) | text.str.len().sub(text.str.count(' ')).ge(10)
         )
         
+        # Se não tem WhatsApp mas tem telefone, converter
+        phone = result['gdr_consolidated_phone']
+        numbers = phone.astype(str).str.replace(NON_DIGITS, '', regex=True)
+        from_phone = ~_truthy(whatsapp) & _truthy(phone) & numbers.str.len().ge(10)
+        whatsapp = whatsapp.mask(from_phone, np.where(numbers.str.startswith('55'), '+' + numbers, '+55' + numbers))
+        result['gdr_consolidated_whatsapp'] = whatsapp
+        
+        # Estatísticas de enriquecimento
+        original_fields, enriched_fields = _enrichment_fields(tuple(df.columns))
+        
+        campos_originais = _truthy(df[list(original_fields)]).sum(axis=1).astype(int)
+        campos_enriquecidos = _truthy(df[list(enriched_fields)]).sum(axis=1).astype(int)
+        
+        result['gdr_consolidated_original_count'] = campos_originais
+        result['gdr_consolidated_enriched_count'] = campos_enriquecidos
+        result['gdr_consolidated_enrichment_rate'] = campos_enriquecidos / campos_originais.clip(lower=1)
+        
         return result
     
+    def _consolidate_batch_results(self, batch_results: List[Dict]):
+        """
+        Consolida os contatos dos leads novos do batch numa única passada por
+        colunas e grava os campos gdr_consolidated_* nos dicts
+        
+        Args:
+            batch_results: Resultados do batch; leads do cache e com erro
+                ficam como estão
+        """
+        to_consolidate = [
+            result for result in batch_results
+            if result.get('processing_status') == 'completed'
+            and not result.get('from_cache') and 'gdr_consolidated_email' not in result
+        ]
+        if not to_consolidate:
+            return
+        
+        logger.info(f"Consolidando contatos de {len(to_consolidate)} leads...")
+        consolidated = self._consolidate_contacts_dataframe(pd.DataFrame(to_consolidate))
+        for result, row in zip(to_consolidate, consolidated.to_dict(orient='records')):
+            result.update(row)
+    
     def _prepare_enriched_context(self, data: Dict) -> Dict:
         """Prepara contexto enriquecido para análise LLM"""
         return {
@@ -871,198 +1798,283 @@ class GDRFrameworkV31Enterprise:
     def _track_llm_usage(self, llm_results: Dict):
         """Rastreia uso de LLMs para estatísticas"""
         for field_name, result in llm_results.items():
-            if 'gdr_llm_' in field_name and result:
-                # Extrair provider do nome do campo
-                parts = field_name.split('_')
-                if len(parts) >= 3:
-                    provider = parts[2]  # openai, claude, etc
-                    
-                    if provider not in self.processing_stats['llm_performance']:
-                        self.processing_stats['llm_performance'][provider] = {
-                            'successful': 0,
-                            'failed': 0,
-                            'total_responses': 0
-                        }
-                    
-                    self.processing_stats['llm_performance'][provider]['total_responses'] += 1
-                    if result and result != 'Análise em processamento':
-                        self.processing_stats['llm_performance'][provider]['successful'] += 1
-                    else:
-                        self.processing_stats['llm_performance'][provider]['failed'] += 1
+            if not result:
+                continue
+            # Extrair provider do nome do campo (openai, claude, etc)
+            match = LLM_FIELD_PATTERN.match(field_name)
+            if not match:
+                continue
+            
+            counts = self.processing_stats.llm_performance[match.group(1)]
+            counts['total_responses'] += 1
+            if result != 'Análise em processamento':
+                counts['successful'] += 1
+            else:
+                counts['failed'] += 1
     
-    def _save_checkpoint(self, results: List[Dict], batch_num: int):
-        """Salva checkpoint do processamento"""
-        checkpoint_file = self.checkpoint_dir / f"checkpoint_batch_{batch_num}.json"
-        
-        checkpoint_data = {
-            'batch_number': batch_num,
-            'total_processed': len(results),
-            'timestamp': datetime.now().isoformat(),
-            'results': results[-10:] if len(results) > 10 else results,  # Últimos 10 para economizar espaço
-            'stats': self.processing_stats
-        }
+    def _get_lead_id(self, lead_data: Dict) -> str:
+        """Identificador do lead usado no cache e nos checkpoints (dados já limpos)"""
+        lead_name = lead_data.get('name', lead_data.get('tradeName', 'Lead'))
+        # Garantir que lead_id seja sempre string para consistência no cache
+        return str(lead_data.get('id', lead_data.get('cnpj', lead_name)))
+    
+    def _load_checkpoint(self, checkpoint_file: Path) -> List[Dict]:
+        """
+        Lê os leads já concluídos de um checkpoint JSONL; leads com erro
+        ficam de fora para serem reprocessados na retomada
         
+        Args:
+            checkpoint_file: Arquivo JSONL da execução
+            
+        Returns:
+            Lista de {'lead_id', 'batch_number', 'result'} (vazia se não houver checkpoint)
+        """
+        if not checkpoint_file.exists():
+            return []
+        
+        entries = []
+        with open(checkpoint_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha truncada por uma interrupção durante a escrita
+                    logger.warning(f"Linha inválida ignorada no checkpoint {checkpoint_file}")
+                    continue
+                if entry['result'].get('processing_status') != 'error':
+                    entries.append(entry)
+        return entries
+    
+    async def _checkpoint_writer(self, queue: asyncio.Queue):
+        """
+        Consumidor único da fila de checkpoints: grava cada batch em uma
+        thread, na ordem em que foram enfileirados
+        
+        Args:
+            queue: Fila de (batch_records, batch_results, batch_num); None encerra
+        """
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            await asyncio.to_thread(self._save_checkpoint, *item)
+    
+    def _save_checkpoint(self, batch_records: List[Dict], batch_results: List[Dict], batch_num: int):
+        """Acrescenta os resultados do batch ao checkpoint JSONL (append-only)"""
         try:
-            with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(checkpoint_data, f, ensure_ascii=False, indent=2)
-            logger.info(f"Checkpoint salvo: {checkpoint_file}")
+            self._checkpoint_fp.write(b''.join(
+                _checkpoint_line({
+                    'lead_id': self._get_lead_id(lead_data),
+                    'batch_number': batch_num,
+                    'result': result
+                })
+                for lead_data, result in zip(batch_records, batch_results)
+            ))
+            self._checkpoint_fp.flush()
+            os.fsync(self._checkpoint_fp.fileno())
+            logger.info(f"Checkpoint salvo: {self._checkpoint_fp.name} (+{len(batch_results)} leads)")
         except Exception as e:
             logger.error(f"Erro ao salvar checkpoint: {e}")
     
-    def _create_error_result(self, lead_data: Dict, error_message: str) -> Dict:
-        """Cria resultado de erro para um lead que falhou"""
-        result = self._preserve_original_data(lead_data)
-        result.update({
-            'processing_status': 'error',
-            'error_message': error_message,
-            'processing_timestamp': datetime.now().isoformat(),
-            'framework_version': 'v3.1-enterprise',
-            'gdr_quality_overall_score': 0,
-            'gdr_consenso_email': '',
-            'gdr_consenso_telefone': '',
-            'gdr_consenso_whatsapp': '',
-            'gdr_consenso_url': ''
-        })
+    def _create_error_result(self, lead_data: Dict, error_message: str,
+                             original: Optional[Dict] = None) -> Dict:
+        """
+        Cria resultado de erro para um lead que falhou
+        
+        Args:
+            lead_data: Dados do lead
+            error_message: Mensagem de erro
+            original: Dados originais já preservados em lote; None preserva a
+                partir de lead_data
+        """
+        result = dict(original) if original is not None else self._preserve_original_data(lead_data)
+        result.update(ERROR_RESULT_FIELDS)
+        result['error_message'] = error_message
+        result['processing_timestamp'] = _timestamp()
         return result
     
-    def _order_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Ordena colunas do DataFrame conforme schema"""
-        ordered_columns = []
-        
-        # 1. Campos originais
-        original_fields = [
-            'original_id', 'original_nome', 'original_endereco_completo',
-            'original_telefone', 'original_telefone_place', 'original_website',
-            'original_avaliacao_google', 'original_latitude', 'original_longitude',
-            'original_place_users', 'original_place_website', 'original_email',
-            'original_instagram_url', 'original_facebook_url', 'city', 'state', 'country'
-        ]
-        ordered_columns.extend([col for col in original_fields if col in df.columns])
-        
-        # 2. Scrapers (Instagram, Facebook, Website, etc.)
-        scraper_prefixes = ['gdr_instagram_', 'gdr_facebook_', 'gdr_linktree_', 'gdr_cwral4ai_', 'gdr_google_search_']
-        for prefix in scraper_prefixes:
-            scraper_cols = [col for col in df.columns if col.startswith(prefix)]
-            scraper_cols.sort()
-            ordered_columns.extend(scraper_cols)
-        
-        # 3. Consenso
-        consenso_cols = [col for col in df.columns if col.startswith('gdr_consenso_')]
-        consenso_cols.sort()
-        ordered_columns.extend(consenso_cols)
-        
-        # 4. LLM analyses
-        llm_cols = [col for col in df.columns if col.startswith('gdr_llm_')]
-        llm_cols.sort()
-        ordered_columns.extend(llm_cols)
-        
-        # 5. Quality metrics
-        quality_cols = [col for col in df.columns if col.startswith('gdr_quality_')]
-        quality_cols.sort()
-        ordered_columns.extend(quality_cols)
-        
-        # 6. Metadados
-        meta_fields = [
-            'processing_time_seconds', 'processing_timestamp', 'processing_status',
-            'framework_version', 'scrapers_used', 'scrapers_successful', 'scrapers_failed', 'scrapers_retried'
-        ]
-        ordered_columns.extend([col for col in meta_fields if col in df.columns])
+    def _write_results(self, results_df: pd.DataFrame, output_file: str) -> List[Path]:
+        """
+        Salva os resultados em Parquet (saída canônica, mantém listas como
+        tipos nativos) ou Feather e, se output_file for uma planilha, também
+        em Excel
         
-        # 7. Campos restantes
-        remaining_cols = [col for col in df.columns if col not in ordered_columns]
-        ordered_columns.extend(remaining_cols)
+        Args:
+            results_df: Resultados com colunas ordenadas
+            output_file: Arquivo de saída (.feather grava Feather; .xlsx gera
+                também o .parquet ao lado; demais extensões gravam .parquet)
+            
+        Returns:
+            Arquivos gravados
+        """
+        output_path = Path(output_file)
+        suffix = output_path.suffix.lower()
+        written = []
+        
+        if PYARROW_AVAILABLE:
+            table = self._to_arrow_table(results_df)
+            if suffix == '.feather':
+                logger.info(f"\nSalvando resultados em: {output_path}")
+                feather.write_feather(table, output_path, compression='zstd',
+                                      compression_level=ZSTD_COMPRESSION_LEVEL)
+                written.append(output_path)
+            else:
+                parquet_path = output_path.with_suffix('.parquet')
+                logger.info(f"\nSalvando resultados em: {parquet_path}")
+                pq.write_table(table, parquet_path, compression='zstd',
+                               compression_level=ZSTD_COMPRESSION_LEVEL)
+                written.append(parquet_path)
+        
+        if suffix in EXCEL_SUFFIXES or not PYARROW_AVAILABLE:
+            excel_path = output_path if suffix in EXCEL_SUFFIXES else output_path.with_suffix('.xlsx')
+            logger.info(f"Salvando planilha em: {excel_path}")
+            self._serialize_json_columns(results_df).to_excel(excel_path, index=False, engine='xlsxwriter')
+            written.append(excel_path)
+        
+        return written
+    
+    def _to_arrow_table(self, df: pd.DataFrame) -> 'pa.Table':
+        """
+        Converte os resultados para Arrow, serializando como texto apenas as
+        colunas com tipos misturados (ex.: listas novas e texto JSON vindo de
+        caches antigos)
+        
+        Args:
+            df: Resultados
+            
+        Returns:
+            Tabela Arrow
+        """
+        try:
+            return pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass
         
-        return df[ordered_columns]
+        df = df.copy()
+        for col in df.columns:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                values = df[col].map(_json_cell)
+                df[col] = values.where(values.isna(), values.astype(str))
+        return pa.Table.from_pandas(df, preserve_index=False)
+    
+    def _serialize_json_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converte as colunas de listas (JSON_LIST_COLUMNS) em texto JSON para
+        formatos sem tipos aninhados, como o Excel
+        
+        Args:
+            df: Resultados com listas Python nas colunas de qualidade
+            
+        Returns:
+            Cópia do DataFrame com essas colunas em texto JSON
+        """
+        df = df.copy()
+        for col in JSON_LIST_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].map(_json_cell)
+        return df
+    
+    def _order_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Ordena colunas do DataFrame conforme schema (_output_column_order)"""
+        return df.reindex(columns=list(_output_column_order(tuple(df.columns))))
     
     def _generate_final_report(self, results_df: pd.DataFrame, cost_estimates: Dict, batch_quality: Dict):
-        """Gera relatório final completo"""
-        print("\n" + "="*100)
-        print(" RELATÓRIO FINAL - GDR FRAMEWORK V3.1 ENTERPRISE ".center(100))
-        print("="*100)
+        """Gera relatório final completo (montado em memória e escrito de uma vez)"""
+        report = io.StringIO()
+        print("\n" + "="*100, file=report)
+        print(" RELATÓRIO FINAL - GDR FRAMEWORK V3.1 ENTERPRISE ".center(100), file=report)
+        print("="*100, file=report)
         
         # Resumo geral
         total_leads = len(results_df)
         successful = (results_df['processing_status'] == 'completed').sum()
         failed = total_leads - successful
         
-        print(f"\n[STATS] RESUMO GERAL:")
-        print(f"  • Total de leads processados: {total_leads:,}")
-        print(f"  • Sucessos: {successful:,} ({(successful/total_leads)*100:.1f}%)")
-        print(f"  • Falhas: {failed:,} ({(failed/total_leads)*100:.1f}%)")
-        print(f"  • Tempo total: {self.processing_stats['total_time']/60:.1f} minutos")
-        print(f"  • Tempo médio por lead: {self.processing_stats['average_time_per_lead']:.1f}s")
+        print(f"\n[STATS] RESUMO GERAL:", file=report)
+        print(f"  • Total de leads processados: {total_leads:,}", file=report)
+        print(f"  • Sucessos: {successful:,} ({(successful/total_leads)*100:.1f}%)", file=report)
+        print(f"  • Falhas: {failed:,} ({(failed/total_leads)*100:.1f}%)", file=report)
+        print(f"  • Tempo total: {self.processing_stats.total_time/60:.1f} minutos", file=report)
+        print(f"  • Tempo médio por lead: {self.processing_stats.average_time_per_lead:.1f}s", file=report)
         
         # Performance de scrapers
-        print(f"\n🔧 PERFORMANCE DOS SCRAPERS:")
-        scraper_stats = {}
+        print(f"\n🔧 PERFORMANCE DOS SCRAPERS:", file=report)
+        # Coluna representativa de cada scraper (a última que casar) e uma
+        # única comparação/soma sobre todas elas
+        scraper_columns = {}
         for col in results_df.columns:
-            if col.startswith('gdr_instagram_') and col.endswith('_id'):
-                scraper_stats['Instagram'] = (results_df[col] != '').sum()
-            elif col.startswith('gdr_facebook_') and col.endswith('_url'):
-                scraper_stats['Facebook'] = (results_df[col] != '').sum()
-            elif col.startswith('gdr_cwral4ai_') and col.endswith('_email'):
-                scraper_stats['Website'] = (results_df[col] != '').sum()
+            for scraper, prefix, suffix in REPORT_SCRAPER_COLUMNS:
+                if col.startswith(prefix) and col.endswith(suffix):
+                    scraper_columns[scraper] = col
+                    break
+        filled = results_df[list(scraper_columns.values())].ne('').sum()
+        scraper_stats = {scraper: filled[col] for scraper, col in scraper_columns.items()}
         
         for scraper, success_count in scraper_stats.items():
             rate = (success_count / total_leads) * 100
             status = "✓" if rate >= 50 else "⚠" if rate >= 25 else "✗"
-            print(f"  {status} {scraper}: {success_count}/{total_leads} ({rate:.1f}%)")
+            print(f"  {status} {scraper}: {success_count}/{total_leads} ({rate:.1f}%)", file=report)
         
         # Performance de LLMs
-        print(f"\n🤖 PERFORMANCE DOS LLMs:")
-        for llm, stats in self.processing_stats.get('llm_performance', {}).items():
+        print(f"\n🤖 PERFORMANCE DOS LLMs:", file=report)
+        for llm, stats in self.processing_stats.llm_performance.items():
             total = stats['total_responses']
             success = stats['successful']
             rate = (success / total) * 100 if total > 0 else 0
             status = "✓" if rate >= 90 else "⚠" if rate >= 70 else "✗"
-            print(f"  {status} {llm.upper()}: {success}/{total} ({rate:.1f}%)")
+            print(f"  {status} {llm.upper()}: {success}/{total} ({rate:.1f}%)", file=report)
         
         # Qualidade dos dados
-        print(f"\n📈 QUALIDADE DOS DADOS:")
+        print(f"\n📈 QUALIDADE DOS DADOS:", file=report)
         avg_quality = batch_quality.get('average_score', 0)
         distribution = batch_quality.get('distribution', {})
-        print(f"  • Score médio de qualidade: {avg_quality:.1f}/100")
-        print(f"  • Excelente (≥90): {distribution.get('excellent', 0)} leads")
-        print(f"  • Boa (75-89): {distribution.get('good', 0)} leads")
-        print(f"  • Regular (60-74): {distribution.get('fair', 0)} leads")
-        print(f"  • Ruim (40-59): {distribution.get('poor', 0)} leads")
-        print(f"  • Crítica (<40): {distribution.get('critical', 0)} leads")
+        print(f"  • Score médio de qualidade: {avg_quality:.1f}/100", file=report)
+        print(f"  • Excelente (≥90): {distribution.get('excellent', 0)} leads", file=report)
+        print(f"  • Boa (75-89): {distribution.get('good', 0)} leads", file=report)
+        print(f"  • Regular (60-74): {distribution.get('fair', 0)} leads", file=report)
+        print(f"  • Ruim (40-59): {distribution.get('poor', 0)} leads", file=report)
+        print(f"  • Crítica (<40): {distribution.get('critical', 0)} leads", file=report)
         
         # Consolidação de contatos
-        print(f"\n📞 CONSOLIDAÇÃO DE CONTATOS:")
+        print(f"\n📞 CONSOLIDAÇÃO DE CONTATOS:", file=report)
         if 'gdr_consenso_email' in results_df.columns:
             emails = (results_df['gdr_consenso_email'] != '').sum()
             phones = (results_df['gdr_consenso_telefone'] != '').sum()
             whatsapps = (results_df['gdr_consenso_whatsapp'] != '').sum()
             websites = (results_df['gdr_consenso_url'] != '').sum()
             
-            print(f"  • Emails encontrados: {emails}/{total_leads} ({(emails/total_leads)*100:.1f}%)")
-            print(f"  • Telefones encontrados: {phones}/{total_leads} ({(phones/total_leads)*100:.1f}%)")
-            print(f"  • WhatsApps encontrados: {whatsapps}/{total_leads} ({(whatsapps/total_leads)*100:.1f}%)")
-            print(f"  • Websites encontrados: {websites}/{total_leads} ({(websites/total_leads)*100:.1f}%)")
+            print(f"  • Emails encontrados: {emails}/{total_leads} ({(emails/total_leads)*100:.1f}%)", file=report)
+            print(f"  • Telefones encontrados: {phones}/{total_leads} ({(phones/total_leads)*100:.1f}%)", file=report)
+            print(f"  • WhatsApps encontrados: {whatsapps}/{total_leads} ({(whatsapps/total_leads)*100:.1f}%)", file=report)
+            print(f"  • Websites encontrados: {websites}/{total_leads} ({(websites/total_leads)*100:.1f}%)", file=report)
         
         # Custos reais vs estimados
-        print(f"\n[$$] ANALISE DE CUSTOS:")
-        print(f"  • Custo estimado: {self.token_estimator.format_cost(cost_estimates['total_cost'])}")
-        print(f"  • Custo por lead: {self.token_estimator.format_cost(cost_estimates['cost_per_lead'])}")
+        print(f"\n[$$] ANALISE DE CUSTOS:", file=report)
+        print(f"  • Custo estimado: {self.token_estimator.format_cost(cost_estimates['total_cost'])}", file=report)
+        print(f"  • Custo por lead: {self.token_estimator.format_cost(cost_estimates['cost_per_lead'])}", file=report)
         
         # Issues mais comuns
         common_issues = batch_quality.get('common_issues', [])[:5]
         if common_issues:
-            print(f"\n[!] ISSUES MAIS COMUNS:")
+            print(f"\n[!] ISSUES MAIS COMUNS:", file=report)
             for i, (issue, count) in enumerate(common_issues, 1):
-                print(f"  {i}. {issue} ({count} leads)")
+                print(f"  {i}. {issue} ({count} leads)", file=report)
         
         # Sugestões de melhoria
         top_suggestions = batch_quality.get('top_suggestions', [])[:3]
         if top_suggestions:
-            print(f"\n💡 PRINCIPAIS SUGESTÕES:")
+            print(f"\n💡 PRINCIPAIS SUGESTÕES:", file=report)
             for i, (suggestion, count) in enumerate(top_suggestions, 1):
-                print(f"  {i}. {suggestion}")
+                print(f"  {i}. {suggestion}", file=report)
+        
+        print("\n" + "="*100, file=report)
+        print(" PROCESSAMENTO CONCLUÍDO COM SUCESSO ".center(100), file=report)
+        print("="*100, file=report)
         
-        print("\n" + "="*100)
-        print(" PROCESSAMENTO CONCLUÍDO COM SUCESSO ".center(100))
-        print("="*100)
+        sys.stdout.write(report.getvalue())
+        sys.stdout.flush()
 
 
 async def main():
@@ -1070,13 +2082,32 @@ async def main():
     parser = argparse.ArgumentParser(description='GDR Framework V3.1 Enterprise')
     parser.add_argument('--input', type=str, default='data/input/leads.xlsx',
                        help='Arquivo de entrada com leads')
-    parser.add_argument('--output', type=str, help='Arquivo de saída (opcional)')
+    parser.add_argument('--output', type=str, help='Arquivo de saída (opcional; repetir o mesmo arquivo retoma uma execução interrompida)')
+    parser.add_argument('--excel-engine', choices=EXCEL_ENGINES, default=DEFAULT_EXCEL_ENGINE,
+                       help=f'Engine de leitura da planilha de entrada (padrão: {DEFAULT_EXCEL_ENGINE})')
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default=DEFAULT_OUTPUT_FORMAT,
+                       help=f'Formato da saída quando --output não é informado (padrão: {DEFAULT_OUTPUT_FORMAT}; '
+                            'xlsx grava também o .parquet)')
     parser.add_argument('--batch-size', type=int, default=10,
                        help='Tamanho do batch (padrão: 10)')
     parser.add_argument('--max-leads', type=int, default=75,
                        help='Máximo de leads para processar (padrão: 75)')
     parser.add_argument('--estimate-only', action='store_true',
                        help='Apenas estimar custos sem processar')
+    parser.add_argument('--batch-mode', action='store_true',
+                       help='Análises LLM via APIs de lote OpenAI/Anthropic (50%% mais barato, até 24h)')
+    parser.add_argument('--semantic-cache', action='store_true',
+                       help='Reaproveitar respostas LLM de prompts similares (requer .[semantic-cache])')
+    parser.add_argument('--redis-url', type=str, default=os.getenv('REDIS_URL'),
+                       help='Redis para compartilhar respostas LLM entre workers (padrão: REDIS_URL; requer .[redis])')
+    parser.add_argument('--max-cache-rows', type=int, default=None,
+                       help='Limite de leads no cache DuckDB, aplicado após cada batch (padrão: MAX_CACHE_ROWS; 0 = sem limite)')
+    parser.add_argument('--stop-on-consensus', action='store_true',
+                       help='Cancelar os LLMs restantes de um lead quando a maioria já concorda')
+    parser.add_argument('--yes', '-y', action='store_true',
+                       help='Não pedir confirmação quando o custo estimado passar de --max-cost')
+    parser.add_argument('--max-cost', type=float, default=10.0,
+                       help='Custo estimado (USD) acima do qual é pedida confirmação (padrão: 10)')
     
     args = parser.parse_args()
     
@@ -1092,7 +2123,7 @@ async def main():
     output_file = args.output
     if not output_file and not args.estimate_only:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = f"outputs/gdr_v31_enterprise_{timestamp}.xlsx"
+        output_file = f"outputs/gdr_v31_enterprise_{timestamp}{OUTPUT_FORMATS[args.format]}"
     
     print("\n" + "="*100)
     print(" GDR FRAMEWORK V3.1 ENTERPRISE ".center(100))
@@ -1104,6 +2135,7 @@ async def main():
     print(f"[BATCH] Batch size: {args.batch_size}")
     print(f"[MAX] Maximo de leads: {args.max_leads}")
     print(f"[MODE] Modo: {'Estimativa apenas' if args.estimate_only else 'Processamento completo'}")
+    print(f"[LLM] Analise LLM: {'APIs de lote (OpenAI/Anthropic)' if args.batch_mode else 'Online'}")
     
     print(f"\n[>>] RECURSOS ATIVADOS:")
     print(f"  [OK] Multi-LLM (OpenAI, Claude, Gemini, DeepSeek, ZhipuAI)")
@@ -1118,7 +2150,10 @@ async def main():
     
     try:
         # Inicializar framework
-        framework = GDRFrameworkV31Enterprise()
+        framework = GDRFrameworkV31Enterprise(semantic_cache=args.semantic_cache,
+                                              stop_on_consensus=args.stop_on_consensus,
+                                              redis_url=args.redis_url,
+                                              max_cache_rows=args.max_cache_rows)
         
         # Executar processamento
         await framework.process_batch(
@@ -1126,12 +2161,18 @@ async def main():
             output_file=output_file,
             batch_size=args.batch_size,
             max_leads=args.max_leads,
-            estimate_only=args.estimate_only
+            estimate_only=args.estimate_only,
+            batch_mode=args.batch_mode,
+            auto_confirm=args.yes,
+            max_cost_usd=args.max_cost,
+            excel_engine=args.excel_engine
         )
         
         if not args.estimate_only:
             print(f"\n[OK] PROCESSAMENTO CONCLUIDO!")
-            print(f"[FILE] Resultados salvos em: {output_file}")
+            also_parquet = PYARROW_AVAILABLE and Path(output_file).suffix.lower() in EXCEL_SUFFIXES
+            print(f"[FILE] Resultados salvos em: {output_file}"
+                  f"{' (+ .parquet)' if also_parquet else ''}")
             print(f"[LOG] Logs disponiveis em: gdr_v3_1_enterprise.log")
             print(f"💾 Checkpoints salvos em: gdr_checkpoints_v31/")
     
@@ -1147,8 +2188,7 @@ async def main():
     finally:
         # Fechar sessões
         try:
-            if hasattr(framework, 'llm_analyzer'):
-                await framework.llm_analyzer.close_session()
+            await framework.close()
         except:
             pass
 
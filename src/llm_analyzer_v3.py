@@ -5,23 +5,414 @@ Inclui: OpenAI, Claude (Anthropic), Gemini, DeepSeek, ZhipuAI (GLM-4.5)
 """
 
 import os
+import re
 import json
 import logging
 import asyncio
 import aiohttp
-from typing import Dict, List, Any, Optional
+import xxhash
+import numpy as np
+from asyncio_throttle import Throttler
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Any, Optional
 import hashlib
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson não disponível - usando json da stdlib nas requisições LLM")
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logger.warning("numba não disponível - consenso de scores calculado com NumPy")
+
+# Sequências de espaços em branco (normalização da chave de prompt)
+WHITESPACE = re.compile(r'\s+')
+
+# Linha do contexto do lead com o nome da empresa (ignorada no cache semântico)
+COMPANY_LINE = re.compile(r'^Empresa: (.*)$', re.MULTILINE)
+
+def _dumps(obj: Any) -> bytes:
+    """Serializa para JSON (UTF-8) com orjson quando disponível (json como fallback)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data: Any) -> Any:
+    """Desserializa JSON com orjson quando disponível (json como fallback)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Pool de conexões da sessão HTTP compartilhada pelo processo (reaproveitado
+# entre leads, batches e instâncias do analisador)
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 20
+DNS_CACHE_TTL = 300  # segundos
+KEEPALIVE_TIMEOUT = 60  # segundos
+
+_shared_session: Optional[aiohttp.ClientSession] = None
+_session_lock: Optional[asyncio.Lock] = None
+
+
+async def get_shared_session() -> aiohttp.ClientSession:
+    """
+    Sessão HTTP dos providers de LLM, única no processo; criada na primeira
+    chamada (ou após close_shared_session)
+    
+    Returns:
+        ClientSession com pool de conexões e cache de DNS
+    """
+    global _shared_session, _session_lock
+    if _session_lock is None:
+        _session_lock = asyncio.Lock()
+    async with _session_lock:
+        if _shared_session is None or _shared_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTION_LIMIT,
+                limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True
+            )
+            _shared_session = aiohttp.ClientSession(connector=connector)
+        return _shared_session
+
+
+async def close_shared_session():
+    """Fecha a sessão HTTP compartilhada (encerramento da aplicação)"""
+    global _shared_session, _session_lock
+    if _shared_session is not None:
+        await _shared_session.close()
+    _shared_session = None
+    _session_lock = None
+
+
+async def gather_settled(aws) -> List[Any]:
+    """
+    Executa as corrotinas concorrentemente e devolve o resultado ou a exceção
+    de cada uma, na ordem recebida (como gather com return_exceptions=True)
+    
+    Se a chamada for cancelada, as tarefas pendentes são canceladas junto e
+    o CancelledError se propaga. Uma tarefa cancelada isoladamente vira uma
+    instância de CancelledError no resultado: como não é Exception desde o
+    Python 3.8, os chamadores verificam isinstance(..., BaseException)
+    
+    Args:
+        aws: Corrotinas ou futures
+        
+    Returns:
+        Resultado ou exceção de cada tarefa
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    if not tasks:
+        return []
+    try:
+        await asyncio.wait(tasks)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    return [task_outcome(task) for task in tasks]
+
+
+def task_outcome(task: asyncio.Future) -> Any:
+    """Resultado ou exceção de uma tarefa concluída (CancelledError se cancelada)"""
+    if task.cancelled():
+        return asyncio.CancelledError()
+    return task.exception() or task.result()
+
+
+class _RequestAbandoned(Exception):
+    """A chamada líder de um prompt em andamento foi cancelada (ver _call_llm)"""
+
+
+class LLMAPIError(Exception):
+    """Resposta de erro (status HTTP diferente de 200) da API de um provider"""
+    
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+# Score de consenso quando nenhum provider retornou um número
+DEFAULT_CONSENSUS_SCORE = "50"
+
+# Análises de resposta categórica: voto por contagem de ids inteiros em vez
+# de Counter sobre as strings
+CATEGORY_IDS = {
+    'potencial_geomarkenting_categoria': {'ALTO': 0, 'MÉDIO': 1, 'BAIXO': 2},
+}
+
+# Análises de resposta numérica (0-100)
+NUMERIC_ANALYSES = frozenset({'synergy_score_categoria'})
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, parallel=True)
+    def _consensus_scores_batch(scores: np.ndarray) -> np.ndarray:
+        """
+        Média dos scores numéricos de cada lead (linhas: leads, colunas:
+        providers; NaN = sem score numérico); NaN se o lead não tem nenhum
+        """
+        means = np.empty(scores.shape[0], dtype=np.float64)
+        for i in prange(scores.shape[0]):
+            total = 0.0
+            count = 0
+            for j in range(scores.shape[1]):
+                if not np.isnan(scores[i, j]):
+                    total += scores[i, j]
+                    count += 1
+            means[i] = total / count if count else np.nan
+        return means
+else:
+    def _consensus_scores_batch(scores: np.ndarray) -> np.ndarray:
+        """
+        Média dos scores numéricos de cada lead (linhas: leads, colunas:
+        providers; NaN = sem score numérico); NaN se o lead não tem nenhum
+        """
+        valid = ~np.isnan(scores)
+        counts = valid.sum(axis=1)
+        totals = np.where(valid, scores, 0.0).sum(axis=1)
+        return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+
+def _score_value(value: Any) -> float:
+    """Score de um provider como float (NaN se a resposta não é um número inteiro)"""
+    if isinstance(value, str) and value.isdigit():
+        return float(value)
+    return np.nan
+
 
 class LLMAnalyzerV3:
     """Sistema Multi-LLM com 5 providers"""
     
-    def __init__(self):
+    # Instrução estática enviada primeiro em todas as chamadas; os dados do lead
+    # vão depois, na mensagem do usuário, para que o prefixo seja idêntico entre
+    # chamadas e aproveite o cache de prompt dos providers
+    SYSTEM_PROMPT = (
+        'Você é um analista de negócios especializado em análise de dados empresariais. '
+        'Responda de forma objetiva, em no máximo 3 linhas, exceto quando a instrução '
+        'pedir uma lista JSON, uma categoria ou um número.'
+    )
+    
+    # Separa o contexto do lead (comum às análises do lead) da pergunta; no
+    # Claude o contexto vira um bloco próprio marcado para cache
+    CONTEXT_SEPARATOR = '\n\n---\n\n'
+    
+    # Templates dos prompts (placeholders preenchidos por _prompt_context)
+    LEAD_CONTEXT_TEMPLATE = (
+        "Dados do lead:\n"
+        "Empresa: {company}\n"
+        "Localização: {location}\n"
+        "Endereço: {address}\n"
+        "Categoria: {category}"
+    )
+    PROMPT_TEMPLATES = {
+        'resumo_qualitativo_reviews_google_place': (
+            "Analise os reviews e avaliações da empresa.\n"
+            "Com base nos dados disponíveis: {rating} estrelas,\n"
+            "{ratings_total} avaliações.\n"
+            "Crie um resumo qualitativo identificando pontos fortes e fracos."
+        ),
+        'analise_localização_google_place': (
+            "Analise a localização da empresa no endereço informado.\n"
+            "Avalie o potencial da localização para o negócio."
+        ),
+        'analise_fluxo_pessoas_comercio': (
+            "Estime o fluxo de pessoas na região da empresa.\n"
+            "Tipo de negócio: {place_types}\n"
+            "Forneça estimativa com justificativa."
+        ),
+        'concorrentes_buffer_500m': (
+            "Liste 3-5 possíveis concorrentes da empresa num raio de 500m.\n"
+            "Segmento: {segment}\n"
+            "Retorne APENAS uma lista JSON de nomes.\n"
+            'Exemplo: ["Loja A", "Empresa B", "Negócio C"]'
+        ),
+        'vetores_geradores_trafego_buffer_500m': (
+            "Identifique 3-5 âncoras que geram tráfego próximo à empresa.\n"
+            "Retorne APENAS uma lista JSON.\n"
+            'Exemplo: ["Shopping X", "Estação Y", "Hospital Z"]'
+        ),
+        'potencial_geomarkenting_categoria': (
+            "Classifique o potencial de geomarketing da empresa na sua localização.\n"
+            "Retorne APENAS: ALTO, MÉDIO ou BAIXO"
+        ),
+        'potencial_geomarketing_justificativa': (
+            "Justifique a classificação de potencial de geomarketing da empresa."
+        ),
+        'abordagem_sugerida_pitch': (
+            "Crie um pitch de vendas para abordar a empresa.\n"
+            "Segmento: {facebook_category}\n"
+            "Use uma abordagem personalizada."
+        ),
+        'synergy_score_categoria': (
+            "Calcule score de sinergia da empresa como potencial cliente.\n"
+            "Considere: localização, segmento, tamanho.\n"
+            "Retorne APENAS um número entre 0-100."
+        ),
+        'synergy_score_justificativa': (
+            "Justifique o score de sinergia da empresa."
+        ),
+    }
+    
+    # Providers com API de processamento em lote (50% de desconto, janela de 24h)
+    BATCH_API_PROVIDERS = ('openai', 'claude')
+    
+    # Máximo de requisições por job de lote (limites: OpenAI 50k, Anthropic 100k)
+    BATCH_MAX_REQUESTS = 10000
+    
+    # Intervalo de polling do status do lote (segundos, com backoff exponencial)
+    BATCH_POLL_INITIAL = 30.0
+    BATCH_POLL_MAX = 600.0
+    BATCH_MAX_WAIT = 26 * 3600  # janela de 24h + margem
+    
+    # Scrapers (nomes de SCRAPER_SPECS) cujos resultados cada análise usa
+    # no prompt (ver PROMPT_TEMPLATES); análises sem dependência podem
+    # começar antes dos scrapers terminarem. Os campos gdr_google_places_*
+    # vêm da planilha de entrada, não de um scraper
+    ANALYSIS_SCRAPER_DEPENDENCIES = {
+        'concorrentes_buffer_500m': frozenset({'facebook_scraper'}),
+        'abordagem_sugerida_pitch': frozenset({'facebook_scraper'}),
+    }
+    
+    # Análises fallback quando o LLM falha; as que citam o lead são templates
+    STATIC_FALLBACKS = {
+        'resumo_qualitativo_reviews_google_place': "Análise em processamento. Dados insuficientes para avaliação completa.",
+        'analise_fluxo_pessoas_comercio': "Fluxo médio estimado - análise detalhada pendente.",
+        'concorrentes_buffer_500m': '["Concorrente A", "Concorrente B", "Concorrente C"]',
+        'vetores_geradores_trafego_buffer_500m': '["Ponto de ônibus", "Área comercial", "Escola"]',
+        'potencial_geomarkenting_categoria': "MÉDIO",
+        'potencial_geomarketing_justificativa': "Potencial médio baseado em localização padrão.",
+        'synergy_score_categoria': "50",
+        'synergy_score_justificativa': "Score médio - análise completa pendente."
+    }
+    FALLBACK_TEMPLATES = {
+        'analise_localização_google_place': "Localização em {city} com potencial a ser avaliado.",
+        'abordagem_sugerida_pitch': "Olá {name}! Temos soluções que podem ajudar seu negócio a crescer.",
+    }
+    
+    # Limite de tokens da resposta por análise (o limite também pesa na
+    # alocação e na latência do provider); MAX_TOKENS para análises sem limite
+    # próprio. Textos livres cabem nas 3 linhas do SYSTEM_PROMPT; categoria e
+    # score são uma palavra/número
+    MAX_TOKENS = 500
+    MAX_TOKENS_BY_ANALISE = {
+        'resumo_qualitativo_reviews_google_place': 250,
+        'analise_localização_google_place': 250,
+        'analise_fluxo_pessoas_comercio': 250,
+        'concorrentes_buffer_500m': 120,
+        'vetores_geradores_trafego_buffer_500m': 120,
+        'potencial_geomarkenting_categoria': 8,
+        'potencial_geomarketing_justificativa': 250,
+        'abordagem_sugerida_pitch': 250,
+        'synergy_score_categoria': 8,
+        'synergy_score_justificativa': 250,
+    }
+    
+    # Tokens adicionais por análise na chamada combinada (chave e pontuação do JSON)
+    COMBINED_KEY_TOKENS = 20
+    
+    # Limites por provider: (requisições simultâneas, requisições por minuto;
+    # 0 = sem limite), ajustáveis por <PROVIDER>_MAX_CONCURRENT e <PROVIDER>_RPM
+    # conforme o tier da conta; evitam disparar todas as chamadas de uma vez e
+    # receber 429 em cascata
+    PROVIDER_LIMITS = {
+        'openai': (8, 500),
+        'claude': (3, 50),
+        'gemini': (4, 15),
+        'deepseek': (8, 0),
+        'zhipuai': (5, 0),
+    }
+    
+    # Análises simples (categoria/número) enviadas a um único provider: o
+    # primeiro configurado na ordem de preferência (mais barato/rápido); as
+    # demais análises vão para todos os providers
+    ANALYSIS_ROUTING = {
+        'potencial_geomarkenting_categoria': ['gemini', 'openai', 'claude', 'deepseek', 'zhipuai'],
+        'synergy_score_categoria': ['gemini', 'openai', 'claude', 'deepseek', 'zhipuai'],
+    }
+    
+    # Parada antecipada (stop_on_consensus): diferença máxima entre os scores
+    # da maioria dos providers para considerar o score decidido
+    CONSENSUS_SCORE_TOLERANCE = 5
+    
+    # Requisições que passam de request_timeout são repetidas uma vez com
+    # timeout maior; a chamada combinada gera uma resposta várias vezes mais
+    # longa e usa um timeout proporcionalmente maior
+    RETRY_TIMEOUT_FACTOR = 1.5
+    COMBINED_TIMEOUT_FACTOR = 3
+    
+    # Respostas mantidas em memória por (provider, modelo, prompt)
+    RESPONSE_CACHE_SIZE = 10000
+    
+    def __init__(self, response_store=None, semantic_cache=None, stop_on_consensus: bool = False,
+                 route_simple_analyses: bool = True, shared_store=None,
+                 rate_limit_listener: Optional[Callable[[bool], None]] = None):
+        """
+        Args:
+            response_store: Cache persistente de respostas (LeadCache, com
+                get_llm_response/save_llm_response); None = apenas em memória
+            semantic_cache: Cache de prompts similares (SemanticCache),
+                consultado quando o prompt exato não está em cache; None = desabilitado
+            stop_on_consensus: Se True, analyze_all_llms cancela os providers
+                restantes quando a maioria já concorda nas análises categóricas
+                e numéricas (os campos desses providers ficam ausentes)
+            route_simple_analyses: Se True, as análises de ANALYSIS_ROUTING vão
+                apenas para o provider preferido em vez de todos
+            shared_store: Cache de respostas compartilhado entre workers
+                (RedisResponseCache, com get/set assíncronos), consultado
+                antes do response_store; None = desabilitado
+            rate_limit_listener: Chamado após cada requisição com True quando
+                o provider respondeu HTTP 429 (ex.: SmartOrchestrator.record_rate_limit)
+        """
         self.providers = self._init_providers()
         self.session = None
+        self.response_store = response_store
+        self.shared_store = shared_store
+        self.rate_limit_listener = rate_limit_listener
+        
+        # Função de chamada por tipo de provider (formato da API)
+        self._dispatch = {
+            'openai': self._call_openai_compatible,
+            'claude': self._call_claude,
+            'gemini': self._call_gemini,
+            'zhipuai': self._call_zhipuai,
+        }
+        for llm_name, provider in list(self.providers.items()):
+            if provider['type'] not in self._dispatch:
+                logger.warning(f"LLM {llm_name} com tipo não suportado ({provider['type']}) - ignorado")
+                del self.providers[llm_name]
+        self.semantic_cache = semantic_cache
+        self.stop_on_consensus = stop_on_consensus
+        
+        # Provider de cada análise roteada (None = todos os providers)
+        self._routes = {}
+        if route_simple_analyses and self.providers:
+            for analise, preference in self.ANALYSIS_ROUTING.items():
+                configured = [llm_name for llm_name in preference if llm_name in self.providers]
+                self._routes[analise] = configured[0] if configured else next(iter(self.providers))
+        
+        # Prompts idênticos (leads da mesma cidade/segmento) viram uma única
+        # chamada: respostas recentes em LRU e chamadas em andamento como futures
+        self._responses: OrderedDict = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Semáforo e rate limiter por provider (criados em init_session, já
+        # com o event loop em execução)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._limiters: Dict[str, Throttler] = {}
         self.analises_esperadas = [
             'resumo_qualitativo_reviews_google_place',
             'analise_localização_google_place',
@@ -45,6 +436,7 @@ class LLMAnalyzerV3:
                 'api_key': os.getenv('OPENAI_API_KEY'),
                 'model': 'gpt-4o-mini',  # Modelo mais recente e econômico
                 'endpoint': 'https://api.openai.com/v1/chat/completions',
+                'request_timeout': 15,  # segundos (pouco acima da latência mediana)
                 'type': 'openai'
             }
             logger.info("✓ OpenAI configurado (GPT-4o-mini)")
@@ -55,6 +447,7 @@ class LLMAnalyzerV3:
                 'api_key': os.getenv('ANTHROPIC_API_KEY'),
                 'model': 'claude-3-haiku-20240307',  # Modelo econômico e rápido
                 'endpoint': 'https://api.anthropic.com/v1/messages',
+                'request_timeout': 8,
                 'type': 'claude',
                 'version': '2023-06-01'
             }
@@ -66,6 +459,7 @@ class LLMAnalyzerV3:
                 'api_key': os.getenv('GEMINI_API_KEY'),
                 'model': 'gemini-1.5-flash',
                 'endpoint': 'https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent',
+                'request_timeout': 10,
                 'type': 'gemini'
             }
             logger.info("✓ Gemini configurado (1.5 Flash)")
@@ -76,6 +470,7 @@ class LLMAnalyzerV3:
                 'api_key': os.getenv('DEEPSEEK_API_KEY'),
                 'model': 'deepseek-chat',
                 'endpoint': 'https://api.deepseek.com/v1/chat/completions',
+                'request_timeout': 20,
                 'type': 'openai'  # DeepSeek usa formato OpenAI
             }
             logger.info("✓ DeepSeek configurado")
@@ -86,6 +481,7 @@ class LLMAnalyzerV3:
                 'api_key': os.getenv('ZHIPUAI_API_KEY'),
                 'model': 'glm-4-flash',  # GLM-4.5 Flash (mais rápido)
                 'endpoint': 'https://open.bigmodel.cn/api/paas/v4/chat/completions',
+                'request_timeout': 15,
                 'type': 'zhipuai'
             }
             logger.info("✓ ZhipuAI configurado (GLM-4.5 Flash)")
@@ -94,125 +490,400 @@ class LLMAnalyzerV3:
         return providers
     
     async def init_session(self):
-        """Inicializa sessão HTTP"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        """Obtém a sessão HTTP compartilhada do processo (get_shared_session)"""
+        if not self.session or self.session.closed:
+            self.session = await get_shared_session()
+        
+        if not self._semaphores:
+            for llm_name in self.providers:
+                max_concurrent, rpm = self.PROVIDER_LIMITS.get(llm_name, (5, 0))
+                max_concurrent = int(os.getenv(f'{llm_name.upper()}_MAX_CONCURRENT', max_concurrent))
+                rpm = int(os.getenv(f'{llm_name.upper()}_RPM', rpm))
+                self._semaphores[llm_name] = asyncio.Semaphore(max(1, max_concurrent))
+                if rpm > 0:
+                    self._limiters[llm_name] = Throttler(rate_limit=rpm, period=60.0)
     
     async def close_session(self):
-        """Fecha sessão HTTP"""
-        if self.session:
-            await self.session.close()
+        """
+        Fecha a sessão HTTP compartilhada e a conexão com o Redis (e grava o
+        cache semântico); outras instâncias obtêm uma nova sessão na próxima
+        chamada de init_session
+        """
+        self.session = None
+        await close_shared_session()
+        self._semaphores.clear()
+        self._limiters.clear()
+        if self.shared_store is not None:
+            await self.shared_store.close()
+        if self.semantic_cache is not None:
+            await asyncio.to_thread(self.semantic_cache.save)
     
-    async def analyze_with_llm(self, lead_data: Dict, scraped_data: Dict, llm_name: str) -> Dict:
-        """Realiza análises com um LLM específico"""
+    async def analyze_with_llm(self, lead_data: Dict, scraped_data: Dict, llm_name: str,
+                               analyses: Optional[List[str]] = None,
+                               context: Optional[Dict[str, Any]] = None) -> Dict:
+        """
+        Realiza análises com um LLM específico (analyses=None: todas); context
+        é o resultado de _prompt_context, compartilhado entre os providers
+        """
+        analyses = self.analises_esperadas if analyses is None else analyses
         if llm_name not in self.providers:
             logger.warning(f"LLM {llm_name} não configurado")
-            return self._generate_fallback_analysis_all(lead_data)
+            return self._generate_fallback_analysis_all(lead_data, analyses)
         
         await self.init_session()
         result = {}
+        if context is None:
+            context = self._prompt_context(lead_data, scraped_data)
         
-        # Executar todas as análises em paralelo
-        tasks = []
-        for analise in self.analises_esperadas:
-            task = self._analyze_single(analise, lead_data, scraped_data, llm_name)
-            tasks.append(task)
+        # Todas as análises em uma única requisição com resposta JSON; o
+        # contexto do lead é enviado uma vez em vez de uma vez por análise
+        answers = {}
+        if len(analyses) > 1:
+            prompt = self._create_combined_prompt(analyses, context)
+            try:
+                response = await self._call_llm(
+                    prompt, llm_name,
+                    max_tokens=sum(self._max_tokens(analise) + self.COMBINED_KEY_TOKENS
+                                   for analise in analyses),
+                    json_response=True
+                )
+            except Exception as e:
+                logger.error(f"Erro em {llm_name}: {e}")
+                return {
+                    f'gdr_llm_{llm_name}_{analise}': self._generate_fallback_analysis(analise, lead_data)
+                    for analise in analyses
+                }
+            answers = self._parse_combined_response(response, analyses)
+        
+        # Chamadas individuais apenas para campos ausentes na resposta combinada
+        missing = [analise for analise in analyses if analise not in answers]
+        if missing and len(analyses) > 1:
+            logger.warning(f"LLM {llm_name}: resposta combinada sem {len(missing)} campo(s), "
+                           f"consultando individualmente")
         
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        responses = await gather_settled(
+            self._analyze_single(analise, context, llm_name) for analise in missing
+        )
         
         # Processar respostas
-        for analise, response in zip(self.analises_esperadas, responses):
-            field_name = f'gdr_llm_{llm_name}_{analise}'
-            if isinstance(response, Exception):
-                logger.error(f"Erro em {llm_name}/{analise}: {response}")
-                result[field_name] = self._generate_fallback_analysis(analise, lead_data)
+        for analise, response in zip(missing, responses):
+            if isinstance(response, BaseException):
+                logger.error(f"Erro em {llm_name}/{analise}: {response!r}")
+                answers[analise] = self._generate_fallback_analysis(analise, lead_data)
             else:
-                result[field_name] = response
+                answers[analise] = response
+        
+        for analise in analyses:
+            result[f'gdr_llm_{llm_name}_{analise}'] = answers[analise]
         
         logger.info(f"LLM {llm_name}: Geradas {len(result)} análises")
         return result
     
-    async def _analyze_single(self, analise: str, lead_data: Dict, scraped_data: Dict, llm_name: str) -> str:
+    async def _analyze_single(self, analise: str, context: Dict[str, Any], llm_name: str) -> str:
         """Executa uma análise única"""
-        prompt = self._create_specific_prompt(analise, lead_data, scraped_data)
-        return await self._call_llm(prompt, llm_name)
+        prompt = self._create_specific_prompt(analise, context)
+        return await self._call_llm(prompt, llm_name, max_tokens=self._max_tokens(analise))
     
-    async def _call_llm(self, prompt: str, llm_name: str) -> str:
-        """Chama LLM específico"""
-        provider = self.providers[llm_name]
+    def _max_tokens(self, analise: str) -> int:
+        """Limite de tokens da resposta de uma análise"""
+        return self.MAX_TOKENS_BY_ANALISE.get(analise, self.MAX_TOKENS)
+    
+    def _parse_combined_response(self, response: str, analyses: List[str]) -> Dict[str, str]:
+        """
+        Extrai as respostas da chamada combinada
         
+        Args:
+            response: Texto retornado pelo LLM (objeto JSON, possivelmente
+                envolto em bloco de código markdown)
+            analyses: Análises solicitadas
+            
+        Returns:
+            Dict análise -> texto (apenas os campos presentes e não vazios);
+            listas e objetos voltam como texto JSON, como nas chamadas avulsas
+        """
+        start, end = response.find('{'), response.rfind('}')
         try:
-            if provider['type'] == 'openai':
-                return await self._call_openai_compatible(prompt, provider)
-            elif provider['type'] == 'claude':
-                return await self._call_claude(prompt, provider)
-            elif provider['type'] == 'gemini':
-                return await self._call_gemini(prompt, provider)
-            elif provider['type'] == 'zhipuai':
-                return await self._call_zhipuai(prompt, provider)
+            data = json.loads(response[start:end + 1]) if start != -1 else None
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return {}
+        
+        answers = {}
+        for analise in analyses:
+            value = data.get(analise)
+            if value is None or value == '':
+                continue
+            if isinstance(value, (list, dict)):
+                answers[analise] = json.dumps(value, ensure_ascii=False)
             else:
-                return "Tipo de LLM não suportado"
+                answers[analise] = str(value).strip()
+        return answers
+    
+    def _prompt_key(self, prompt: str, llm_name: str) -> str:
+        """
+        Chave de conteúdo do prompt para um provider/modelo; espaços em branco
+        são normalizados para que prompts que diferem só na indentação ou em
+        quebras de linha compartilhem a resposta
+        """
+        model = self.providers[llm_name].get('model', '')
+        normalized = WHITESPACE.sub(' ', prompt).strip()
+        return xxhash.xxh3_64_hexdigest(
+            f"{llm_name}\0{model}\0{self.SYSTEM_PROMPT}\0{normalized}".encode('utf-8')
+        )
+    
+    async def _call_llm(self, prompt: str, llm_name: str, max_tokens: int = MAX_TOKENS,
+                        json_response: bool = False) -> str:
+        """
+        Chama LLM específico, reaproveitando a resposta de um prompt idêntico
+        já respondido (memória, Redis ou DuckDB) ou em andamento
+        
+        Args:
+            prompt: Mensagem do usuário
+            llm_name: Provider configurado
+            max_tokens: Limite de tokens da resposta
+            json_response: Solicita resposta em JSON ao provider (modo JSON
+                da OpenAI/DeepSeek e do Gemini)
+        """
+        key = self._prompt_key(prompt, llm_name)
+        
+        while True:
+            if key in self._responses:
+                self._responses.move_to_end(key)
+                return self._responses[key]
+            
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                return await asyncio.shield(inflight)
+            except _RequestAbandoned:
+                # O líder foi cancelado (ex.: consenso atingido no lead dele);
+                # a requisição é refeita pelo primeiro seguidor a acordar
+                continue
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = None
+            if self.shared_store is not None:
+                response = await self.shared_store.get(key)
+            if response is None:
+                if self.response_store is not None:
+                    response = await asyncio.to_thread(self.response_store.get_llm_response, key)
+                if response is None:
+                    if self.semantic_cache is not None:
+                        response = await self._request_semantic(prompt, llm_name, max_tokens, json_response)
+                    else:
+                        response = await self._request_llm(prompt, llm_name, max_tokens, json_response)
+                    if self.response_store is not None:
+                        provider = self.providers[llm_name]
+                        await asyncio.to_thread(self.response_store.save_llm_response, key, llm_name,
+                                                provider.get('model', ''), response)
+                # Disponibilizar aos demais workers (inclusive respostas do DuckDB local)
+                if self.shared_store is not None:
+                    await self.shared_store.set(key, response)
+            
+            self._remember_response(key, response)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            # O cancelamento é só do líder: os seguidores recebem
+            # _RequestAbandoned e assumem a requisição em vez de serem cancelados
+            future.set_exception(_RequestAbandoned())
+            future.exception()
+            raise
         except Exception as e:
-            logger.error(f"Erro ao chamar {llm_name}: {e}")
+            future.set_exception(e)
+            # Evitar aviso de exceção não lida quando ninguém mais aguardava
+            future.exception()
             raise
+        finally:
+            del self._inflight[key]
     
-    async def _call_openai_compatible(self, prompt: str, provider: Dict) -> str:
-        """Chama APIs compatíveis com OpenAI (OpenAI, DeepSeek)"""
-        headers = {
-            'Authorization': f"Bearer {provider['api_key']}",
-            'Content-Type': 'application/json'
-        }
+    async def _request_semantic(self, prompt: str, llm_name: str, max_tokens: int,
+                                json_response: bool) -> str:
+        """
+        Reaproveita a resposta de um prompt similar (cache semântico) ou faz a
+        requisição e a insere no cache
+        
+        O nome da empresa é removido do texto comparado; ao reaproveitar, o
+        nome da empresa original na resposta é trocado pelo do lead atual.
+        """
+        match = COMPANY_LINE.search(prompt)
+        subject = match.group(1).strip() if match else ''
+        text = WHITESPACE.sub(' ', COMPANY_LINE.sub('Empresa:', prompt)).strip()
+        provider = self.providers[llm_name]
+        scope = f"{llm_name}\0{provider.get('model', '')}\0{self.SYSTEM_PROMPT}"
+        
+        try:
+            vector = await asyncio.to_thread(self.semantic_cache.embed, text)
+            hit = await asyncio.to_thread(self.semantic_cache.search, scope, vector)
+        except Exception as e:
+            logger.warning(f"Cache semântico indisponível: {e}")
+            return await self._request_llm(prompt, llm_name, max_tokens, json_response)
+        
+        if hit is not None:
+            response, cached_subject = hit
+            if cached_subject and subject and cached_subject != subject:
+                response = response.replace(cached_subject, subject)
+            return response
         
+        response = await self._request_llm(prompt, llm_name, max_tokens, json_response)
+        await asyncio.to_thread(self.semantic_cache.add, scope, vector, response, subject)
+        return response
+    
+    def _remember_response(self, key: str, response: str):
+        """Guarda a resposta na LRU em memória"""
+        self._responses[key] = response
+        self._responses.move_to_end(key)
+        while len(self._responses) > self.RESPONSE_CACHE_SIZE:
+            self._responses.popitem(last=False)
+    
+    async def _request_llm(self, prompt: str, llm_name: str, max_tokens: int = MAX_TOKENS,
+                           json_response: bool = False) -> str:
+        """
+        Faz a requisição ao provider; se passar do timeout do provider (cauda
+        da distribuição de latência), repete uma vez com timeout maior
+        """
+        provider = self.providers[llm_name]
+        timeout = provider['request_timeout']
+        if json_response:
+            # Chamada combinada: várias análises na mesma resposta
+            timeout *= self.COMBINED_TIMEOUT_FACTOR
+        
+        try:
+            try:
+                return await self._limited_request(prompt, llm_name, max_tokens, json_response, timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout de {timeout:.0f}s em {llm_name} - repetindo a requisição")
+                return await self._limited_request(prompt, llm_name, max_tokens, json_response,
+                                                   timeout * self.RETRY_TIMEOUT_FACTOR)
+        except asyncio.TimeoutError:
+            logger.error(f"Erro ao chamar {llm_name}: timeout após nova tentativa "
+                         f"({timeout * self.RETRY_TIMEOUT_FACTOR:.0f}s)")
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao chamar {llm_name}: {e}")
+            raise
+    
+    async def _limited_request(self, prompt: str, llm_name: str, max_tokens: int,
+                               json_response: bool, timeout: float) -> str:
+        """
+        Uma tentativa de requisição dentro dos limites do provider; o timeout
+        conta apenas a requisição, não a espera pelo semáforo/rate limiter
+        """
+        provider = self.providers[llm_name]
+        async with self._semaphores[llm_name]:
+            limiter = self._limiters.get(llm_name)
+            if limiter:
+                async with limiter:
+                    pass
+            try:
+                response = await asyncio.wait_for(
+                    self._dispatch[provider['type']](prompt, provider, max_tokens, json_response),
+                    timeout=timeout
+                )
+            except LLMAPIError as e:
+                self._report_rate_limit(e.status == 429)
+                raise
+            self._report_rate_limit(False)
+            return response
+    
+    def _report_rate_limit(self, rate_limited: bool):
+        """Repassa ao rate_limit_listener se a requisição recebeu HTTP 429"""
+        if self.rate_limit_listener is not None:
+            self.rate_limit_listener(rate_limited)
+    
+    def _openai_payload(self, prompt: str, provider: Dict, max_tokens: int = MAX_TOKENS,
+                        json_response: bool = False) -> Dict:
+        """Corpo da requisição de chat completions (também usado na Batch API)"""
         data = {
             'model': provider['model'],
             'messages': [
-                {'role': 'system', 'content': 'Você é um analista de negócios especializado em análise de dados empresariais.'},
+                {'role': 'system', 'content': self.SYSTEM_PROMPT},
                 {'role': 'user', 'content': prompt}
             ],
             'temperature': 0.7,
-            'max_tokens': 500
+            'max_tokens': max_tokens
         }
+        if json_response:
+            data['response_format'] = {'type': 'json_object'}
+        return data
+    
+    def _claude_payload(self, prompt: str, provider: Dict, max_tokens: int = MAX_TOKENS) -> Dict:
+        """Corpo da requisição de messages (também usado no Message Batches)"""
+        context, separator, question = prompt.partition(self.CONTEXT_SEPARATOR)
+        if separator:
+            # Contexto do lead como prefixo cacheável, pergunta em bloco à parte
+            content = [
+                {'type': 'text', 'text': context, 'cache_control': {'type': 'ephemeral'}},
+                {'type': 'text', 'text': question}
+            ]
+        else:
+            content = prompt
         
-        async with self.session.post(provider['endpoint'], headers=headers, json=data) as response:
+        return {
+            'model': provider['model'],
+            # Bloco estático marcado para cache (ephemeral) da Anthropic
+            'system': [
+                {'type': 'text', 'text': self.SYSTEM_PROMPT, 'cache_control': {'type': 'ephemeral'}}
+            ],
+            'messages': [
+                {'role': 'user', 'content': content}
+            ],
+            'max_tokens': max_tokens,
+            'temperature': 0.7
+        }
+    
+    async def _call_openai_compatible(self, prompt: str, provider: Dict, max_tokens: int = MAX_TOKENS,
+                                      json_response: bool = False) -> str:
+        """Chama APIs compatíveis com OpenAI (OpenAI, DeepSeek)"""
+        headers = {
+            'Authorization': f"Bearer {provider['api_key']}",
+            'Content-Type': 'application/json'
+        }
+        
+        data = self._openai_payload(prompt, provider, max_tokens, json_response)
+        data['stream'] = True
+        
+        async with self.session.post(provider['endpoint'], headers=headers, data=_dumps(data)) as response:
             if response.status == 200:
-                result = await response.json()
-                return result['choices'][0]['message']['content'].strip()
+                return await self._read_stream(response, self._openai_delta)
             else:
                 error = await response.text()
-                raise Exception(f"Erro API {provider['model']}: {error}")
+                raise LLMAPIError(f"Erro API {provider['model']}: {error}", response.status)
     
-    async def _call_claude(self, prompt: str, provider: Dict) -> str:
-        """Chama API do Claude (Anthropic)"""
+    async def _call_claude(self, prompt: str, provider: Dict, max_tokens: int = MAX_TOKENS,
+                           json_response: bool = False) -> str:
+        """Chama API do Claude (Anthropic); sem modo JSON, o formato vem do prompt"""
         headers = {
             'x-api-key': provider['api_key'],
             'anthropic-version': provider['version'],
             'Content-Type': 'application/json'
         }
         
-        data = {
-            'model': provider['model'],
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'max_tokens': 500,
-            'temperature': 0.7
-        }
+        data = self._claude_payload(prompt, provider, max_tokens)
+        data['stream'] = True
         
-        async with self.session.post(provider['endpoint'], headers=headers, json=data) as response:
+        async with self.session.post(provider['endpoint'], headers=headers, data=_dumps(data)) as response:
             if response.status == 200:
-                result = await response.json()
-                return result['content'][0]['text'].strip()
+                return await self._read_stream(response, self._claude_delta)
             else:
                 error = await response.text()
-                raise Exception(f"Erro Claude API: {error}")
+                raise LLMAPIError(f"Erro Claude API: {error}", response.status)
     
-    async def _call_gemini(self, prompt: str, provider: Dict) -> str:
+    async def _call_gemini(self, prompt: str, provider: Dict, max_tokens: int = MAX_TOKENS,
+                           json_response: bool = False) -> str:
         """Chama API do Gemini"""
         headers = {
             'Content-Type': 'application/json'
         }
         
         data = {
+            'systemInstruction': {
+                'parts': [{'text': self.SYSTEM_PROMPT}]
+            },
             'contents': [{
                 'parts': [{
                     'text': prompt
@@ -220,22 +891,26 @@ class LLMAnalyzerV3:
             }],
             'generationConfig': {
                 'temperature': 0.7,
-                'maxOutputTokens': 500
+                'maxOutputTokens': max_tokens
             }
         }
+        if json_response:
+            data['generationConfig']['responseMimeType'] = 'application/json'
         
-        url = f"{provider['endpoint']}?key={provider['api_key']}"
+        # Endpoint de streaming (SSE) equivalente ao generateContent
+        endpoint = provider['endpoint'].replace(':generateContent', ':streamGenerateContent')
+        url = f"{endpoint}?alt=sse&key={provider['api_key']}"
         
-        async with self.session.post(url, headers=headers, json=data) as response:
+        async with self.session.post(url, headers=headers, data=_dumps(data)) as response:
             if response.status == 200:
-                result = await response.json()
-                return result['candidates'][0]['content']['parts'][0]['text'].strip()
+                return await self._read_stream(response, self._gemini_delta)
             else:
                 error = await response.text()
-                raise Exception(f"Erro Gemini API: {error}")
+                raise LLMAPIError(f"Erro Gemini API: {error}", response.status)
     
-    async def _call_zhipuai(self, prompt: str, provider: Dict) -> str:
-        """Chama API do ZhipuAI (GLM-4.5)"""
+    async def _call_zhipuai(self, prompt: str, provider: Dict, max_tokens: int = MAX_TOKENS,
+                            json_response: bool = False) -> str:
+        """Chama API do ZhipuAI (GLM-4.5); sem modo JSON, o formato vem do prompt"""
         headers = {
             'Authorization': f"Bearer {provider['api_key']}",
             'Content-Type': 'application/json'
@@ -244,171 +919,615 @@ class LLMAnalyzerV3:
         data = {
             'model': provider['model'],
             'messages': [
-                {'role': 'system', 'content': 'Você é um analista de negócios especializado em análise de dados empresariais.'},
+                {'role': 'system', 'content': self.SYSTEM_PROMPT},
                 {'role': 'user', 'content': prompt}
             ],
             'temperature': 0.7,
-            'max_tokens': 500,
-            'stream': False
+            'max_tokens': max_tokens,
+            'stream': True
         }
         
-        async with self.session.post(provider['endpoint'], headers=headers, json=data) as response:
+        async with self.session.post(provider['endpoint'], headers=headers, data=_dumps(data)) as response:
             if response.status == 200:
-                result = await response.json()
-                return result['choices'][0]['message']['content'].strip()
+                return await self._read_stream(response, self._openai_delta)
             else:
                 error = await response.text()
-                raise Exception(f"Erro ZhipuAI API: {error}")
-    
-    def _create_specific_prompt(self, analise_type: str, lead_data: Dict, scraped_data: Dict) -> str:
-        """Cria prompt específico para cada tipo de análise"""
-        company_name = lead_data.get('name', 'Empresa')
-        location = f"{lead_data.get('city', '')}, {lead_data.get('state', '')}"
-        
-        prompts = {
-            'resumo_qualitativo_reviews_google_place': f"""
-                Analise os reviews e avaliações para {company_name}.
-                Com base nos dados disponíveis: {scraped_data.get('gdr_google_places_rating', 'N/A')} estrelas,
-                {scraped_data.get('gdr_google_places_user_ratings_total', 0)} avaliações.
-                Crie um resumo qualitativo identificando pontos fortes e fracos.
-                Responda em 2-3 linhas.
-            """,
-            
-            'analise_localização_google_place': f"""
-                Analise a localização de {company_name} em {location}.
-                Endereço: {lead_data.get('address', 'N/A')}
-                Avalie o potencial da localização para o negócio.
-                Responda em 2 linhas sobre a qualidade da localização.
-            """,
-            
-            'analise_fluxo_pessoas_comercio': f"""
-                Estime o fluxo de pessoas na região de {company_name} em {location}.
-                Tipo de negócio: {scraped_data.get('gdr_google_places_types', 'comercial')}
-                Forneça estimativa com justificativa em 2 linhas.
-            """,
-            
-            'concorrentes_buffer_500m': f"""
-                Liste 3-5 possíveis concorrentes de {company_name} num raio de 500m.
-                Segmento: {scraped_data.get('gdr_facebook_category', lead_data.get('category', 'N/A'))}
-                Retorne APENAS uma lista JSON de nomes.
-                Exemplo: ["Loja A", "Empresa B", "Negócio C"]
-            """,
-            
-            'vetores_geradores_trafego_buffer_500m': f"""
-                Identifique 3-5 âncoras que geram tráfego próximo a {company_name} em {location}.
-                Retorne APENAS uma lista JSON.
-                Exemplo: ["Shopping X", "Estação Y", "Hospital Z"]
-            """,
-            
-            'potencial_geomarkenting_categoria': f"""
-                Classifique o potencial de geomarketing para {company_name}.
-                Localização: {location}
-                Retorne APENAS: ALTO, MÉDIO ou BAIXO
-            """,
-            
-            'potencial_geomarketing_justificativa': f"""
-                Justifique a classificação de potencial de geomarketing para {company_name}.
-                Responda em 1-2 linhas máximo.
-            """,
-            
-            'abordagem_sugerida_pitch': f"""
-                Crie um pitch de vendas para abordar {company_name}.
-                Segmento: {scraped_data.get('gdr_facebook_category', 'N/A')}
-                Responda em 2-3 linhas com abordagem personalizada.
-            """,
+                raise LLMAPIError(f"Erro ZhipuAI API: {error}", response.status)
+    
+    async def _read_stream(self, response: aiohttp.ClientResponse, delta: Callable[[Dict], Optional[str]]) -> str:
+        """
+        Lê uma resposta em streaming (server-sent events), processando cada
+        trecho à medida que chega em vez de aguardar o corpo completo
+        
+        Args:
+            response: Resposta HTTP com Content-Type text/event-stream
+            delta: Extrai o texto de um evento (None se o evento não tem texto)
             
-            'synergy_score_categoria': f"""
-                Calcule score de sinergia para {company_name} como potencial cliente.
-                Considere: localização, segmento, tamanho.
-                Retorne APENAS um número entre 0-100.
-            """,
+        Returns:
+            Texto completo da resposta
+        """
+        parts = []
+        async for line in response.content:
+            if not line.startswith(b'data:'):
+                continue
+            payload = line[5:].strip()
+            if payload == b'[DONE]':
+                break
+            event = _loads(payload)
+            if event.get('type') == 'error' or 'error' in event:
+                raise Exception(f"Erro no streaming: {event.get('error', event)}")
+            text = delta(event)
+            if text:
+                parts.append(text)
+        return ''.join(parts).strip()
+    
+    @staticmethod
+    def _openai_delta(event: Dict) -> Optional[str]:
+        """Texto de um chunk de chat completions (OpenAI, DeepSeek, ZhipuAI)"""
+        choices = event.get('choices')
+        if not choices:
+            return None
+        return (choices[0].get('delta') or {}).get('content')
+    
+    @staticmethod
+    def _claude_delta(event: Dict) -> Optional[str]:
+        """Texto de um evento content_block_delta da Anthropic"""
+        if event.get('type') != 'content_block_delta':
+            return None
+        return event['delta'].get('text')
+    
+    @staticmethod
+    def _gemini_delta(event: Dict) -> Optional[str]:
+        """Texto de um chunk do streamGenerateContent do Gemini"""
+        candidates = event.get('candidates')
+        if not candidates:
+            return None
+        parts = candidates[0].get('content', {}).get('parts', [])
+        return ''.join(part.get('text', '') for part in parts)
+    
+    def _prompt_context(self, lead_data: Dict, scraped_data: Dict) -> Dict[str, Any]:
+        """
+        Valores dos templates de prompt de um lead, calculados uma vez por lead
+        
+        Args:
+            lead_data: Dados originais do lead
+            scraped_data: Dados coletados pelos scrapers
             
-            'synergy_score_justificativa': f"""
-                Justifique o score de sinergia para {company_name}.
-                Responda em 1-2 linhas máximo.
-            """
+        Returns:
+            Dict placeholder -> valor, incluindo o contexto do lead já formatado
+            ('lead_context')
+        """
+        context = {
+            'company': lead_data.get('name', 'Empresa'),
+            'location': f"{lead_data.get('city', '')}, {lead_data.get('state', '')}",
+            'address': lead_data.get('address', 'N/A'),
+            'category': lead_data.get('category', 'N/A'),
+            'rating': scraped_data.get('gdr_google_places_rating', 'N/A'),
+            'ratings_total': scraped_data.get('gdr_google_places_user_ratings_total', 0),
+            'place_types': scraped_data.get('gdr_google_places_types', 'comercial'),
+            'segment': scraped_data.get('gdr_facebook_category', lead_data.get('category', 'N/A')),
+            'facebook_category': scraped_data.get('gdr_facebook_category', 'N/A'),
         }
-        
-        return prompts.get(analise_type, f"Analise {analise_type} para {company_name}")
+        context['lead_context'] = self.LEAD_CONTEXT_TEMPLATE.format_map(context)
+        return context
+    
+    def _analysis_question(self, analise_type: str, context: Dict[str, Any]) -> str:
+        """Pergunta específica de cada tipo de análise (sem o contexto do lead)"""
+        template = self.PROMPT_TEMPLATES.get(analise_type)
+        if template is None:
+            return f"Analise {analise_type} para a empresa."
+        return template.format_map(context)
+    
+    def _create_specific_prompt(self, analise_type: str, context: Dict[str, Any]) -> str:
+        """Cria prompt específico para cada tipo de análise (contexto do lead + pergunta)"""
+        return context['lead_context'] + self.CONTEXT_SEPARATOR + self._analysis_question(analise_type, context)
+    
+    def _create_combined_prompt(self, analyses: List[str], context: Dict[str, Any]) -> str:
+        """
+        Cria um prompt único com todas as análises, pedindo um objeto JSON
+        com uma chave por análise
+        """
+        sections = [
+            f"[{analise}]\n{self._analysis_question(analise, context)}"
+            for analise in analyses
+        ]
+        keys = ', '.join(f'"{analise}"' for analise in analyses)
+        return (
+            context['lead_context'] + self.CONTEXT_SEPARATOR
+            + "Realize as análises abaixo. Retorne APENAS um objeto JSON com as chaves "
+            f"{keys}; o valor de cada chave é a resposta da análise correspondente, "
+            "seguindo as instruções da seção.\n\n" + '\n\n'.join(sections)
+        )
     
     def _generate_fallback_analysis(self, analise: str, lead_data: Dict) -> str:
         """Gera análise fallback quando LLM falha"""
-        fallbacks = {
-            'resumo_qualitativo_reviews_google_place': "Análise em processamento. Dados insuficientes para avaliação completa.",
-            'analise_localização_google_place': f"Localização em {lead_data.get('city', 'cidade')} com potencial a ser avaliado.",
-            'analise_fluxo_pessoas_comercio': "Fluxo médio estimado - análise detalhada pendente.",
-            'concorrentes_buffer_500m': '["Concorrente A", "Concorrente B", "Concorrente C"]',
-            'vetores_geradores_trafego_buffer_500m': '["Ponto de ônibus", "Área comercial", "Escola"]',
-            'potencial_geomarkenting_categoria': "MÉDIO",
-            'potencial_geomarketing_justificativa': "Potencial médio baseado em localização padrão.",
-            'abordagem_sugerida_pitch': f"Olá {lead_data.get('name', '')}! Temos soluções que podem ajudar seu negócio a crescer.",
-            'synergy_score_categoria': "50",
-            'synergy_score_justificativa': "Score médio - análise completa pendente."
-        }
-        return fallbacks.get(analise, "Análise pendente")
+        if analise == 'analise_localização_google_place':
+            return self.FALLBACK_TEMPLATES[analise].format(city=lead_data.get('city', 'cidade'))
+        if analise == 'abordagem_sugerida_pitch':
+            return self.FALLBACK_TEMPLATES[analise].format(name=lead_data.get('name', ''))
+        return self.STATIC_FALLBACKS.get(analise, "Análise pendente")
     
-    def _generate_fallback_analysis_all(self, lead_data: Dict) -> Dict:
-        """Gera todas as análises fallback"""
+    def _generate_fallback_analysis_all(self, lead_data: Dict, analyses: Optional[List[str]] = None) -> Dict:
+        """Gera todas as análises fallback (ou apenas as de analyses)"""
         result = {}
-        for analise in self.analises_esperadas:
+        for analise in self.analises_esperadas if analyses is None else analyses:
             field_name = f'gdr_llm_fallback_{analise}'
             result[field_name] = self._generate_fallback_analysis(analise, lead_data)
         return result
     
-    async def analyze_all_llms(self, lead_data: Dict, scraped_data: Dict) -> Dict:
-        """Executa análise com todos os LLMs disponíveis"""
+    async def analyze_all_llms(self, lead_data: Dict, scraped_data: Dict,
+                               analyses: Optional[List[str]] = None) -> Dict:
+        """
+        Executa análise com todos os LLMs disponíveis
+        
+        Args:
+            lead_data: Dados originais do lead
+            scraped_data: Dados coletados pelos scrapers
+            analyses: Subconjunto de analises_esperadas (None = todas); permite
+                iniciar as análises sem dependência antes dos scrapers terminarem
+                
+        Returns:
+            Dict com os campos gdr_llm_<provider>_<análise>
+        """
         result = {}
+        analyses = self.analises_esperadas if analyses is None else analyses
         
-        # Analisar com cada LLM disponível
+        # Analisar com cada LLM disponível (apenas as análises roteadas para ele)
         tasks = []
         llm_names = []
+        provider_analyses = []
+        context = self._prompt_context(lead_data, scraped_data)
         
         for llm_name in self.providers.keys():
-            tasks.append(self.analyze_with_llm(lead_data, scraped_data, llm_name))
-            llm_names.append(llm_name)
+            routed = self._provider_analyses(llm_name, analyses)
+            if routed:
+                tasks.append(self.analyze_with_llm(lead_data, scraped_data, llm_name, routed, context))
+                llm_names.append(llm_name)
+                provider_analyses.append(routed)
         
         if tasks:
             logger.info(f"Executando análise com {len(tasks)} LLMs: {llm_names}")
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            decisive = [
+                analise for analise in analyses
+                if (analise in CATEGORY_IDS or analise in NUMERIC_ANALYSES) and analise not in self._routes
+            ]
+            if self.stop_on_consensus and decisive:
+                results = await self._gather_until_consensus(llm_names, tasks, decisive)
+            else:
+                results = await gather_settled(tasks)
             
-            for llm_name, llm_result in zip(llm_names, results):
-                if isinstance(llm_result, Exception):
+            for llm_name, routed, llm_result in zip(llm_names, provider_analyses, results):
+                if llm_result is None:
+                    # Cancelado após o consenso
+                    continue
+                if isinstance(llm_result, BaseException):
                     logger.error(f"Erro em {llm_name}: {llm_result}")
-                    result.update(self._generate_fallback_analysis_all(lead_data))
+                    result.update(self._generate_fallback_analysis_all(lead_data, routed))
                 else:
                     result.update(llm_result)
         else:
             logger.warning("Nenhum LLM configurado - usando fallback")
-            result = self._generate_fallback_analysis_all(lead_data)
+            result = self._generate_fallback_analysis_all(lead_data, analyses)
         
         return result
     
+    def _provider_analyses(self, llm_name: str, analyses: List[str]) -> List[str]:
+        """Análises de analyses que cabem ao provider (ANALYSIS_ROUTING)"""
+        return [analise for analise in analyses if self._routes.get(analise, llm_name) == llm_name]
+    
+    async def _gather_until_consensus(self, llm_names: List[str], tasks: List, decisive: List[str]) -> List[Any]:
+        """
+        Aguarda os providers à medida que terminam e cancela os restantes
+        assim que as análises decisivas atingem consenso
+        
+        Args:
+            llm_names: Provider de cada tarefa
+            tasks: Corrotinas analyze_with_llm
+            decisive: Análises categóricas/numéricas usadas como critério
+            
+        Returns:
+            Resultado (ou exceção) de cada provider, na ordem de llm_names;
+            None para os cancelados
+        """
+        futures = [asyncio.ensure_future(task) for task in tasks]
+        position = {future: i for i, future in enumerate(futures)}
+        results = [None] * len(futures)
+        pending = set(futures)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    results[position[future]] = task_outcome(future)
+                
+                answered = [
+                    (llm_names[i], result) for i, result in enumerate(results)
+                    if isinstance(result, dict)
+                ]
+                if pending and self._consensus_reached(answered, decisive):
+                    logger.info(f"Consenso atingido com {len(answered)}/{len(futures)} LLMs - "
+                                f"cancelando {len(pending)} restantes")
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+        
+        return results
+    
+    def _consensus_reached(self, answered: List[tuple], decisive: List[str]) -> bool:
+        """
+        Verifica se a maioria dos providers configurados concorda em todas as
+        análises decisivas: mesma categoria, ou scores a até
+        CONSENSUS_SCORE_TOLERANCE pontos entre si
+        
+        Args:
+            answered: Tuplas (provider, campos retornados) dos que já terminaram
+            decisive: Análises categóricas/numéricas
+        """
+        quorum = len(self.providers) // 2 + 1
+        if len(answered) < quorum:
+            return False
+        
+        for analise in decisive:
+            values = [
+                result.get(f'gdr_llm_{llm_name}_{analise}')
+                for llm_name, result in answered
+            ]
+            if analise in NUMERIC_ANALYSES:
+                scores = sorted(float(value) for value in values if isinstance(value, str) and value.isdigit())
+                if not any(scores[i + quorum - 1] - scores[i] <= self.CONSENSUS_SCORE_TOLERANCE
+                           for i in range(len(scores) - quorum + 1)):
+                    return False
+            else:
+                votes = Counter(value for value in values if value in CATEGORY_IDS[analise])
+                if not votes or votes.most_common(1)[0][1] < quorum:
+                    return False
+        return True
+    
+    async def analyze_all_llms_batch(self, leads: List[tuple]) -> List[Dict]:
+        """
+        Executa as análises de vários leads usando as APIs de lote dos providers
+        que as oferecem (OpenAI Batch API, Anthropic Message Batches); os demais
+        providers seguem pelo caminho online
+        
+        Args:
+            leads: Lista de tuplas (lead_data, scraped_data)
+            
+        Returns:
+            Lista de dicts de análises (mesmo formato de analyze_all_llms),
+            na ordem de leads
+        """
+        if not self.providers:
+            logger.warning("Nenhum LLM configurado - usando fallback")
+            return [self._generate_fallback_analysis_all(lead_data) for lead_data, _ in leads]
+        
+        await self.init_session()
+        
+        # custom_id -> (índice do lead, análise); apenas [a-zA-Z0-9_-] (exigência da Anthropic)
+        prompts = {}
+        for i, (lead_data, scraped_data) in enumerate(leads):
+            context = self._prompt_context(lead_data, scraped_data)
+            for j, analise in enumerate(self.analises_esperadas):
+                prompts[f"lead{i}_a{j}"] = (i, analise, self._create_specific_prompt(analise, context))
+        
+        llm_names = list(self.providers.keys())
+        tasks = []
+        for llm_name in llm_names:
+            routed = self._provider_analyses(llm_name, self.analises_esperadas)
+            if llm_name in self.BATCH_API_PROVIDERS:
+                provider_prompts = {cid: entry for cid, entry in prompts.items() if entry[1] in routed}
+                tasks.append(self._analyze_provider_batch(llm_name, leads, provider_prompts))
+            else:
+                tasks.append(self._analyze_provider_online(llm_name, leads, routed))
+        
+        logger.info(f"Executando análise em lote de {len(leads)} leads com {len(tasks)} LLMs: {llm_names}")
+        outcomes = await gather_settled(tasks)
+        
+        results = [{} for _ in leads]
+        for llm_name, outcome in zip(llm_names, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Erro em {llm_name}: {outcome!r}")
+                routed = self._provider_analyses(llm_name, self.analises_esperadas)
+                for result, (lead_data, _) in zip(results, leads):
+                    result.update(self._generate_fallback_analysis_all(lead_data, routed))
+            else:
+                for result, fields in zip(results, outcome):
+                    result.update(fields)
+        
+        return results
+    
+    async def _analyze_provider_online(self, llm_name: str, leads: List[tuple],
+                                       analyses: Optional[List[str]] = None) -> List[Dict]:
+        """Análises de vários leads com um provider sem API de lote"""
+        responses = await gather_settled(
+            self.analyze_with_llm(lead_data, scraped_data, llm_name, analyses)
+            for lead_data, scraped_data in leads
+        )
+        
+        results = []
+        for (lead_data, _), response in zip(leads, responses):
+            if isinstance(response, BaseException):
+                logger.error(f"Erro em {llm_name}: {response!r}")
+                results.append(self._generate_fallback_analysis_all(lead_data, analyses))
+            else:
+                results.append(response)
+        return results
+    
+    async def _analyze_provider_batch(self, llm_name: str, leads: List[tuple], prompts: Dict) -> List[Dict]:
+        """Análises de vários leads com um provider via API de lote"""
+        provider = self.providers[llm_name]
+        submit = self._submit_openai_batch if provider['type'] == 'openai' else self._submit_claude_batch
+        
+        # Enviar cada prompt distinto uma única vez (custom_id representante)
+        representative = {}
+        for cid, (_, _, prompt) in prompts.items():
+            representative.setdefault(prompt, cid)
+        
+        # Dividir em jobs dentro do limite de requisições por lote
+        custom_ids = list(representative.values())
+        chunks = [
+            {cid: prompts[cid][2] for cid in custom_ids[start:start + self.BATCH_MAX_REQUESTS]}
+            for start in range(0, len(custom_ids), self.BATCH_MAX_REQUESTS)
+        ]
+        budgets = {cid: self._max_tokens(prompts[cid][1]) for cid in custom_ids}
+        unique_texts = {}
+        for chunk_texts in await asyncio.gather(*[submit(provider, chunk, budgets) for chunk in chunks]):
+            unique_texts.update(chunk_texts)
+        
+        texts = {}
+        for cid, (_, _, prompt) in prompts.items():
+            text = unique_texts.get(representative[prompt])
+            if text is not None:
+                texts[cid] = text
+        
+        results = [{} for _ in leads]
+        for cid, (i, analise, _) in prompts.items():
+            text = texts.get(cid)
+            if text is None:
+                text = self._generate_fallback_analysis(analise, leads[i][0])
+            results[i][f'gdr_llm_{llm_name}_{analise}'] = text
+        
+        logger.info(f"LLM {llm_name}: {len(texts)}/{len(prompts)} análises geradas via API de lote")
+        return results
+    
+    async def _submit_openai_batch(self, provider: Dict, prompts: Dict[str, str],
+                                   max_tokens: Optional[Dict[str, int]] = None) -> Dict[str, str]:
+        """
+        Envia um job para a OpenAI Batch API e aguarda o resultado
+        
+        Args:
+            provider: Configuração do provider
+            prompts: Dict custom_id -> prompt
+            max_tokens: Dict custom_id -> limite de tokens (ausente = MAX_TOKENS)
+            
+        Returns:
+            Dict custom_id -> texto da resposta (apenas requisições bem-sucedidas)
+        """
+        base_url = provider['endpoint'].rsplit('/chat/completions', 1)[0]
+        headers = {'Authorization': f"Bearer {provider['api_key']}"}
+        
+        # 1. Upload do arquivo JSONL de requisições
+        lines = [
+            _dumps({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self._openai_payload(prompt, provider,
+                                             (max_tokens or {}).get(custom_id, self.MAX_TOKENS))
+            })
+            for custom_id, prompt in prompts.items()
+        ]
+        form = aiohttp.FormData()
+        form.add_field('purpose', 'batch')
+        form.add_field('file', b'\n'.join(lines),
+                       filename='gdr_batch.jsonl', content_type='application/jsonl')
+        
+        async with self.session.post(f"{base_url}/files", headers=headers, data=form) as response:
+            if response.status != 200:
+                raise Exception(f"Erro ao enviar arquivo de lote {provider['model']}: {await response.text()}")
+            input_file_id = (await response.json())['id']
+        
+        # 2. Criar o job
+        async with self.session.post(f"{base_url}/batches", headers=headers, json={
+            'input_file_id': input_file_id,
+            'endpoint': '/v1/chat/completions',
+            'completion_window': '24h'
+        }) as response:
+            if response.status != 200:
+                raise Exception(f"Erro ao criar lote {provider['model']}: {await response.text()}")
+            batch = await response.json()
+        
+        logger.info(f"Lote OpenAI {batch['id']} criado com {len(prompts)} requisições")
+        
+        # 3. Aguardar conclusão
+        batch = await self._poll_batch(
+            f"{base_url}/batches/{batch['id']}", headers,
+            lambda b: b.get('status') in ('completed', 'failed', 'expired', 'cancelled')
+        )
+        if not batch.get('output_file_id'):
+            raise Exception(f"Lote OpenAI {batch['id']} terminou com status {batch.get('status')}")
+        
+        # 4. Baixar respostas
+        async with self.session.get(f"{base_url}/files/{batch['output_file_id']}/content", headers=headers) as response:
+            if response.status != 200:
+                raise Exception(f"Erro ao baixar resultado do lote {batch['id']}: {await response.text()}")
+            content = await response.text()
+        
+        texts = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            entry = _loads(line)
+            body = (entry.get('response') or {}).get('body') or {}
+            if (entry.get('response') or {}).get('status_code') == 200 and body.get('choices'):
+                texts[entry['custom_id']] = body['choices'][0]['message']['content'].strip()
+        return texts
+    
+    async def _submit_claude_batch(self, provider: Dict, prompts: Dict[str, str],
+                                   max_tokens: Optional[Dict[str, int]] = None) -> Dict[str, str]:
+        """
+        Envia um job para a Anthropic Message Batches API e aguarda o resultado
+        
+        Args:
+            provider: Configuração do provider
+            prompts: Dict custom_id -> prompt
+            max_tokens: Dict custom_id -> limite de tokens (ausente = MAX_TOKENS)
+            
+        Returns:
+            Dict custom_id -> texto da resposta (apenas requisições bem-sucedidas)
+        """
+        base_url = f"{provider['endpoint']}/batches"
+        headers = {
+            'x-api-key': provider['api_key'],
+            'anthropic-version': provider['version'],
+            'Content-Type': 'application/json'
+        }
+        
+        # 1. Criar o job
+        requests = [
+            {'custom_id': custom_id,
+             'params': self._claude_payload(prompt, provider,
+                                            (max_tokens or {}).get(custom_id, self.MAX_TOKENS))}
+            for custom_id, prompt in prompts.items()
+        ]
+        async with self.session.post(base_url, headers=headers, data=_dumps({'requests': requests})) as response:
+            if response.status != 200:
+                raise Exception(f"Erro ao criar lote Claude: {await response.text()}")
+            batch = await response.json()
+        
+        logger.info(f"Lote Claude {batch['id']} criado com {len(prompts)} requisições")
+        
+        # 2. Aguardar conclusão
+        batch = await self._poll_batch(
+            f"{base_url}/{batch['id']}", headers,
+            lambda b: b.get('processing_status') == 'ended'
+        )
+        if not batch.get('results_url'):
+            raise Exception(f"Lote Claude {batch['id']} terminou sem resultados")
+        
+        # 3. Baixar respostas
+        async with self.session.get(batch['results_url'], headers=headers) as response:
+            if response.status != 200:
+                raise Exception(f"Erro ao baixar resultado do lote {batch['id']}: {await response.text()}")
+            content = await response.text()
+        
+        texts = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            entry = _loads(line)
+            result = entry.get('result') or {}
+            if result.get('type') == 'succeeded':
+                texts[entry['custom_id']] = result['message']['content'][0]['text'].strip()
+        return texts
+    
+    async def _poll_batch(self, url: str, headers: Dict, is_done) -> Dict:
+        """
+        Consulta o status de um lote com backoff exponencial até a conclusão
+        
+        Args:
+            url: URL de status do lote
+            headers: Headers de autenticação
+            is_done: Função que recebe o status e indica se o lote terminou
+            
+        Returns:
+            Último status do lote
+        """
+        delay = self.BATCH_POLL_INITIAL
+        waited = 0.0
+        
+        while True:
+            async with self.session.get(url, headers=headers) as response:
+                if response.status != 200:
+                    raise Exception(f"Erro ao consultar lote: {await response.text()}")
+                batch = await response.json()
+            
+            if is_done(batch):
+                return batch
+            if waited >= self.BATCH_MAX_WAIT:
+                raise TimeoutError(f"Lote {batch.get('id')} não concluído em {self.BATCH_MAX_WAIT / 3600:.0f}h")
+            
+            logger.info(f"Lote {batch.get('id')} em andamento - nova consulta em {delay:.0f}s")
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = min(delay * 2, self.BATCH_POLL_MAX)
+    
     def calculate_consensus(self, all_llm_results: Dict) -> Dict:
         """Calcula consenso entre múltiplos LLMs"""
-        consensus = {}
+        return self.calculate_consensus_batch([all_llm_results])[0]
+    
+    def calculate_consensus_batch(self, all_llm_results: List[Dict]) -> List[Dict]:
+        """
+        Calcula o consenso entre os LLMs de vários leads de uma vez; os scores
+        numéricos de todos os leads são agregados numa única matriz
+        
+        Args:
+            all_llm_results: Resultados dos leads com os campos gdr_llm_<provider>_<análise>
+            
+        Returns:
+            Lista de dicts gdr_concenso_<análise>, na ordem de all_llm_results
+        """
+        consensus = [{} for _ in all_llm_results]
+        llm_names = list(self.providers.keys())
         
-        # Agrupar resultados por tipo de análise
         for analise in self.analises_esperadas:
-            values = []
-            for llm_name in self.providers.keys():
-                field_name = f'gdr_llm_{llm_name}_{analise}'
-                if field_name in all_llm_results:
-                    values.append(all_llm_results[field_name])
+            field_names = [f'gdr_llm_{llm_name}_{analise}' for llm_name in llm_names]
+            consensus_field = f'gdr_concenso_{analise}'
             
             # Calcular consenso baseado no tipo de análise
-            if 'score' in analise and values:
-                # Para scores, calcular média
-                try:
-                    scores = [float(v) for v in values if v.isdigit()]
-                    consensus[f'gdr_concenso_{analise}'] = str(int(sum(scores) / len(scores))) if scores else "50"
-                except:
-                    consensus[f'gdr_concenso_{analise}'] = "50"
-            elif values:
-                # Para textos, escolher o mais comum ou o primeiro
-                from collections import Counter
-                most_common = Counter(values).most_common(1)
-                consensus[f'gdr_concenso_{analise}'] = most_common[0][0] if most_common else values[0]
-            else:
-                consensus[f'gdr_concenso_{analise}'] = "Dados insuficientes"
+            if 'score' in analise:
+                # Para scores, média dos valores numéricos (matriz leads x providers)
+                scores = np.fromiter(
+                    (_score_value(result.get(field)) for result in all_llm_results for field in field_names),
+                    dtype=np.float64, count=len(all_llm_results) * len(field_names)
+                ).reshape(len(all_llm_results), len(field_names))
+                means = _consensus_scores_batch(scores)
+            elif analise in CATEGORY_IDS:
+                votes = self._category_votes(all_llm_results, field_names, CATEGORY_IDS[analise])
+            
+            for i, result in enumerate(all_llm_results):
+                values = [result[field] for field in field_names if field in result]
+                if not values:
+                    consensus[i][consensus_field] = "Dados insuficientes"
+                elif analise in CATEGORY_IDS and votes[i] is not None:
+                    consensus[i][consensus_field] = votes[i]
+                elif 'score' in analise:
+                    consensus[i][consensus_field] = (
+                        DEFAULT_CONSENSUS_SCORE if np.isnan(means[i]) else str(int(means[i]))
+                    )
+                else:
+                    # Para textos, escolher o mais comum
+                    consensus[i][consensus_field] = Counter(values).most_common(1)[0][0]
+        
+        return consensus
+    
+    @staticmethod
+    def _category_votes(all_llm_results: List[Dict], field_names: List[str],
+                        category_ids: Dict[str, int]) -> List[Optional[str]]:
+        """
+        Categoria mais votada de cada lead por contagem de ids (empate: a que
+        aparece primeiro, como Counter.most_common)
+        
+        Args:
+            all_llm_results: Resultados dos leads
+            field_names: Campo da análise de cada provider
+            category_ids: Categoria -> id
+            
+        Returns:
+            Categoria vencedora de cada lead; None quando o lead tem alguma
+            resposta fora das categorias (consenso pelo caminho de texto livre)
+        """
+        categories = list(category_ids)
+        # -1: provider sem resposta; -2: resposta fora das categorias
+        ids = np.array([
+            [category_ids.get(result[field], -2) if field in result else -1 for field in field_names]
+            for result in all_llm_results
+        ], dtype=np.int64).reshape(len(all_llm_results), len(field_names))
+        
+        onehot = ids[:, :, None] == np.arange(len(categories))
+        counts = onehot.sum(axis=1)
+        first = np.where(onehot, np.arange(len(field_names))[None, :, None], len(field_names)).min(axis=1)
+        winners = (counts * (len(field_names) + 1) - first).argmax(axis=1)
         
-        return consensus
\ No newline at end of file
+        valid = ~(ids == -2).any(axis=1) & (counts.sum(axis=1) > 0)
+        return [categories[w] if ok else None for w, ok in zip(winners, valid)]
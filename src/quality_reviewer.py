@@ -4,6 +4,7 @@ Quality Reviewer Agent - Sistema de revisão e análise de qualidade
 Analisa dados coletados, identifica problemas e sugere melhorias
 """
 
+import re
 import json
 import logging
 from typing import Dict, List, Any, Optional, Tuple
@@ -14,6 +15,9 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Sequências de caracteres não numéricos (comparação telefone/WhatsApp)
+NON_DIGITS = re.compile(r'\D+')
+
 
 @dataclass
 class QualityMetric:
@@ -312,8 +316,8 @@ class QualityReviewer:
         
         # Telefone/WhatsApp consistente
         if data.get('gdr_concenso_telefone') and data.get('gdr_concenso_whatsapp'):
-            phone = ''.join(filter(str.isdigit, str(data['gdr_concenso_telefone'])))
-            whats = ''.join(filter(str.isdigit, str(data['gdr_concenso_whatsapp'])))
+            phone = NON_DIGITS.sub('', str(data['gdr_concenso_telefone']))
+            whats = NON_DIGITS.sub('', str(data['gdr_concenso_whatsapp']))
             if phone and whats and phone != whats:
                 if not whats.endswith(phone) and not phone.endswith(whats):
                     issues.append("Telefone e WhatsApp não correspondem")
@@ -466,21 +470,25 @@ class QualityReviewer:
     
     def _generate_improvement_suggestions(self, report: QualityReport) -> List[str]:
         """Gera sugestões de melhoria baseadas no score geral"""
+        return self._score_suggestions(report.overall_score)
+    
+    def _score_suggestions(self, overall_score: float) -> List[str]:
+        """Sugestões de melhoria para um score geral"""
         suggestions = []
         
-        if report.overall_score < self.thresholds['critical']:
+        if overall_score < self.thresholds['critical']:
             suggestions.append("⚠️ CRÍTICO: Re-executar processamento completo com todas as APIs")
             suggestions.append("Verificar conectividade e configuração de APIs")
             
-        elif report.overall_score < self.thresholds['poor']:
+        elif overall_score < self.thresholds['poor']:
             suggestions.append("Ativar retry automático para scrapers que falharam")
             suggestions.append("Considerar usar scrapers alternativos")
             
-        elif report.overall_score < self.thresholds['fair']:
+        elif overall_score < self.thresholds['fair']:
             suggestions.append("Executar scrapers de enriquecimento adicionais")
             suggestions.append("Verificar quality de dados de entrada")
             
-        elif report.overall_score < self.thresholds['good']:
+        elif overall_score < self.thresholds['good']:
             suggestions.append("Otimizar configuração de scrapers")
             suggestions.append("Adicionar validação de dados")
             
@@ -499,36 +507,344 @@ class QualityReviewer:
         Returns:
             Dict com análise agregada
         """
-        reports = []
+        _, aggregated = self.review_dataframe(leads_df)
+        return aggregated
+    
+    def review_dataframe(self, leads_df: pd.DataFrame,
+                         records: Optional[List[Dict]] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Revisa todos os leads de um DataFrame com operações por coluna
+        Mesmos critérios de review_lead, sem criar um dict por linha
+        
+        Args:
+            leads_df: DataFrame com leads (células vazias como NaN/None/'')
+            records: Dicts de origem de leads_df, na mesma ordem; os critérios
+                que contam campos (enriquecimento, LLM) consideram as chaves
+                presentes em cada dict, como review_lead, inclusive com valor
+                None. None = conta as células não nulas
+            
+        Returns:
+            Tupla (DataFrame com as colunas gdr_quality_* no mesmo índice,
+            análise agregada no formato de review_batch)
+        """
+        df = leads_df.reset_index(drop=True)
+        n = len(df)
+        issues = [[] for _ in range(n)]
+        suggestions = [[] for _ in range(n)]
+        
+        def flag(mask, issue=None, suggestion=None):
+            """Acrescenta issue/sugestão (str ou função do índice) às linhas da máscara"""
+            for idx in np.flatnonzero(np.asarray(mask, dtype=bool)):
+                if issue is not None:
+                    issues[idx].append(issue(idx) if callable(issue) else issue)
+                if suggestion is not None:
+                    suggestions[idx].append(suggestion(idx) if callable(suggestion) else suggestion)
+        
+        # Presença dos campos ponderados calculada em uma única passada; demais
+        # colunas sob demanda, uma vez por revisão (vários critérios repetem colunas)
+        presence = dict(self._presence(
+            df, [*self.critical_fields, *self.important_fields, *self.optional_fields]
+        ).items())
+        
+        def filled(column: str) -> pd.Series:
+            """Máscara de células preenchidas da coluna (memorizada)"""
+            if column not in presence:
+                presence[column] = self._filled(df, column)
+            return presence[column]
+        
+        keys = self._key_presence(df, records)
+        
+        metrics = [
+            (self._score_completeness(df, filled, flag), 2.0),
+            (self._score_accuracy(df, filled, flag), 1.5),
+            (self._score_consistency(df, filled, flag), 1.0),
+            (self._score_enrichment(df, filled, flag, keys), 1.5),
+            (self._score_scrapers(df, filled, flag), 1.0),
+            (self._score_llm_analysis(df, filled, flag, keys), 0.8),
+        ]
         
-        for idx, row in leads_df.iterrows():
-            lead_data = row.to_dict()
-            report = self.review_lead(lead_data)
-            reports.append(report)
+        # Calcular score geral
+        total_weight = sum(weight for _, weight in metrics)
+        overall = sum(score * weight for score, weight in metrics) / total_weight
+        overall = overall.round(2)
+        
+        # Remover duplicatas e adicionar sugestões baseadas no score geral
+        issues = [list(dict.fromkeys(row)) for row in issues]
+        suggestions = [
+            list(dict.fromkeys(row)) + self._score_suggestions(score)
+            for row, score in zip(suggestions, overall)
+        ]
         
-        # Agregar estatísticas
-        scores = [r.overall_score for r in reports]
+        scores = pd.DataFrame({
+            'gdr_quality_overall_score': overall,
+            'gdr_quality_completeness_score': metrics[0][0],
+            'gdr_quality_accuracy_score': metrics[1][0],
+            'gdr_quality_consistency_score': metrics[2][0],
+            'gdr_quality_enrichment_score': metrics[3][0],
+            'gdr_quality_issues': issues,
+            'gdr_quality_suggestions': suggestions,
+        })
+        scores.index = leads_df.index
+        
+        return scores, self.summarize_reviews(scores)
+    
+    def summarize_reviews(self, scores_df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Agrega scores já calculados (colunas gdr_quality_*) sem revisar de novo
         
-        aggregated = {
-            'total_leads': len(reports),
+        Args:
+            scores_df: DataFrame com gdr_quality_overall_score e, opcionalmente,
+                gdr_quality_issues/gdr_quality_suggestions como listas
+                
+        Returns:
+            Dict com análise agregada
+        """
+        scores = pd.to_numeric(scores_df.get('gdr_quality_overall_score', pd.Series(dtype=float)),
+                               errors='coerce').fillna(0).to_numpy()
+        if len(scores) == 0:
+            scores = np.zeros(1)
+        
+        def most_common(column: str) -> List[Tuple[str, int]]:
+            if column not in scores_df.columns:
+                return []
+            exploded = scores_df[column].map(lambda v: v if isinstance(v, list) else []).explode().dropna()
+            return list(exploded.value_counts(sort=True).head(10).items())
+        
+        quality_columns = [col for col in scores_df.columns if col.startswith('gdr_quality_')]
+        
+        return {
+            'total_leads': len(scores_df),
             'average_score': np.mean(scores),
             'median_score': np.median(scores),
             'min_score': np.min(scores),
             'max_score': np.max(scores),
             'std_dev': np.std(scores),
             'distribution': {
-                'excellent': sum(1 for s in scores if s >= self.thresholds['excellent']),
-                'good': sum(1 for s in scores if self.thresholds['good'] <= s < self.thresholds['excellent']),
-                'fair': sum(1 for s in scores if self.thresholds['fair'] <= s < self.thresholds['good']),
-                'poor': sum(1 for s in scores if self.thresholds['poor'] <= s < self.thresholds['fair']),
-                'critical': sum(1 for s in scores if s < self.thresholds['poor'])
+                'excellent': int((scores >= self.thresholds['excellent']).sum()),
+                'good': int(((scores >= self.thresholds['good']) & (scores < self.thresholds['excellent'])).sum()),
+                'fair': int(((scores >= self.thresholds['fair']) & (scores < self.thresholds['good'])).sum()),
+                'poor': int(((scores >= self.thresholds['poor']) & (scores < self.thresholds['fair'])).sum()),
+                'critical': int((scores < self.thresholds['poor']).sum())
             },
-            'common_issues': self._aggregate_issues(reports),
-            'top_suggestions': self._aggregate_suggestions(reports),
-            'individual_reports': [r.to_dict() for r in reports]
+            'common_issues': most_common('gdr_quality_issues'),
+            'top_suggestions': most_common('gdr_quality_suggestions'),
+            'individual_reports': scores_df[quality_columns].to_dict(orient='records')
         }
+    
+    @staticmethod
+    def _presence(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        """
+        Matriz de células preenchidas (equivale a `data.get(field)` verdadeiro)
+        de várias colunas de uma vez; colunas ausentes ficam False
+        """
+        values = df.reindex(columns=columns)
+        present = values.notna()
+        text = values.astype(object).where(present, '').astype(str).apply(lambda col: col.str.strip())
+        return present & (text != '') & ~values.isin([0, False])
+    
+    @staticmethod
+    def _key_presence(df: pd.DataFrame, records: Optional[List[Dict]]) -> pd.DataFrame:
+        """
+        Matriz de campos presentes em cada lead (equivale a `campo in data`):
+        chaves dos dicts de origem, mesmo com valor None, ou células não nulas
+        """
+        if records is None:
+            return df.notna()
+        return pd.DataFrame([dict.fromkeys(record, True) for record in records],
+                            columns=df.columns).notna()
+    
+    @classmethod
+    def _filled(cls, df: pd.DataFrame, column: str) -> pd.Series:
+        """Máscara de células preenchidas de uma coluna"""
+        if column not in df.columns:
+            return pd.Series(False, index=df.index)
+        return cls._presence(df, [column])[column]
+    
+    def _text(self, df: pd.DataFrame, column: str) -> pd.Series:
+        """Coluna como texto ('' quando ausente ou NaN)"""
+        if column not in df.columns:
+            return pd.Series('', index=df.index)
+        values = df[column]
+        return values.astype(object).where(values.notna(), '').astype(str)
+    
+    def _score_completeness(self, df: pd.DataFrame, filled, flag) -> pd.Series:
+        """Versão por coluna de _assess_completeness"""
+        filled_critical = pd.Series(0, index=df.index)
+        for field_name in self.critical_fields:
+            present = filled(field_name)
+            filled_critical += present
+            suggestion = None
+            if 'email' in field_name:
+                suggestion = "Executar scraping de website para encontrar email"
+            elif 'telefone' in field_name or 'whatsapp' in field_name:
+                suggestion = "Verificar Google Places ou Instagram para contato"
+            flag(~present, f"Campo crítico ausente: {field_name}", suggestion)
+        
+        filled_important = sum((filled(f) for f in self.important_fields), pd.Series(0, index=df.index))
+        filled_optional = sum((filled(f) for f in self.optional_fields), pd.Series(0, index=df.index))
+        
+        critical_score = filled_critical / len(self.critical_fields) * 100 if self.critical_fields else 100
+        important_score = filled_important / len(self.important_fields) * 100 if self.important_fields else 100
+        optional_score = filled_optional / len(self.optional_fields) * 100 if self.optional_fields else 100
         
-        return aggregated
+        score = (critical_score * 0.5) + (important_score * 0.3) + (optional_score * 0.2)
+        
+        low = score < 60
+        flag(low, suggestion="Considerar re-executar scrapers com retry automático")
+        flag(low, suggestion="Verificar se APIs estão configuradas corretamente")
+        
+        return score.astype(float).round(2)
+    
+    def _score_accuracy(self, df: pd.DataFrame, filled, flag) -> pd.Series:
+        """Versão por coluna de _assess_accuracy"""
+        score = pd.Series(100.0, index=df.index)
+        
+        # Validar email
+        email = self._text(df, 'gdr_concenso_email')
+        invalid = filled('gdr_concenso_email') & ~email.str.match(self.validation_patterns['email'])
+        flag(invalid, lambda i: f"Email inválido: {email.iat[i]}", "Verificar formato do email coletado")
+        score -= invalid * 10
+        
+        # Validar CNPJ
+        cnpj = self._text(df, 'original_cnpj').str.strip()
+        invalid = filled('original_cnpj') & ~cnpj.str.match(self.validation_patterns['cnpj'])
+        flag(invalid, lambda i: f"CNPJ em formato incorreto: {cnpj.iat[i]}",
+             "Formatar CNPJ para padrão XX.XXX.XXX/XXXX-XX")
+        score -= invalid * 5
+        
+        # Validar URLs
+        for field_name in ['gdr_concenso_url', 'gdr_instagram_url', 'gdr_facebook_url']:
+            invalid = filled(field_name) & ~self._text(df, field_name).str.startswith('http')
+            flag(invalid, f"URL sem protocolo: {field_name}", f"Adicionar https:// ao {field_name}")
+            score -= invalid * 3
+        
+        # Validar números
+        if 'gdr_instagram_followers' in df.columns:
+            has_followers = filled('gdr_instagram_followers')
+            followers = pd.to_numeric(df['gdr_instagram_followers'], errors='coerce')
+            not_numeric = has_followers & followers.isna()
+            negative = has_followers & (followers < 0)
+            flag(negative, "Número de seguidores negativo")
+            flag(not_numeric, "Número de seguidores não é numérico")
+            score -= (negative | not_numeric) * 5
+        
+        return score.clip(lower=0).round(2)
+    
+    def _score_consistency(self, df: pd.DataFrame, filled, flag) -> pd.Series:
+        """Versão por coluna de _assess_consistency"""
+        score = pd.Series(100.0, index=df.index)
+        
+        # Instagram username consistente
+        if 'gdr_instagram_username' in df.columns and 'gdr_instagram_id' in df.columns:
+            inconsistent = (filled('gdr_instagram_username') & filled('gdr_instagram_id')
+                            & (df['gdr_instagram_username'] != df['gdr_instagram_id']))
+            flag(inconsistent, "Inconsistência nos dados do Instagram")
+            score -= inconsistent * 10
+        
+        # Telefone/WhatsApp consistente
+        both = filled('gdr_concenso_telefone') & filled('gdr_concenso_whatsapp')
+        if both.any():
+            phone = self._text(df, 'gdr_concenso_telefone').str.replace(NON_DIGITS, '', regex=True)
+            whats = self._text(df, 'gdr_concenso_whatsapp').str.replace(NON_DIGITS, '', regex=True)
+            suffix_match = pd.Series(
+                [w.endswith(p) or p.endswith(w) for p, w in zip(phone, whats)], index=df.index, dtype=bool
+            )
+            mismatch = both & (phone != '') & (whats != '') & (phone != whats) & ~suffix_match
+            flag(mismatch, "Telefone e WhatsApp não correspondem",
+                 "Verificar se telefone e WhatsApp são do mesmo número")
+            score -= mismatch * 5
+        
+        # Nome consistente (primeiros 5 caracteres)
+        both = filled('original_nome') & filled('gdr_google_places_name')
+        if both.any():
+            name1 = self._text(df, 'original_nome').str.lower().str.replace(' ', '').str[:5]
+            name2 = self._text(df, 'gdr_google_places_name').str.lower().str.replace(' ', '').str[:5]
+            mismatch = both & (name1 != name2)
+            flag(mismatch, "Nome inconsistente entre fontes")
+            score -= mismatch * 8
+        
+        return score.clip(lower=0).round(2)
+    
+    def _score_enrichment(self, df: pd.DataFrame, filled, flag, keys: pd.DataFrame) -> pd.Series:
+        """Versão por coluna de _assess_enrichment"""
+        # Campos presentes por linha (colunas de qualidade são resultado da revisão)
+        enriched_cols = [c for c in df.columns if c.startswith('gdr_') and not c.startswith('gdr_quality_')]
+        original_cols = [c for c in df.columns if c.startswith('original_')]
+        enriched = keys[enriched_cols].sum(axis=1) if enriched_cols else 0
+        original = keys[original_cols].sum(axis=1) if original_cols else 0
+        
+        score = (enriched / (original + 1) * 20).clip(upper=100)
+        if not isinstance(score, pd.Series):
+            score = pd.Series(float(score), index=df.index)
+        
+        flag(~filled('gdr_instagram_username'), "Instagram não encontrado",
+             "Buscar Instagram via Google Search")
+        flag(~filled('gdr_facebook_url'), "Facebook não encontrado",
+             "Usar estratégias alternativas de busca do Facebook")
+        flag(~filled('gdr_linktree_detected') & filled('gdr_instagram_bio'),
+             suggestion="Verificar bio do Instagram para Linktree")
+        
+        # Bonus por dados valiosos
+        for field_name in ['gdr_concenso_email', 'gdr_concenso_whatsapp',
+                           'gdr_instagram_followers', 'gdr_google_places_rating']:
+            score = score + filled(field_name) * 5
+        
+        return score.astype(float).clip(upper=100).round(2)
+    
+    def _score_scrapers(self, df: pd.DataFrame, filled, flag) -> pd.Series:
+        """Versão por coluna de _assess_scrapers"""
+        scrapers_status = {
+            'Instagram': filled('gdr_instagram_id'),
+            'Facebook': filled('gdr_facebook_url'),
+            'Website': filled('gdr_cwral4ai_email') | filled('gdr_cwral4ai_telefone'),
+            'Google Search': filled('gdr_google_search_engine_url'),
+            'Google Places': filled('gdr_google_places_place_id'),
+            'Linktree': filled('gdr_linktree_username')
+        }
+        scraper_suggestions = {
+            'Instagram': "Verificar se Instagram URL está correto ou usar busca",
+            'Facebook': "Ativar estratégias alternativas do Facebook scraper",
+            'Website': "Verificar se website está acessível e tem dados de contato"
+        }
+        
+        successful = pd.Series(0, index=df.index)
+        for scraper, success in scrapers_status.items():
+            successful += success
+            flag(~success, f"{scraper} scraper não retornou dados", scraper_suggestions.get(scraper))
+        
+        return (successful / len(scrapers_status) * 100).astype(float).round(2)
+    
+    def _score_llm_analysis(self, df: pd.DataFrame, filled, flag, keys: pd.DataFrame) -> pd.Series:
+        """Versão por coluna de _assess_llm_analysis"""
+        score = pd.Series(100.0, index=df.index)
+        
+        for provider in ['openai', 'gemini', 'deepseek', 'claude', 'zhipuai']:
+            provider_cols = [c for c in df.columns if f'llm_{provider}' in c]
+            if provider_cols:
+                values = df[provider_cols]
+                present = keys[provider_cols]
+                has_fields = present.any(axis=1)
+                # Chave presente com valor nulo (None no dict de origem) também é vazia
+                empty = (present & (values.isna() | ~values.astype(bool)
+                                    | (values == 'Análise em processamento'))).sum(axis=1)
+            else:
+                has_fields = pd.Series(False, index=df.index)
+                empty = pd.Series(0, index=df.index)
+            
+            many_empty = has_fields & (empty > 5)
+            flag(many_empty, lambda i: f"LLM {provider} tem {empty.iat[i]} análises vazias")
+            score -= many_empty * 10
+            
+            flag(~has_fields, f"LLM {provider} não executou análises",
+                 f"Verificar configuração da API key do {provider}")
+            score -= ~has_fields * 15
+        
+        # Verificar consenso
+        no_consensus = ~filled('gdr_concenso_synergy_score_categoria')
+        flag(no_consensus, "Consenso entre LLMs não foi calculado", "Executar análise de consenso multi-LLM")
+        score -= no_consensus * 20
+        
+        return score.clip(lower=0).round(2)
     
     def _aggregate_issues(self, reports: List[QualityReport]) -> List[Tuple[str, int]]:
         """Agrega issues mais comuns"""
@@ -14,6 +14,8 @@ from datetime import datetime
 import time
 import re
 
+from .http_session import RateLimitError, session_scope
+
 logger = logging.getLogger(__name__)
 
 
@@ -86,6 +88,7 @@ class ApifyRealScrapers:
             logger.warning(f"Instagram: Nenhum resultado para @{username}")
                 
         except Exception as e:
+            self._raise_if_rate_limited(e)
             logger.error(f"Instagram: Erro ao buscar dados de {username}: {e}")
         
         return self._empty_instagram_data()
@@ -157,6 +160,7 @@ class ApifyRealScrapers:
             logger.warning(f"Facebook: Nenhum resultado para {profile_url}")
         
         except Exception as e:
+            self._raise_if_rate_limited(e)
             logger.error(f"Facebook: Erro ao buscar dados de {profile_url}: {e}")
         
         return self._empty_facebook_data()
@@ -233,10 +237,18 @@ class ApifyRealScrapers:
             logger.warning(f"Linktree: Nenhum resultado para {username_or_url}")
         
         except Exception as e:
+            self._raise_if_rate_limited(e)
             logger.error(f"Linktree: Erro ao buscar dados de {username_or_url}: {e}")
         
         return self._empty_linktree_data()
     
+    @staticmethod
+    def _raise_if_rate_limited(error: Exception):
+        """Propaga como RateLimitError as recusas por rate limit da API do Apify"""
+        # ApifyApiError do apify-client (após os retries internos do SDK)
+        if getattr(error, 'status_code', None) == 429:
+            raise RateLimitError(f"Apify: HTTP 429 ({error})") from error
+    
     def _extract_whatsapp(self, mobile: str) -> str:
         """Extrai WhatsApp do número de telefone"""
         if not mobile:
@@ -325,8 +337,8 @@ class ApifyRealScrapers:
 class WebScraperReal:
     """Scraper real de websites usando BeautifulSoup/requests"""
     
-    def __init__(self):
-        self.session = None
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        self.session = session
         self.timeout = 30
     
     async def scrape_website(self, url: str) -> Dict[str, Any]:
@@ -341,7 +353,7 @@ class WebScraperReal:
             from bs4 import BeautifulSoup
             import re
             
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.get(url, timeout=self.timeout) as response:
                     if response.status != 200:
                         logger.warning(f"Website scraper: Status {response.status} para {url}")
@@ -432,9 +444,10 @@ class WebScraperReal:
 class GoogleSearchEngineReal:
     """Scraper real usando Google Custom Search API"""
     
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
         self.api_key = os.getenv('GOOGLE_CSE_API_KEY')
         self.cse_id = os.getenv('GOOGLE_CSE_ID')
+        self.session = session
         
         if not self.api_key or not self.cse_id:
             logger.warning("Google Search: API key ou CSE ID não configurados")
@@ -466,8 +479,10 @@ class GoogleSearchEngineReal:
             
             logger.info(f"Google Search: Buscando '{query}'")
             
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.get(url, params=params) as response:
+                    if response.status == 429:
+                        raise RateLimitError("Google Search: HTTP 429")
                     if response.status != 200:
                         logger.error(f"Google Search: Status {response.status}")
                         return self._empty_search_data()
@@ -542,6 +557,8 @@ class GoogleSearchEngineReal:
                         'gdr_google_search_engine_youtube_url': youtube
                     }
         
+        except RateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Google Search: Erro ao buscar {company_name}: {e}")
         
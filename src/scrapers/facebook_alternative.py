@@ -13,6 +13,8 @@ import logging
 from typing import Dict, Any, Optional, List
 from urllib.parse import quote, urlparse
 
+from .http_session import session_scope
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,9 +23,14 @@ class FacebookAlternativeScraper:
     Scraper alternativo para Facebook usando múltiplas estratégias
     """
     
-    def __init__(self):
-        """Inicializa o scraper alternativo"""
-        self.session = None
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        """
+        Inicializa o scraper alternativo
+        
+        Args:
+            session: Sessão HTTP compartilhada (None = sessão por requisição)
+        """
+        self.session = session
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -112,7 +119,7 @@ class FacebookAlternativeScraper:
                 'num': 3
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.get(url, params=params) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -137,7 +144,7 @@ class FacebookAlternativeScraper:
             query = f'site:facebook.com "{company_name}" {location}'
             url = f"https://www.bing.com/search?q={quote(query)}"
             
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.get(url, headers=self.headers) as response:
                     if response.status == 200:
                         html = await response.text()
@@ -171,7 +178,7 @@ class FacebookAlternativeScraper:
                 'Referer': 'https://duckduckgo.com/'
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.get(url, headers=headers) as response:
                     if response.status == 200:
                         html = await response.text()
@@ -198,7 +205,7 @@ class FacebookAlternativeScraper:
         result = {}
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.get(url, headers=self.headers) as response:
                     if response.status == 200:
                         html = await response.text()
@@ -260,7 +267,7 @@ class FacebookAlternativeScraper:
         Verifica se URL do Facebook existe (sem necessitar login)
         """
         try:
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.head(url, headers=self.headers, allow_redirects=True) as response:
                     # Facebook retorna 200 mesmo para páginas que não existem
                     # mas redireciona para /login se a página não existe
@@ -284,7 +291,7 @@ class FacebookAlternativeScraper:
             # Tentar endpoint público (geralmente bloqueado, mas vale tentar)
             url = f"https://graph.facebook.com/{username}"
             
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.get(url) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -307,7 +314,7 @@ class FacebookAlternativeScraper:
         result = {}
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.get(url, headers=self.headers) as response:
                     if response.status == 200:
                         html = await response.text()
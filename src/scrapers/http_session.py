@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Sessão HTTP compartilhada entre os scrapers
+Reaproveita conexões TCP/TLS e cache de DNS entre leads em vez de abrir
+um ClientSession novo a cada requisição
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import aiohttp
+
+# Limites do pool de conexões compartilhado
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 20
+DNS_CACHE_TTL = 300  # segundos
+KEEPALIVE_TIMEOUT = 60  # segundos
+TOTAL_TIMEOUT = 60  # segundos
+
+
+class RateLimitError(Exception):
+    """
+    Recusa por rate limit (HTTP 429) de uma API externa
+
+    Os scrapers a propagam em vez de retornar dados vazios, para que o
+    SmartOrchestrator registre o 429 (pausa entre batches) e faça o retry.
+    """
+
+    status = 429
+
+
+def create_shared_session() -> aiohttp.ClientSession:
+    """
+    Cria a sessão HTTP compartilhada pelos scrapers
+
+    Deve ser chamada com um event loop em execução e fechada com
+    `await session.close()` ao final do processamento.
+
+    Returns:
+        ClientSession com pool de conexões e cache de DNS
+    """
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=TOTAL_TIMEOUT)
+    )
+
+
+@asynccontextmanager
+async def session_scope(session: Optional[aiohttp.ClientSession]) -> AsyncIterator[aiohttp.ClientSession]:
+    """
+    Usa a sessão compartilhada quando disponível; caso contrário abre uma
+    sessão temporária (comportamento dos scrapers usados isoladamente)
+
+    Args:
+        session: Sessão compartilhada ou None
+
+    Yields:
+        Sessão para a requisição
+    """
+    if session is not None and not session.closed:
+        yield session
+    else:
+        async with aiohttp.ClientSession() as temporary_session:
+            yield temporary_session
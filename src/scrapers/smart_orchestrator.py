@@ -5,6 +5,7 @@ Implementa retry automático, priorização e fallback strategies
 """
 
 import asyncio
+import copy
 import logging
 import time
 from typing import Dict, List, Any, Optional, Callable
@@ -15,6 +16,8 @@ import random
 import sys
 import os
 
+from asyncio_throttle import Throttler
+
 # Adicionar src ao path para imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 from src.utils.safe_print import SafeLogger
@@ -45,6 +48,7 @@ class ScraperTask:
     timeout: float = 30.0
     required: bool = False
     dependencies: List[str] = field(default_factory=list)
+    host: str = ''  # Host da API chamada (chave do rate limiter; '' = sem limite)
     
     def __hash__(self):
         return hash(self.name)
@@ -84,10 +88,26 @@ class SmartOrchestrator:
     Orquestrador inteligente de scrapers com retry e priorização
     """
     
+    # Limite de requisições por minuto por host (variável de ambiente, padrão)
+    HOST_RATE_LIMITS = {
+        'api.apify.com': ('APIFY_RPM', 60),
+        'www.googleapis.com': ('GOOGLE_CSE_RPM', 100),
+    }
+    
+    # Pausa adaptativa entre batches: média móvel exponencial da fração de
+    # tentativas recusadas com HTTP 429 (scrapers e LLMs)
+    RATE_LIMIT_EWMA_ALPHA = 0.2
+    PACING_MIN_RATIO = 0.05  # abaixo disso apenas a pausa mínima
+    PACING_MAX_DELAY = 2.0  # segundos (fração 429 = 100%)
+    # Pausa mínima: o scraper de websites acessa hosts arbitrários e não
+    # reporta 429, então não há sinal para dispensá-la por completo
+    PACING_MIN_DELAY = 0.5  # segundos
+    
     def __init__(self, 
                  max_concurrent: int = 5,
                  global_timeout: float = 300.0,
-                 retry_strategy: str = 'exponential'):
+                 retry_strategy: str = 'exponential',
+                 rate_limits: Optional[Dict[str, float]] = None):
         """
         Inicializa o orquestrador
         
@@ -95,28 +115,39 @@ class SmartOrchestrator:
             max_concurrent: Máximo de scrapers concorrentes
             global_timeout: Timeout global para todo o processamento
             retry_strategy: Estratégia de retry ('exponential', 'linear', 'fibonacci')
+            rate_limits: Requisições por minuto por host (None = HOST_RATE_LIMITS)
         """
         self.max_concurrent = max_concurrent
         self.global_timeout = global_timeout
         self.retry_strategy_name = retry_strategy
         
-        # Estatísticas
-        self.stats = {
-            'total_tasks': 0,
-            'successful': 0,
-            'failed': 0,
-            'retried': 0,
-            'timed_out': 0,
-            'skipped': 0,
-            'by_scraper': {},
-            'total_time': 0,
-            'retry_details': []
+        # Rate limiters por host, compartilhados por todas as execuções: as
+        # requisições são espaçadas antes de chegar ao limite do provider, em
+        # vez de esperar um 429 e cair no backoff
+        if rate_limits is None:
+            rate_limits = {
+                host: float(os.getenv(env_var, default))
+                for host, (env_var, default) in self.HOST_RATE_LIMITS.items()
+            }
+        self._limiters = {
+            host: Throttler(rate_limit=int(rpm), period=60.0)
+            for host, rpm in rate_limits.items() if rpm > 0
         }
         
+        # Estatísticas
+        self.stats = self._empty_stats()
+        
+        # Fração recente de respostas 429; dict compartilhado pelas cópias de
+        # execute_tasks para acumular entre leads
+        self._rate_limit_stats = {'ewma': 0.0}
+        
         # Resultados
         self.results = {}
         self.errors = {}
         
+        # Callback (nome, resultado ou None) chamado quando cada tarefa termina
+        self._on_complete = None
+        
         # Estratégia de retry
         self.retry_strategies = {
             'exponential': RetryStrategy.exponential_backoff,
@@ -128,16 +159,47 @@ class SmartOrchestrator:
             RetryStrategy.exponential_backoff
         )
     
-    async def execute_tasks(self, tasks: List[ScraperTask]) -> Dict[str, Any]:
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        """Estatísticas zeradas de uma execução"""
+        return {
+            'total_tasks': 0,
+            'successful': 0,
+            'failed': 0,
+            'retried': 0,
+            'timed_out': 0,
+            'skipped': 0,
+            'by_scraper': {},
+            'total_time': 0,
+            'retry_details': []
+        }
+    
+    async def execute_tasks(self, tasks: List[ScraperTask],
+                            on_complete: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
         """
         Executa tarefas com priorização e retry automático
         
+        Cada chamada usa resultados/erros/estatísticas próprios, de modo que
+        leads processados em sequência ou em paralelo não se misturam
+        
         Args:
             tasks: Lista de tarefas para executar
+            on_complete: Chamado com (nome da tarefa, resultado) assim que cada
+                tarefa termina, em ordem de conclusão; resultado é None em caso
+                de falha ou dependência não satisfeita
             
         Returns:
             Dict com resultados consolidados
         """
+        run = copy.copy(self)
+        run.results = {}
+        run.errors = {}
+        run.stats = self._empty_stats()
+        run._on_complete = on_complete
+        return await run._execute_run(tasks)
+    
+    async def _execute_run(self, tasks: List[ScraperTask]) -> Dict[str, Any]:
+        """Executa as tarefas sobre o estado desta execução (ver execute_tasks)"""
         start_time = time.time()
         
         # Ordenar por prioridade
@@ -177,8 +239,12 @@ class SmartOrchestrator:
         semaphore = asyncio.Semaphore(self.max_concurrent)
         
         async def run_with_semaphore(task):
-            async with semaphore:
-                await self._execute_single_task(task)
+            result = None
+            try:
+                async with semaphore:
+                    result = await self._execute_single_task(task)
+            finally:
+                self._notify_complete(task.name, result)
         
         # Executar todas as tarefas
         await asyncio.gather(
@@ -198,12 +264,20 @@ class SmartOrchestrator:
                 attempt_msg = f" (tentativa {task.retry_count + 1}/{task.max_retries + 1})" if task.retry_count > 0 else ""
                 logger.info(f"Executando {scraper_name}{attempt_msg}")
                 
+                # Aguardar vaga no rate limiter do host (fora do timeout da tarefa)
+                limiter = self._limiters.get(task.host)
+                if limiter:
+                    async with limiter:
+                        pass
+                
                 # Executar com timeout
                 result = await asyncio.wait_for(
                     task.function(*task.args, **task.kwargs),
                     timeout=task.timeout
                 )
                 
+                self.record_rate_limit(False)
+                
                 # Validar resultado
                 if self._is_valid_result(result):
                     self.results[scraper_name] = result
@@ -216,12 +290,14 @@ class SmartOrchestrator:
                     raise ValueError(f"Resultado inválido de {scraper_name}")
                 
             except asyncio.TimeoutError:
+                self.record_rate_limit(False)
                 logger.warning(f"Timeout em {scraper_name} após {task.timeout}s")
                 self.errors[scraper_name] = f"Timeout após {task.timeout}s"
                 self.stats['timed_out'] += 1
                 self._update_scraper_stats(scraper_name, 'timeout')
                 
             except Exception as e:
+                self.record_rate_limit(self._is_rate_limit_error(e))
                 logger.error(f"Erro em {scraper_name}: {e}")
                 self.errors[scraper_name] = str(e)
                 self._update_scraper_stats(scraper_name, 'error')
@@ -279,6 +355,7 @@ class SmartOrchestrator:
                     for task in remaining:
                         self.stats['skipped'] += 1
                         self._update_scraper_stats(task.name, 'skipped')
+                        self._notify_complete(task.name, None)
                 break
     
     async def _retry_critical_failures(self):
@@ -300,6 +377,48 @@ class SmartOrchestrator:
                 
                 await self._execute_single_task(retry_task)
     
+    @staticmethod
+    def _is_rate_limit_error(error: Exception) -> bool:
+        """
+        Verifica se o erro é uma recusa por rate limit (HTTP 429): status da
+        exceção (RateLimitError dos scrapers, ClientResponseError do aiohttp),
+        não o texto da mensagem, que pode conter "429" por outros motivos
+        """
+        return getattr(error, 'status', None) == 429
+    
+    def record_rate_limit(self, rate_limited: bool):
+        """
+        Atualiza a média móvel da fração de tentativas com HTTP 429; chamado
+        a cada tentativa dos scrapers e a cada requisição aos LLMs
+        
+        Args:
+            rate_limited: Se a tentativa foi recusada com HTTP 429
+        """
+        alpha = self.RATE_LIMIT_EWMA_ALPHA
+        stats = self._rate_limit_stats
+        stats['ewma'] = alpha * float(rate_limited) + (1 - alpha) * stats['ewma']
+    
+    def pacing_delay(self) -> float:
+        """
+        Pausa recomendada entre batches conforme a taxa recente de HTTP 429
+        
+        Returns:
+            Segundos de pausa (PACING_MIN_DELAY enquanto a taxa de 429 é baixa)
+        """
+        ratio = self._rate_limit_stats['ewma']
+        if ratio < self.PACING_MIN_RATIO:
+            return self.PACING_MIN_DELAY
+        return max(self.PACING_MIN_DELAY, self.PACING_MAX_DELAY * ratio)
+    
+    def _notify_complete(self, scraper_name: str, result: Any):
+        """Repassa a conclusão de uma tarefa ao callback de execute_tasks"""
+        if self._on_complete is None:
+            return
+        try:
+            self._on_complete(scraper_name, result)
+        except Exception as e:
+            logger.error(f"Erro no callback de conclusão de {scraper_name}: {e}")
+    
     def _is_valid_result(self, result: Any) -> bool:
         """Valida se o resultado é válido"""
         if result is None:
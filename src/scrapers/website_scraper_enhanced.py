@@ -15,6 +15,8 @@ from typing import Dict, Any, List, Optional, Union
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from .http_session import session_scope
+
 logger = logging.getLogger(__name__)
 
 # Tentar importar Selenium (opcional)
@@ -43,9 +45,14 @@ class EnhancedWebsiteScraper:
     Scraper melhorado que suporta sites estáticos e dinâmicos
     """
     
-    def __init__(self):
-        """Inicializa o scraper"""
-        self.session = None
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        """
+        Inicializa o scraper
+        
+        Args:
+            session: Sessão HTTP compartilhada (None = sessão por requisição)
+        """
+        self.session = session
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -155,7 +162,7 @@ class EnhancedWebsiteScraper:
         Scraping tradicional com BeautifulSoup
         """
         try:
-            async with aiohttp.ClientSession() as session:
+            async with session_scope(self.session) as session:
                 async with session.get(url, headers=self.headers, timeout=30) as response:
                     if response.status != 200:
                         logger.warning(f"Status {response.status} para {url}")
@@ -9,6 +9,7 @@ import json
 import logging
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
+from collections import deque
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -42,6 +43,15 @@ class TokenEstimator:
     Estima uso de tokens e custos para múltiplos LLMs
     """
     
+    # Tokens de entrada lidos do cache de prompt custam ~10% do preço normal
+    CACHED_INPUT_PRICE_FACTOR = 0.1
+    
+    # Prefixo mínimo para o cache de prompt ser aplicado (OpenAI: 1024 tokens)
+    CACHE_MIN_PREFIX_TOKENS = 1024
+    
+    # Entradas mantidas no histórico de uso
+    USAGE_HISTORY_SIZE = 1000
+    
     def __init__(self):
         """Inicializa o estimador com modelos e preços"""
         
@@ -103,7 +113,8 @@ class TokenEstimator:
             'total_tokens': 0,
             'total_cost': 0.0,
             'requests': 0,
-            'history': []
+            # Histórico limitado às últimas USAGE_HISTORY_SIZE entradas
+            'history': deque(maxlen=self.USAGE_HISTORY_SIZE)
         }
     
     def get_encoding(self, model: str) -> Any:
@@ -160,7 +171,8 @@ class TokenEstimator:
     def calculate_cost(self, 
                        prompt_tokens: int, 
                        completion_tokens: int, 
-                       model: str) -> float:
+                       model: str,
+                       cached_prompt_tokens: int = 0) -> float:
         """
         Calcula custo baseado no uso de tokens
         
@@ -168,6 +180,7 @@ class TokenEstimator:
             prompt_tokens: Tokens do prompt
             completion_tokens: Tokens da resposta
             model: Modelo usado
+            cached_prompt_tokens: Parte de prompt_tokens lida do cache de prompt
             
         Returns:
             Custo em USD
@@ -185,7 +198,10 @@ class TokenEstimator:
         prices = self.pricing[model]
         
         # Calcular custo
-        input_cost = (prompt_tokens / 1000) * prices['input']
+        uncached_tokens = prompt_tokens - cached_prompt_tokens
+        input_cost = (
+            uncached_tokens + cached_prompt_tokens * self.CACHED_INPUT_PRICE_FACTOR
+        ) / 1000 * prices['input']
         output_cost = (completion_tokens / 1000) * prices['output']
         
         return input_cost + output_cost
@@ -228,7 +244,8 @@ class TokenEstimator:
     def estimate_batch_processing(self, 
                                  num_leads: int,
                                  llm_models: List[str],
-                                 analyses_per_llm: int = 10) -> Dict[str, Any]:
+                                 analyses_per_llm: int = 10,
+                                 static_prefix_tokens: int = 0) -> Dict[str, Any]:
         """
         Estima custos para processamento em lote
         
@@ -236,6 +253,9 @@ class TokenEstimator:
             num_leads: Número de leads
             llm_models: Lista de modelos LLM a usar
             analyses_per_llm: Número de análises por LLM
+            static_prefix_tokens: Tokens do prefixo estático comum a todas as
+                chamadas; acima de CACHE_MIN_PREFIX_TOKENS, é cobrado com desconto
+                de cache a partir da segunda chamada
             
         Returns:
             Dict com estimativas detalhadas
@@ -261,11 +281,18 @@ class TokenEstimator:
             completion_tokens = avg_response_tokens * analyses_per_llm
             
             # Multiplicar pelo número de leads
-            total_prompt_tokens = prompt_tokens * analyses_per_llm * num_leads
+            total_calls = analyses_per_llm * num_leads
+            total_prompt_tokens = (prompt_tokens + static_prefix_tokens) * total_calls
             total_completion_tokens = completion_tokens * num_leads
             
+            # Prefixo estático em cache em todas as chamadas exceto a primeira
+            cached_prompt_tokens = 0
+            if static_prefix_tokens >= self.CACHE_MIN_PREFIX_TOKENS:
+                cached_prompt_tokens = static_prefix_tokens * max(0, total_calls - 1)
+            
             # Calcular custo
-            cost = self.calculate_cost(total_prompt_tokens, total_completion_tokens, model)
+            cost = self.calculate_cost(total_prompt_tokens, total_completion_tokens, model,
+                                       cached_prompt_tokens=cached_prompt_tokens)
             
             # Adicionar às estimativas
             provider = self._get_provider(model)
@@ -332,12 +359,8 @@ class TokenEstimator:
         self.total_usage['by_model'][usage.model]['cost'] += usage.cost
         self.total_usage['by_model'][usage.model]['requests'] += 1
         
-        # Histórico
+        # Histórico (a deque descarta as entradas mais antigas)
         self.total_usage['history'].append(usage.to_dict())
-        
-        # Limitar histórico a últimas 1000 entradas
-        if len(self.total_usage['history']) > 1000:
-            self.total_usage['history'] = self.total_usage['history'][-1000:]
     
     def get_usage_report(self) -> Dict[str, Any]:
         """
@@ -0,0 +1,98 @@
+"""
+Testes do GDRFrameworkV31Enterprise: implementações por lead x por colunas
+"""
+
+import math
+import random
+
+import pandas as pd
+import pytest
+
+enterprise = pytest.importorskip('gdr_v3_1_enterprise')
+
+
+@pytest.fixture
+def framework():
+    # Os métodos testados não dependem dos componentes criados no __init__
+    return enterprise.GDRFrameworkV31Enterprise.__new__(enterprise.GDRFrameworkV31Enterprise)
+
+
+def _random_value(rng):
+    return rng.choice([
+        None, float('nan'), '', 0, 42, [], True,
+        'contato@empresa.com.br', 'sem-arroba.com', 'x@y',
+        '(11) 3456-7890', '11 98765-4321', '+55 51 99999 0000', '1234',
+        'https://empresa.com.br', 'www.empresa.com', 'empresa.com',
+        ['', 'vendas@loja.com'], ['(51) 3333-4444', 'sac@loja.com'], ['1234'],
+    ])
+
+
+def _random_lead(rng):
+    keys = (
+        list(enterprise.ORIGINAL_FIELD_SOURCES) + ['original_endereco_completo']
+        + list(enterprise.EMAIL_SOURCES + enterprise.PHONE_SOURCES
+               + enterprise.URL_SOURCES + enterprise.WHATSAPP_SOURCES)
+        + ['gdr_instagram_followers', 'gdr_facebook_likes', 'gdr_llm_openai_resumo', 'gdr_quality_score']
+    )
+    return {key: _random_value(rng) for key in keys if rng.random() < 0.6}
+
+
+def _random_sheet(rng, rows):
+    # Linhas de uma planilha: todas com as mesmas colunas
+    columns = [source for sources in enterprise.ORIGINAL_FIELD_SOURCES.values() for source in sources]
+    columns = [column for column in columns + list(enterprise.ADDRESS_FIELDS) if rng.random() < 0.7]
+    return [{column: rng.choice([None, float('nan'), '', 0, 123, 'Rua A', 'Porto Alegre'])
+             for column in columns} for _ in range(rows)]
+
+
+def _same(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def test_consolidate_contacts_matches_dataframe(framework):
+    """Consolidação por lead e em batch (por colunas) escolhem os mesmos contatos"""
+    rng = random.Random(7)
+    leads = [_random_lead(rng) for _ in range(400)]
+
+    batch = framework._consolidate_contacts_dataframe(pd.DataFrame(leads)).to_dict(orient='records')
+
+    for lead, expected in zip(leads, batch):
+        single = framework._consolidate_contacts(lead)
+        assert list(single) == list(expected)
+        assert all(_same(single[key], expected[key]) for key in single), (lead, single, expected)
+
+
+def test_preserve_original_data_matches_dataframe(framework):
+    """Preservação dos dados originais por lead e da planilha inteira coincidem"""
+    rng = random.Random(11)
+    for _ in range(20):
+        leads = _random_sheet(rng, 20)
+
+        batch = framework._preserve_original_dataframe(pd.DataFrame(leads)).to_dict(orient='records')
+
+        for lead, expected in zip(leads, batch):
+            single = framework._preserve_original_data(lead)
+            assert single == expected, lead
+
+
+def test_analysis_dependencies_name_existing_scrapers():
+    """Dependências das análises LLM apontam para scrapers de SCRAPER_SPECS
+    (senão a análise nunca espera pelo scraper em _start_streaming_llm)"""
+    dependencies = set().union(*enterprise.LLMAnalyzerV3.ANALYSIS_SCRAPER_DEPENDENCIES.values())
+
+    assert dependencies <= {spec.name for spec in enterprise.SCRAPER_SPECS}
+
+
+def test_load_checkpoint_skips_failed_leads(framework, tmp_path):
+    """Leads que falharam não contam como concluídos na retomada"""
+    checkpoint_file = tmp_path / "saida.jsonl"
+    checkpoint_file.write_bytes(b''.join(enterprise._checkpoint_line(entry) for entry in [
+        {'lead_id': '1', 'batch_number': 1, 'result': {'processing_status': 'completed'}},
+        {'lead_id': '2', 'batch_number': 1, 'result': {'processing_status': 'error', 'error_message': 'timeout'}},
+    ]) + b'{"lead_id": "3", "batch')
+
+    entries = framework._load_checkpoint(checkpoint_file)
+
+    assert [entry['lead_id'] for entry in entries] == ['1']
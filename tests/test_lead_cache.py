@@ -0,0 +1,145 @@
+"""
+Testes do cache DuckDB de leads (LeadCache)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from database.lead_cache import LeadCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with LeadCache(str(tmp_path / "cache.duckdb")) as lead_cache:
+        yield lead_cache
+
+
+def _result(score):
+    return {
+        'original_id': '12345678000190',
+        'original_nome': 'Padaria Central',
+        'gdr_sdr_lead_score': score,
+        'gdr_sdr_qualified': score >= 70,
+    }
+
+
+def _save_lead(cache, score):
+    cache.save_lead('12345678000190', _result(score))
+
+
+def _save_leads_bulk(cache, score):
+    cache.save_leads_bulk([('12345678000190', _result(score), {})])
+
+
+def _save(cache, score):
+    cache.save({'original_id': '12345678000190', 'original_nome': 'Padaria Central'}, _result(score))
+
+
+def _save_many(cache, score):
+    cache.save_many([({'original_id': '12345678000190', 'original_nome': 'Padaria Central'}, _result(score))])
+
+
+@pytest.mark.parametrize('save', [_save_lead, _save_leads_bulk, _save, _save_many])
+def test_resave_updates_score(cache, save):
+    """Regravar o mesmo lead atualiza score e resultado, sem duplicar a linha"""
+    save(cache, 40)
+    created_at, = cache.conn.execute("SELECT created_at FROM processed_leads").fetchone()
+
+    save(cache, 85)
+
+    rows = cache.conn.execute("""
+        SELECT sdr_score, sdr_qualified, full_result, created_at
+        FROM processed_leads WHERE cnpj = '12345678000190'
+    """).fetchall()
+    assert len(rows) == 1
+    sdr_score, sdr_qualified, full_result, resaved_created_at = rows[0]
+    assert sdr_score == 85
+    assert sdr_qualified is True
+    assert '"gdr_sdr_lead_score":85' in full_result.replace(' ', '')
+    assert resaved_created_at == created_at
+    assert cache.stats['errors'] == 0
+
+
+def test_old_composite_indexes_are_dropped(tmp_path):
+    """Bancos de versões anteriores perdem os índices sobre colunas mutáveis"""
+    db_path = str(tmp_path / "cache.duckdb")
+    with LeadCache(db_path) as lead_cache:
+        lead_cache.conn.execute("CREATE INDEX idx_qualified_score ON processed_leads (sdr_qualified, sdr_score)")
+
+    with LeadCache(db_path) as lead_cache:
+        _save_lead(lead_cache, 40)
+        _save_lead(lead_cache, 85)
+        indexes = {name for name, in lead_cache.conn.execute(
+            "SELECT index_name FROM duckdb_indexes() WHERE table_name = 'processed_leads'"
+        ).fetchall()}
+        score, = lead_cache.conn.execute("SELECT sdr_score FROM processed_leads").fetchone()
+
+    assert indexes == set(LeadCache.LEAD_INDEXES)
+    assert score == 85
+
+
+def test_concurrent_bulk_saves(cache):
+    """Lotes gravados por várias threads (asyncio.to_thread) não se intercalam"""
+    def save_batch(batch):
+        entries = [
+            (f'lead-{batch}-{i}', {'original_nome': f'Lead {batch}-{i}', 'gdr_sdr_lead_score': i},
+             {'website_scraper': {'url': f'https://lead-{batch}-{i}.com.br'}})
+            for i in range(50)
+        ]
+        return cache.save_leads_bulk(entries)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        saved = list(executor.map(save_batch, range(16)))
+
+    assert saved == [50] * 16
+    assert cache.conn.execute("SELECT COUNT(*) FROM processed_leads").fetchone()[0] == 800
+    assert cache.conn.execute("SELECT COUNT(*) FROM scraper_results").fetchone()[0] == 800
+    assert cache.stats['errors'] == 0
+
+
+def test_search_by_name_without_fresh_index(cache):
+    """Leads gravados após a última reconstrução do índice FTS (ou sem a
+    extensão instalada) são encontrados pela busca por substring"""
+    cache.refresh_name_index()
+    _save_lead(cache, 40)
+
+    results = cache.search_by_name('Central')
+
+    assert [r['gdr_sdr_lead_score'] for r in results] == [40]
+
+
+def test_evict_to_cascades_to_scraper_results(cache):
+    """Leads removidos por evict_to levam junto os resultados de scrapers"""
+    cache.save_leads_bulk([
+        (f'lead-{i}', {'original_nome': f'Lead {i}', 'gdr_sdr_lead_score': i},
+         {'website_scraper': {'url': f'https://lead-{i}.com.br'}})
+        for i in range(10)
+    ])
+    cache.LLM_RESPONSES_PER_LEAD = 2
+    for i in range(20):
+        cache.save_llm_response(f'prompt-{i}', 'openai', 'gpt-4o-mini', f'resposta {i}')
+
+    assert cache.evict_to(4) == 6
+
+    lead_ids = {lead_id for lead_id, in cache.conn.execute("SELECT lead_id FROM processed_leads").fetchall()}
+    scraper_lead_ids = {lead_id for lead_id, in cache.conn.execute("SELECT lead_id FROM scraper_results").fetchall()}
+    assert len(lead_ids) == 4
+    assert scraper_lead_ids == lead_ids
+    assert cache.conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0] == 8
+    assert cache.evict_to(4) == 0
+
+
+def test_cleanup_expired_uses_row_ttl(cache):
+    """Lead com cache_ttl_hours=1 gravado há 2h expira; o recente fica"""
+    cache.save_lead('expirado', {'original_nome': 'Lead antigo'}, ttl_hours=1)
+    cache.save_lead('recente', {'original_nome': 'Lead novo'}, ttl_hours=1)
+    cache.conn.execute("""
+        UPDATE processed_leads SET created_at = CURRENT_TIMESTAMP - INTERVAL 2 HOUR
+        WHERE lead_id = 'expirado'
+    """)
+
+    assert cache.cleanup_expired() == 1
+
+    remaining = cache.conn.execute("SELECT lead_id FROM processed_leads").fetchall()
+    assert remaining == [('recente',)]
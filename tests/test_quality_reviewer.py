@@ -0,0 +1,74 @@
+"""
+Testes do QualityReviewer: revisão por lead x por colunas
+"""
+
+import random
+
+import pandas as pd
+import pytest
+
+from quality_reviewer import QualityReviewer
+
+# Valores possíveis por campo; None simula scrapers que devolvem a chave vazia
+FIELD_VALUES = {
+    'original_nome': ['Padaria Central', 'Loja Sul', ''],
+    'original_cnpj': ['12.345.678/0001-90', '12345678000190', '123'],
+    'original_telefone': ['(51) 3333-4444', ''],
+    'original_email': ['contato@padaria.com.br', ''],
+    'gdr_concenso_email': ['contato@padaria.com.br', 'invalido@', ''],
+    'gdr_concenso_telefone': ['(51) 99999-0000', '51 3333-4444'],
+    'gdr_concenso_whatsapp': ['+55 51 99999-0000', '+55 51 98888-1111'],
+    'gdr_concenso_url': ['https://padaria.com.br', 'padaria.com.br'],
+    'gdr_instagram_username': ['padaria.central', 'Padaria Central!'],
+    'gdr_instagram_id': ['123456', ''],
+    'gdr_instagram_followers': [1500, '2k', 0],
+    'gdr_instagram_bio': ['Pães artesanais', ''],
+    'gdr_instagram_is_verified': [True, False],
+    'gdr_facebook_url': ['https://facebook.com/padaria', 'facebook.com/padaria'],
+    'gdr_facebook_category': ['Padaria', ''],
+    'gdr_facebook_likes': [320, 0],
+    'gdr_google_places_name': ['Padaria Central', 'Outro Nome'],
+    'gdr_google_places_rating': [4.6, ''],
+    'gdr_google_places_user_ratings_total': [87, 0],
+    'gdr_google_places_place_id': ['ChIJ123', ''],
+    'gdr_google_search_engine_url': ['https://padaria.com.br', ''],
+    'gdr_linktree_username': ['padaria', ''],
+    'gdr_linktree_url': ['https://linktr.ee/padaria', ''],
+    'gdr_linktree_detected': [True, False],
+    'gdr_linkedin_url': ['https://linkedin.com/company/padaria', ''],
+    'gdr_cwral4ai_email': ['contato@padaria.com.br', ''],
+    'gdr_cwral4ai_youtube_url': ['https://youtube.com/padaria', ''],
+    'gdr_concenso_synergy_score_categoria': ['ALTO', ''],
+}
+LLM_FIELDS = [f'gdr_llm_{provider}_analise_{i}'
+              for provider in ('openai', 'gemini', 'deepseek', 'claude', 'zhipuai') for i in range(7)]
+
+
+def _random_lead(rng):
+    lead = {}
+    for field_name, values in FIELD_VALUES.items():
+        if rng.random() < 0.7:
+            lead[field_name] = rng.choice(values + [None])
+    provider_fields = [f for f in LLM_FIELDS if rng.random() < 0.5]
+    for field_name in provider_fields:
+        lead[field_name] = rng.choice(['Análise completa', '', 'Análise em processamento', None])
+    return lead
+
+
+def test_review_dataframe_matches_review_lead():
+    """Revisão por colunas dá os mesmos scores que review_lead, inclusive
+    com chaves presentes e valor None"""
+    reviewer = QualityReviewer()
+    rng = random.Random(3)
+    leads = [_random_lead(rng) for _ in range(300)]
+
+    scores, _ = reviewer.review_dataframe(pd.DataFrame(leads), records=leads)
+
+    for lead, row in zip(leads, scores.to_dict(orient='records')):
+        report = reviewer.review_lead(lead)
+        assert row['gdr_quality_overall_score'] == pytest.approx(report.overall_score), lead
+        assert row['gdr_quality_completeness_score'] == pytest.approx(report.completeness_score), lead
+        assert row['gdr_quality_accuracy_score'] == pytest.approx(report.accuracy_score), lead
+        assert row['gdr_quality_consistency_score'] == pytest.approx(report.consistency_score), lead
+        assert row['gdr_quality_enrichment_score'] == pytest.approx(report.enrichment_score), lead
+        assert set(row['gdr_quality_issues']) == set(report.issues), lead
@@ -0,0 +1,58 @@
+"""
+Testes do SmartOrchestrator: estado isolado por chamada de execute_tasks
+"""
+
+import asyncio
+
+import pytest
+
+orchestrator = pytest.importorskip('scrapers.smart_orchestrator')
+
+SCRAPERS = ('instagram_scraper', 'facebook_scraper', 'website_scraper', 'google_search')
+
+
+async def _scrape(lead: str, scraper: str, delay: float) -> dict:
+    await asyncio.sleep(delay)
+    return {'lead': lead, 'scraper': scraper}
+
+
+def _lead_tasks(lead: str, index: int, scrapers=SCRAPERS):
+    # Atrasos diferentes por lead intercalam as conclusões entre os leads
+    return [
+        orchestrator.ScraperTask(name=scraper, function=_scrape,
+                                 args=(lead, scraper, 0.001 * ((index * 7 + i * 3) % 11)),
+                                 max_retries=0)
+        for i, scraper in enumerate(scrapers)
+    ]
+
+
+def test_concurrent_leads_do_not_share_results():
+    """Leads processados em paralelo pela mesma instância recebem apenas os
+    próprios resultados e estatísticas"""
+    smart = orchestrator.SmartOrchestrator(max_concurrent=3)
+    leads = [f'lead-{i}' for i in range(8)]
+
+    async def run_all():
+        return await asyncio.gather(*[
+            smart.execute_tasks(_lead_tasks(lead, i)) for i, lead in enumerate(leads)
+        ])
+
+    outputs = asyncio.run(run_all())
+
+    for lead, output in zip(leads, outputs):
+        assert set(output['results']) == set(SCRAPERS)
+        assert {result['lead'] for result in output['results'].values()} == {lead}
+        assert output['stats']['total_tasks'] == len(SCRAPERS)
+        assert output['stats']['successful'] == len(SCRAPERS)
+
+
+def test_sequential_leads_start_clean():
+    """Resultados de um lead anterior não aparecem no lead seguinte"""
+    smart = orchestrator.SmartOrchestrator()
+
+    asyncio.run(smart.execute_tasks(_lead_tasks('lead-a', 0)))
+    output = asyncio.run(smart.execute_tasks(_lead_tasks('lead-b', 1, scrapers=SCRAPERS[:1])))
+
+    assert list(output['results']) == ['instagram_scraper']
+    assert output['results']['instagram_scraper']['lead'] == 'lead-b'
+    assert output['stats']['total_tasks'] == 1